@@ -11,19 +11,27 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-# from channels.routing import ProtocolTypeRouter, URLRouter
-# from channels.auth import AuthMiddlewareStack
-# from diary import routing
-
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "back.settings")
 
-application = get_asgi_application()
-
-# application = ProtocolTypeRouter(
-#     {
-#         "http": get_asgi_application(),  # HTTP 요청을 처리
-#         "websocket": AuthMiddlewareStack(  # WebSocket 요청을 처리
-#             URLRouter(routing.websocket_urlpatterns)  # WebSocket 라우팅 설정
-#         ),
-#     }
-# )
+# app registry 가 준비된 뒤에 consumer / model 을 import 해야 한다
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.auth import AuthMiddlewareStack
+from channels.security.websocket import OriginValidator
+from diary import routing
+
+from django.conf import settings
+
+application = ProtocolTypeRouter(
+    {
+        "http": django_asgi_app,  # HTTP 요청을 처리
+        # WebSocket 요청을 처리, 세션 쿠키로 인증하므로 frontend origin 만 허용
+        "websocket": OriginValidator(
+            AuthMiddlewareStack(
+                URLRouter(routing.websocket_urlpatterns)  # WebSocket 라우팅 설정
+            ),
+            settings.CSRF_TRUSTED_ORIGINS,
+        ),
+    }
+)
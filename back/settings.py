@@ -203,6 +203,88 @@ CACHES = {
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
+# Redis sorted sets of follow edges (diary.follow_cache)
+FOLLOW_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Diary likes recorded in Redis and written to MySQL by `python manage.py flush_likes`
+LIKE_WRITE_BEHIND = config("LIKE_WRITE_BEHIND", default=False, cast=bool)
+LIKE_BUFFER_TIMEOUT = 60 * 60 * 24
+LIKE_FLUSH_INTERVAL = 1  # seconds
+LIKE_FLUSH_BATCH = 500  # diaries per flush
+
+# Redis sorted sets of monthly public diaries by like_count (diary.ranking)
+RANKING_TIMEOUT = 60 * 60 * 24 * 7
+
+# Mood statistics over public diaries (diary.analytics)
+ANALYTICS_CACHE_TIMEOUT = 60 * 10
+ANALYTICS_DEFAULT_DAYS = 365
+ANALYTICS_MAX_DAYS = 365 * 5
+ANALYTICS_CHUNK_SIZE = 5000  # rows read per query
+
+# User search index in Redis (diary.user_search, python manage.py rebuild_user_search)
+USER_SEARCH_LIMIT = 20
+USER_SEARCH_MAX_LIMIT = 50
+USER_SEARCH_CANDIDATES = 500  # ids ranked per query
+
+# Diary full-text index in Redis (diary.diary_search, python manage.py rebuild_diary_search)
+DIARY_SEARCH_BM25_K1 = 1.2
+DIARY_SEARCH_BM25_B = 0.75
+DIARY_SEARCH_RESULT_TIMEOUT = 60  # seconds a ranked result is kept for paging
+
+# Username Bloom filter in Redis (diary.username_bloom, python manage.py rebuild_username_bloom)
+USERNAME_BLOOM_CAPACITY = 1_000_000
+USERNAME_BLOOM_ERROR_RATE = 0.01
+USERNAME_BLOOM_STATS_INTERVAL = 10  # seconds between writes of a process's lookup counters
+
+# Presence sorted set in Redis (diary.presence)
+PRESENCE_ONLINE_SECONDS = 60
+PRESENCE_RETENTION = 60 * 60 * 24 * 7  # last_seen kept for a week
+PRESENCE_BULK_LIMIT = 200  # user ids per check-status/ request
+PRESENCE_CONNECTION_TIMEOUT = 60 * 2  # a WebSocket without heartbeats stops counting
+
+# WebSocket push (diary.consumers, ws/activity/), CHANNEL_LAYER=memory for a single process
+ASGI_APPLICATION = "back.asgi.application"
+if config("CHANNEL_LAYER", default="redis") == "memory":
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [("127.0.0.1", 6379)]},
+        }
+    }
+
+
+# Sentiment inference queue (python manage.py run_sentiment_worker)
+SENTIMENT_MAX_RETRIES = 3
+SENTIMENT_RETRY_DELAY = 10  # seconds, doubled on every retry
+SENTIMENT_WORKER_CONCURRENCY = 8
+
+# Inference backend: "torch" or "onnx" (python manage.py export_sentiment_onnx)
+SENTIMENT_BACKEND = "torch"
+SENTIMENT_ONNX_DIR = BASE_DIR / "onnx_models"
+SENTIMENT_ONNX_QUANTIZED = True
+# Bump when preprocessing changes so cached/stored results are recomputed
+SENTIMENT_MODEL_REVISION = 2
+SENTIMENT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+SENTIMENT_CACHE_STATS_INTERVAL = 10  # seconds between writes of a process's hit/miss counters
+
+# Long diaries are split into overlapping windows of SENTIMENT_MAX_LENGTH tokens
+SENTIMENT_MAX_LENGTH = 512
+SENTIMENT_WINDOW_STRIDE = 128  # tokens shared by consecutive windows
+
+# Inference threading (diary.cpu), 0 = split the available cores between processes
+SENTIMENT_INTRA_OP_THREADS = config("SENTIMENT_INTRA_OP_THREADS", default=0, cast=int)
+SENTIMENT_INTER_OP_THREADS = 1
+SENTIMENT_CPU_PINNING = config("SENTIMENT_CPU_PINNING", default=False, cast=bool)
+
+# Micro-batching (diary.batching.BatchingEngine)
+SENTIMENT_BATCH_MAX_SIZE = 16
+SENTIMENT_BATCH_MAX_WAIT_MS = 10
+SENTIMENT_BATCH_PADDING_RATIO = 1.5  # max longest/shortest token length per batch
+SENTIMENT_MAX_PENDING = 256  # requests waiting for the inference thread
+SENTIMENT_INFERENCE_TIMEOUT = 30  # seconds a job waits to enqueue, then for its result
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
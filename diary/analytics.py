@@ -0,0 +1,108 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+def cache_key(user_id, days):
+    return f"analytics:mood:{user_id or 'all'}:{days}"
+
+
+def load_probs(queryset, chunk_size=None):
+    """
+    분석이 끝난 일기의 (날짜, 확률) 을 numpy 배열로 읽는다.
+    pk 기준 keyset 으로 잘라 한 번에 chunk_size 행만 메모리에 올린다.
+    """
+    import numpy as np
+
+    from .bert import emotion
+    from .models import EmotionStatus
+
+    chunk_size = chunk_size or settings.ANALYTICS_CHUNK_SIZE
+    queryset = queryset.filter(emotion_status=EmotionStatus.DONE).order_by("pk")
+    dates, probs = [], []
+    last_pk = None
+    while True:
+        chunk = queryset.filter(pk__gt=last_pk) if last_pk else queryset
+        rows = list(chunk.values_list("pk", "date", "probs")[:chunk_size])
+        for pk, date, row_probs in rows:
+            if len(row_probs) == len(emotion):
+                dates.append(date)
+                probs.append([item["pv"] for item in row_probs])
+        if len(rows) < chunk_size:
+            break
+        last_pk = rows[-1][0]
+
+    return (
+        np.array(dates, dtype="datetime64[D]"),
+        np.array(probs, dtype=np.float64).reshape(-1, len(emotion)),
+    )
+
+
+def summarize(dates, probs, window=7):
+    # numpy / pandas 는 서버 시작이 아니라 첫 통계 요청 때 import
+    import numpy as np
+    import pandas as pd
+
+    from .bert import emotion
+
+    if len(probs) == 0:
+        return {"count": 0, "distribution": [], "weekly": [], "moving_average": []}
+
+    dominant = np.bincount(probs.argmax(axis=1), minlength=len(emotion))
+    mean = probs.mean(axis=0)
+
+    frame = pd.DataFrame(probs, index=pd.DatetimeIndex(dates), columns=emotion)
+    weekly = frame.resample("W-MON", label="left", closed="left")
+    weekly_mean = weekly.mean().dropna()
+    weekly_count = weekly.size()
+
+    # 일별 평균, 일기가 없는 날은 이동 평균에서 빠진다
+    daily = frame.groupby(level=0).mean()
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max()))
+    moving = daily.rolling(window, min_periods=1).mean().dropna()
+
+    return {
+        "count": int(len(probs)),
+        "distribution": [
+            {
+                "name": name,
+                "count": int(dominant[i]),
+                "ratio": round(float(dominant[i]) / len(probs), 4),
+                "pv": round(float(mean[i]), 2),
+            }
+            for i, name in enumerate(emotion)
+        ],
+        "weekly": [
+            {
+                "week": week.date().isoformat(),
+                "count": int(weekly_count[week]),
+                "pv": np.round(values, 2).tolist(),
+            }
+            for week, values in zip(weekly_mean.index, weekly_mean.to_numpy())
+        ],
+        "moving_average": [
+            {"date": day.date().isoformat(), "pv": np.round(values, 2).tolist()}
+            for day, values in zip(moving.index, moving.to_numpy())
+        ],
+    }
+
+
+def mood(user_id=None, days=None):
+    """공개 일기 (user_id 가 있으면 그 사용자의 공개 일기) 의 감정 통계, 캐시됨."""
+    from .models import Diary
+
+    days = days or settings.ANALYTICS_DEFAULT_DAYS
+    key = cache_key(user_id, days)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    since = timezone.localdate() - datetime.timedelta(days=days)
+    queryset = Diary.objects.filter(is_public=True, date__gte=since)
+    if user_id is not None:
+        queryset = queryset.filter(writer=user_id)
+    result = summarize(*load_probs(queryset))
+    cache.set(key, result, settings.ANALYTICS_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,154 @@
+import os
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .cpu import configure_onnx, configure_torch, process_threads
+
+model_name = "nlptown/bert-base-multilingual-uncased-sentiment"
+
+input_names = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, threads=None):
+        import torch
+        from transformers import BertForSequenceClassification
+
+        self.torch = torch
+        self.set_threads(threads or process_threads())
+        self.model = BertForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+
+    def set_threads(self, threads):
+        configure_torch(self.torch, threads)
+
+    def logits(self, input_ids, attention_mask):
+        inputs = {
+            "input_ids": self.torch.from_numpy(input_ids),
+            "attention_mask": self.torch.from_numpy(attention_mask),
+        }
+        with self.torch.no_grad():
+            outputs = self.model(**inputs)
+        return outputs.logits.numpy()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, quantized=None, threads=None):
+        import onnxruntime as ort
+
+        if quantized is None:
+            quantized = settings.SENTIMENT_ONNX_QUANTIZED
+        path = onnx_model_path(quantized)
+        if not os.path.exists(path):
+            raise ImproperlyConfigured(
+                f"{path} does not exist, run `python manage.py export_sentiment_onnx`"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        configure_onnx(options, threads or process_threads())
+        self.session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+        self.name = "onnx-int8" if quantized else "onnx"
+
+    def set_threads(self, threads):
+        # 세션 생성 후에는 스레드 수를 바꿀 수 없다
+        pass
+
+    def logits(self, input_ids, attention_mask):
+        input_ids = input_ids.astype(np.int64)
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask.astype(np.int64),
+            "token_type_ids": np.zeros_like(input_ids),
+        }
+        return self.session.run(["logits"], feeds)[0]
+
+
+def get_backend(name=None, quantized=None, threads=None):
+    name = name or settings.SENTIMENT_BACKEND
+    if name == "torch":
+        return TorchBackend(threads=threads)
+    if name == "onnx":
+        return OnnxBackend(quantized=quantized, threads=threads)
+    raise ImproperlyConfigured(f"Unknown sentiment backend: {name}")
+
+
+def model_version(name=None, quantized=None):
+    name = name or settings.SENTIMENT_BACKEND
+    if name == "onnx":
+        if quantized is None:
+            quantized = settings.SENTIMENT_ONNX_QUANTIZED
+        name = "onnx-int8" if quantized else "onnx"
+    return f"{model_name}:{name}:{settings.SENTIMENT_MODEL_REVISION}"
+
+
+def onnx_model_path(quantized):
+    filename = "model.int8.onnx" if quantized else "model.onnx"
+    return settings.SENTIMENT_ONNX_DIR / filename
+
+
+def export_onnx(quantize=True):
+    import torch
+    from transformers import BertForSequenceClassification, BertTokenizer
+
+    os.makedirs(settings.SENTIMENT_ONNX_DIR, exist_ok=True)
+    tokenizer = BertTokenizer.from_pretrained(model_name)
+    model = BertForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer("오늘은 좋은 하루였다", return_tensors="pt")
+    fp32_path = onnx_model_path(False)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    paths = [fp32_path]
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = onnx_model_path(True)
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        paths.append(int8_path)
+    return paths
+
+
+def parity_report(reference, candidate, corpus):
+    """두 BertModel 의 예측 클래스 일치율과 확률 차이를 비교한다."""
+    expected = reference.sentiment_analysis_batch(corpus)
+    actual = candidate.sentiment_analysis_batch(corpus)
+
+    mismatches = []
+    max_diff = 0.0
+    for sentence, (exp_class, exp_probs), (act_class, act_probs) in zip(
+        corpus, expected, actual
+    ):
+        if exp_class != act_class:
+            mismatches.append(
+                {"text": sentence, "expected": exp_class, "actual": act_class}
+            )
+        for exp, act in zip(exp_probs, act_probs):
+            max_diff = max(max_diff, abs(exp["pv"] - act["pv"]))
+
+    return {
+        "samples": len(corpus),
+        "agreement": round(1 - len(mismatches) / len(corpus), 4),
+        "max_pv_diff": round(max_diff, 2),
+        "mismatches": mismatches,
+    }
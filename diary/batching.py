@@ -0,0 +1,184 @@
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class InferenceBusy(Exception):
+    pass
+
+
+class _Request:
+    __slots__ = ("encoded", "length", "future", "enqueued_at")
+
+    def __init__(self, encoded, future):
+        # encoded: 긴 일기는 window 여러 개
+        self.encoded = encoded
+        self.length = max(len(window) for window in encoded)
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class BatchingEngine:
+    """
+    여러 스레드에서 들어오는 감정 분석 요청을 모아 한 번의 forward pass 로 처리한다.
+    모델은 engine 스레드에서만 실행되고, 대기 요청 수는 max_pending 으로 제한된다.
+
+    요청은 max_wait_ms 동안 또는 max_batch_size 개가 찰 때까지 모이고,
+    토큰 길이로 정렬한 뒤 길이 차이가 padding_ratio 를 넘으면 별도 배치로 나눠
+    padding 을 줄인다. tokenize 는 호출한 스레드에서, 모델 실행은 engine 스레드
+    하나에서만 이루어진다.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size=None,
+        max_wait_ms=None,
+        padding_ratio=None,
+        max_pending=None,
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size or settings.SENTIMENT_BATCH_MAX_SIZE
+        if max_wait_ms is None:
+            max_wait_ms = settings.SENTIMENT_BATCH_MAX_WAIT_MS
+        self.max_wait = max_wait_ms / 1000
+        self.padding_ratio = padding_ratio or settings.SENTIMENT_BATCH_PADDING_RATIO
+
+        self._queue = queue.Queue(max_pending or settings.SENTIMENT_MAX_PENDING)
+        self._thread = None
+        self._stopping = False
+
+        self._lock = threading.Lock()
+        self._histogram = Counter()
+        self._requests = 0
+        self._forward_seconds = 0.0
+        self._padded_tokens = 0
+        self._real_tokens = 0
+        self._latencies = deque(maxlen=1000)
+
+    # lifecycle
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="sentiment-batching", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # client api
+    def submit(self, sentence, timeout=None):
+        future = Future()
+        request = _Request(self.model.encode(sentence), future)
+        try:
+            self._queue.put(request, timeout=timeout)
+        except queue.Full:
+            raise InferenceBusy(f"{self._queue.maxsize} requests already pending")
+        return future
+
+    def sentiment_analysis(self, sentence, timeout=None):
+        return self.submit(sentence, timeout).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            batches = sum(self._histogram.values())
+            latencies = sorted(self._latencies)
+            padded = self._padded_tokens
+            return {
+                "batches": batches,
+                "requests": self._requests,
+                "batch_size_histogram": dict(sorted(self._histogram.items())),
+                "mean_batch_size": round(self._requests / batches, 2) if batches else 0,
+                "mean_forward_ms": (
+                    round(self._forward_seconds / batches * 1000, 2) if batches else 0
+                ),
+                "padding_waste": (
+                    round(1 - self._real_tokens / padded, 3) if padded else 0
+                ),
+                "latency_p50_ms": _percentile(latencies, 50),
+                "latency_p95_ms": _percentile(latencies, 95),
+                "queue_depth": self._queue.qsize(),
+            }
+
+    # engine thread
+    def _run(self):
+        while not self._stopping:
+            batch = self._collect()
+            for group in self._group_by_length(batch):
+                self._forward(group)
+
+    def _collect(self):
+        batch = []
+        first = self._queue.get()
+        if first is _STOP:
+            self._stopping = True
+            return batch
+        batch.append(first)
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._stopping = True
+                break
+            batch.append(item)
+        return batch
+
+    def _group_by_length(self, batch):
+        groups = []
+        for request in sorted(batch, key=lambda r: r.length):
+            if groups and request.length <= groups[-1][0].length * self.padding_ratio:
+                groups[-1].append(request)
+            else:
+                groups.append([request])
+        return groups
+
+    def _forward(self, group):
+        started = time.monotonic()
+        try:
+            results = self.model.predict_encoded([r.encoded for r in group])
+        except Exception as e:
+            logger.exception("batched sentiment forward pass failed")
+            for request in group:
+                request.future.set_exception(e)
+            return
+        finished = time.monotonic()
+
+        for request, result in zip(group, results):
+            request.future.set_result(result)
+
+        with self._lock:
+            self._histogram[len(group)] += 1
+            self._requests += len(group)
+            self._forward_seconds += finished - started
+            windows = [window for r in group for window in r.encoded]
+            self._padded_tokens += group[-1].length * len(windows)
+            self._real_tokens += sum(len(window) for window in windows)
+            self._latencies.extend(finished - r.enqueued_at for r in group)
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return round(values[index] * 1000, 2)
@@ -1,30 +1,113 @@
-from transformers import BertTokenizer, BertForSequenceClassification
-import torch
-import torch.nn.functional as F
+import gc
+import threading
 
-model_name = "nlptown/bert-base-multilingual-uncased-sentiment"
+import numpy as np
+from django.conf import settings
+
+from .backends import get_backend, model_name
+
+# 0: 매우 부정적, 1: 부정적, 2: 중립, 3: 긍정적, 4: 매우 긍정적
+emotion = ["매우 부정", "부정", "중립", "긍정", "매우 긍정"]
 
 
 class BertModel:
-    def __init__(self):
-        self.tokenizer = BertTokenizer.from_pretrained(model_name)
-        self.model = BertForSequenceClassification.from_pretrained(model_name)
+    def __init__(self, backend=None, quantized=None, threads=None):
+        from transformers import BertTokenizerFast
+
+        self.tokenizer = BertTokenizerFast.from_pretrained(model_name)
+        # torch / onnx (settings.SENTIMENT_BACKEND)
+        self.backend = get_backend(backend, quantized=quantized, threads=threads)
+
+    def encode(self, sentence):
+        # 512 토큰이 넘는 일기는 stride 만큼 겹치는 window 여러 개로 나눈다
+        return self.tokenizer(
+            sentence,
+            truncation=True,
+            max_length=settings.SENTIMENT_MAX_LENGTH,
+            stride=settings.SENTIMENT_WINDOW_STRIDE,
+            return_overflowing_tokens=True,
+        )["input_ids"]
+
+    def predict_encoded(self, encoded):
+        # encoded: encode() 결과 리스트, 모든 window 를 한 번의 forward pass 로 처리
+        windows = [window for windows in encoded for window in windows]
+        inputs = self.tokenizer.pad({"input_ids": windows}, return_tensors="np")
+        logits = self.backend.logits(inputs["input_ids"], inputs["attention_mask"])
+        window_probs = softmax(logits)
+        # [CLS], [SEP] 를 제외한 토큰 수로 가중 평균
+        weights = inputs["attention_mask"].sum(axis=1) - 2
+
+        results = []
+        start = 0
+        for windows in encoded:
+            end = start + len(windows)
+            probs_array = np.average(
+                window_probs[start:end],
+                axis=0,
+                weights=np.maximum(weights[start:end], 1),
+            )
+            results.append(
+                (int(probs_array.argmax()), self.format_probs(probs_array.tolist()))
+            )
+            start = end
+        return results
+
+    def sentiment_analysis_batch(self, sentences):
+        return self.predict_encoded([self.encode(sentence) for sentence in sentences])
 
     def sentiment_analysis(self, sentence):
-        inputs = self.tokenizer(
-            sentence, return_tensors="pt", padding=True, truncation=True
-        )
-        self.model.eval()
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        probs_tensor = F.softmax(outputs.logits, dim=1)
-        probs_list = probs_tensor.numpy().flatten().tolist()
-        emotion = ["매우 부정", "부정", "중립", "긍정", "매우 긍정"]
-        probs = [
+        # 예측값, 확률
+        return self.sentiment_analysis_batch([sentence])[0]
+
+    @staticmethod
+    def format_probs(probs_list):
+        return [
             {"name": emotion[i], "pv": round(prob * 100, 2)}
             for i, prob in enumerate(probs_list)
         ]
-        # 0: 매우 부정적, 1: 부정적, 2: 중립, 3: 긍정적, 4: 매우 긍정적
-        predicted_class = torch.argmax(probs_tensor, dim=-1).item()
-        # 예측값, 확률
-        return predicted_class, probs
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+# 프로세스 당 하나의 모델, 처음 사용할 때 로드
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = BertModel()
+    return _model
+
+
+def warmup():
+    """모델을 미리 로드하고 한 번 실행해 첫 요청의 지연을 없앤다."""
+    model = get_model()
+    model.sentiment_analysis("warm up")
+    return model
+
+
+def preload():
+    """
+    fork 하기 전에 master 프로세스에서 가중치만 로드한다.
+
+    worker 는 fork 로 만들어지므로 가중치 페이지를 copy-on-write 로 공유한다.
+    GC 가 객체 헤더를 건드려 페이지가 복사되지 않도록 gc.freeze() 하고,
+    intra-op 스레드 풀이 fork 전에 생기지 않도록 여기서는 추론을 하지 않는다.
+    ONNX Runtime 세션은 생성 시 스레드 풀을 만들므로 torch 에서만 미리 로드한다.
+    """
+    if settings.SENTIMENT_BACKEND != "torch":
+        return None
+
+    model = get_model()
+    for param in model.backend.model.parameters():
+        param.requires_grad_(False)
+    gc.collect()
+    gc.freeze()
+    return model
@@ -0,0 +1,107 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from . import realtime
+from .models import Diary
+from .presence import leave, touch
+
+
+class ActivityConsumer(AsyncJsonWebsocketConsumer):
+    """
+    접속 상태 / 새 댓글 / 좋아요 수 push, update-status/ 와 check-status/ polling 대신 사용.
+
+    client -> server
+        {"type": "heartbeat"}                  접속 시각 / 연결 만료 시각 갱신
+        {"type": "subscribe", "diary": id}     일기의 댓글 / 좋아요 받기
+        {"type": "unsubscribe", "diary": id}
+    server -> client
+        {"type": "presence", "user", "status"}           팔로우한 사용자 접속 / 종료
+        {"type": "comment", "comment"}                   구독한 일기의 새 댓글
+        {"type": "like", "diary", "like_count"}
+        {"type": "comment.like", "comment", "like_count"}
+    """
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+        self.diaries = set()
+        await self.channel_layer.group_add(
+            realtime.user_group(self.user.pk), self.channel_name
+        )
+        await self.accept()
+        await self.mark_online()
+
+    async def disconnect(self, code):
+        if not getattr(self, "user", None) or not self.user.is_authenticated:
+            return
+        for diary_id in self.diaries:
+            await self.channel_layer.group_discard(
+                realtime.diary_group(diary_id), self.channel_name
+            )
+        await self.channel_layer.group_discard(
+            realtime.user_group(self.user.pk), self.channel_name
+        )
+        if await database_sync_to_async(self.offline)():
+            await realtime.push_presence(self.user.pk, False)
+
+    async def receive_json(self, content):
+        kind = content.get("type")
+        if kind == "heartbeat":
+            await self.mark_online()
+        elif kind == "subscribe":
+            diary_id = str(content.get("diary"))
+            if await database_sync_to_async(self.can_view)(diary_id):
+                self.diaries.add(diary_id)
+                await self.channel_layer.group_add(
+                    realtime.diary_group(diary_id), self.channel_name
+                )
+            else:
+                await self.send_json({"type": "error", "detail": "Not found"})
+        elif kind == "unsubscribe":
+            diary_id = str(content.get("diary"))
+            self.diaries.discard(diary_id)
+            await self.channel_layer.group_discard(
+                realtime.diary_group(diary_id), self.channel_name
+            )
+
+    async def mark_online(self):
+        # 여러 탭으로 접속한 경우 첫 연결 / 마지막 연결에서만 알린다
+        if await database_sync_to_async(self.online)():
+            await realtime.push_presence(self.user.pk, True)
+
+    def online(self):
+        touch(self.user.pk)
+        return realtime.connected(self.user.pk, self.channel_name)
+
+    def offline(self):
+        # 다른 연결이 남아 있으면 계속 접속 중, 마지막 연결이면 종료 시각만 기록
+        if realtime.disconnected(self.user.pk, self.channel_name):
+            leave(self.user.pk)
+            return True
+        return False
+
+    def can_view(self, diary_id):
+        try:
+            return Diary.objects.filter(
+                Q(is_public=True) | Q(writer=self.user), pk=diary_id
+            ).exists()
+        except ValidationError:
+            # UUID 형식이 아닌 id
+            return False
+
+    # group_send 의 "type" 에 맞는 handler, 받은 event 를 그대로 전달한다
+    async def presence(self, event):
+        await self.send_json(event)
+
+    async def comment(self, event):
+        await self.send_json(event)
+
+    async def like(self, event):
+        await self.send_json(event)
+
+    async def comment_like(self, event):
+        await self.send_json(event)
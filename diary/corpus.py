@@ -0,0 +1,40 @@
+import random
+
+# 감정 분석 parity / benchmark 용 샘플 일기
+SAMPLE_DIARIES = [
+    "오늘은 정말 행복한 하루였다. 친구들과 맛있는 저녁을 먹었다.",
+    "아침부터 비가 와서 기분이 우울했다.",
+    "시험을 망쳐서 너무 속상하다. 열심히 준비했는데.",
+    "그냥 평범한 하루. 회사 갔다가 집에 왔다.",
+    "드디어 합격 소식을 들었다! 너무 기쁘다.",
+    "동생이랑 싸웠다. 화가 나서 잠이 안 온다.",
+    "산책을 하면서 노을을 봤는데 마음이 편안해졌다.",
+    "버스를 놓쳐서 지각했다. 최악의 하루.",
+    "새로 산 책이 생각보다 재미있었다.",
+    "몸이 아파서 하루 종일 누워 있었다.",
+    "오랜만에 가족들과 여행을 떠났다. 날씨도 좋았다.",
+    "별일 없이 지나간 하루였다.",
+    "Today was a wonderful day, I finally finished my project.",
+    "I feel exhausted and nothing went right today.",
+    "Had lunch with an old friend, it was nice to catch up.",
+    "The weather was terrible and my flight got cancelled.",
+    "Nothing special happened, just a regular Tuesday.",
+    "I am so proud of myself for running my first marathon!",
+    "Lost my wallet on the subway. Really frustrating.",
+    "Spent the evening reading and drinking tea. Quiet and calm.",
+]
+
+
+def synthetic_diaries(count, length, seed=0):
+    """SAMPLE_DIARIES 문장을 이어 붙여 대략 length 글자인 일기 count 개를 만든다."""
+    rng = random.Random(seed)
+    diaries = []
+    for _ in range(count):
+        parts = []
+        size = 0
+        while size < length:
+            sentence = rng.choice(SAMPLE_DIARIES)
+            parts.append(sentence)
+            size += len(sentence) + 1
+        diaries.append(" ".join(parts)[:length])
+    return diaries
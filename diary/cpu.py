@@ -0,0 +1,61 @@
+import os
+
+from django.conf import settings
+
+
+def available_cpus():
+    return sorted(os.sched_getaffinity(0))
+
+
+def cpu_slice(index, processes, cpus=None):
+    """processes 개의 프로세스 중 index 번째가 사용할 CPU 목록."""
+    cpus = cpus or available_cpus()
+    size = max(1, len(cpus) // processes)
+    start = (index * size) % len(cpus)
+    return cpus[start : start + size]
+
+
+def intra_op_threads(processes=1):
+    # 0 이면 프로세스마다 코어를 나눠 가진다 (N worker 가 코어 수만큼 스레드를 만들지 않도록)
+    threads = settings.SENTIMENT_INTRA_OP_THREADS
+    if threads:
+        return threads
+    return max(1, len(available_cpus()) // max(1, processes))
+
+
+def configure_process(index=0, processes=1):
+    """
+    추론 프로세스의 스레드 정책을 적용한다. torch / onnxruntime 을 import 하기 전에
+    호출해야 OpenMP/MKL 스레드 수까지 반영된다.
+    """
+    if settings.SENTIMENT_CPU_PINNING:
+        cpus = cpu_slice(index, processes)
+        os.sched_setaffinity(0, cpus)
+        threads = settings.SENTIMENT_INTRA_OP_THREADS or len(cpus)
+    else:
+        threads = intra_op_threads(processes)
+
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["SENTIMENT_PROCESS_THREADS"] = str(threads)
+    return threads
+
+
+def process_threads():
+    # configure_process() 가 정한 값, 없으면 settings 기준
+    threads = os.environ.get("SENTIMENT_PROCESS_THREADS")
+    return int(threads) if threads else intra_op_threads()
+
+
+def configure_torch(torch, threads):
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(settings.SENTIMENT_INTER_OP_THREADS)
+    except RuntimeError:
+        # inter-op 스레드 수는 병렬 작업이 시작된 뒤에는 바꿀 수 없다
+        pass
+
+
+def configure_onnx(options, threads):
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = settings.SENTIMENT_INTER_OP_THREADS
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import math
+import re
+import unicodedata
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+# 일기 전문 검색 index (text + content)
+#
+# diarysearch:term:{term}     sorted set, diary id -> BM25 term 가중치 (tf, 문서 길이 반영)
+# diarysearch:doc:{id}        hash, 삭제/갱신할 때 쓰는 terms / 길이 / 작성자 / 감정
+# diarysearch:public          sorted set (score 0), 공개 일기
+# diarysearch:user:{id}       sorted set (score 0), 사용자의 모든 일기
+# diarysearch:emotion:{n}     sorted set (score 0), 감정이 n 인 일기
+# diarysearch:stats           hash, docs (문서 수) / length (전체 term 수)
+# diarysearch:result:{hash}   검색 결과 (점수 순), cursor 로 이어서 읽는다
+#
+# 문서를 읽고 바꾸는 함수는 diarysearch:doc:{id} 를 WATCH 하는 transaction 이라
+# 동시에 갱신해도 term / stats 가 문서와 어긋나지 않는다.
+#
+# 점수 = sum(idf(term) * weight(term, diary)), 모든 term 을 포함한 일기만 (AND)
+# weight 는 색인할 때의 평균 문서 길이로 계산하므로 rebuild_diary_search 로 가끔 다시 맞춘다
+PUBLIC_KEY = "diarysearch:public"
+STATS_KEY = "diarysearch:stats"
+
+WORD = re.compile(r"\w+")
+HANGUL = re.compile(r"[가-힣]")
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def term_key(term):
+    return f"diarysearch:term:{term}"
+
+
+def doc_key(diary_id):
+    return f"diarysearch:doc:{diary_id}"
+
+
+def user_key(user_id):
+    return f"diarysearch:user:{user_id}"
+
+
+def emotion_key(emotion):
+    return f"diarysearch:emotion:{emotion}"
+
+
+def tokenize(text):
+    """영문/숫자는 단어, 한글이 섞인 단어는 글자 2-gram (조사가 붙어도 찾을 수 있도록)."""
+    terms = []
+    for word in WORD.findall(unicodedata.normalize("NFKC", text or "").lower()):
+        if HANGUL.search(word) and len(word) > 1:
+            terms += [word[i : i + 2] for i in range(len(word) - 1)]
+        else:
+            terms.append(word)
+    return terms
+
+
+def term_weights(terms, avgdl):
+    k1, b = settings.DIARY_SEARCH_BM25_K1, settings.DIARY_SEARCH_BM25_B
+    counts = {}
+    for term in terms:
+        counts[term] = counts.get(term, 0) + 1
+    norm = k1 * (1 - b + b * len(terms) / max(avgdl, 1))
+    return {term: tf * (k1 + 1) / (tf + norm) for term, tf in counts.items()}
+
+
+def avg_length(conn):
+    stats = conn.hgetall(STATS_KEY)
+    docs = int(stats.get(b"docs", 0))
+    return int(stats.get(b"length", 0)) / docs if docs else 1
+
+
+def document_terms(diary):
+    return tokenize(f"{diary.text or ''}\n{diary.content or ''}")
+
+
+def index(diary, conn=None, avgdl=None):
+    conn = conn or get_connection()
+    terms = document_terms(diary)
+    weights = term_weights(terms, avgdl or avg_length(conn))
+    diary_id = str(diary.pk)
+
+    def update(pipe):
+        old = pipe.hgetall(doc_key(diary_id))
+        pipe.multi()
+        if old:
+            unindex(pipe, diary_id, old)
+        for term, weight in weights.items():
+            pipe.zadd(term_key(term), {diary_id: weight})
+        pipe.zadd(user_key(diary.writer_id), {diary_id: 0})
+        if diary.is_public:
+            pipe.zadd(PUBLIC_KEY, {diary_id: 0})
+        if diary.emotion is not None:
+            pipe.zadd(emotion_key(diary.emotion), {diary_id: 0})
+        pipe.hset(
+            doc_key(diary_id),
+            mapping={
+                "terms": json.dumps(list(weights), ensure_ascii=False),
+                "length": len(terms),
+                "writer": diary.writer_id,
+                "emotion": "" if diary.emotion is None else diary.emotion,
+            },
+        )
+        pipe.hincrby(STATS_KEY, "docs", 1)
+        pipe.hincrby(STATS_KEY, "length", len(terms))
+
+    # 읽은 문서가 쓰기 전에 바뀌면 (동시에 들어온 저장) 다시 읽어서 처리한다
+    conn.transaction(update, doc_key(diary_id))
+
+
+def unindex(pipe, diary_id, doc):
+    for term in json.loads(doc[b"terms"]):
+        pipe.zrem(term_key(term), diary_id)
+    pipe.zrem(user_key(doc[b"writer"].decode()), diary_id)
+    pipe.zrem(PUBLIC_KEY, diary_id)
+    if doc[b"emotion"]:
+        pipe.zrem(emotion_key(doc[b"emotion"].decode()), diary_id)
+    pipe.delete(doc_key(diary_id))
+    pipe.hincrby(STATS_KEY, "docs", -1)
+    pipe.hincrby(STATS_KEY, "length", -int(doc[b"length"]))
+
+
+def remove(diary_id, conn=None):
+    conn = conn or get_connection()
+    diary_id = str(diary_id)
+
+    def update(pipe):
+        doc = pipe.hgetall(doc_key(diary_id))
+        if not doc:
+            return
+        pipe.multi()
+        unindex(pipe, diary_id, doc)
+
+    conn.transaction(update, doc_key(diary_id))
+
+
+def set_public(diary_id, is_public):
+    # text / content 는 그대로이고 공개 여부만 바뀐 저장
+    diary_id = str(diary_id)
+
+    def update(pipe):
+        if not pipe.exists(doc_key(diary_id)):
+            return
+        pipe.multi()
+        if is_public:
+            pipe.zadd(PUBLIC_KEY, {diary_id: 0})
+        else:
+            pipe.zrem(PUBLIC_KEY, diary_id)
+
+    get_connection().transaction(update, doc_key(diary_id))
+
+
+def set_emotion(diary_id, emotion):
+    # 감정 분석 결과가 나중에 저장될 때 (inference.run_job)
+    diary_id = str(diary_id)
+
+    def update(pipe):
+        old = pipe.hget(doc_key(diary_id), "emotion")
+        if old is None:
+            return
+        pipe.multi()
+        if old:
+            pipe.zrem(emotion_key(old.decode()), diary_id)
+        pipe.zadd(emotion_key(emotion), {diary_id: 0})
+        pipe.hset(doc_key(diary_id), "emotion", emotion)
+
+    get_connection().transaction(update, doc_key(diary_id))
+
+
+def idf(docs, df):
+    return math.log(1 + (docs - df + 0.5) / (df + 0.5))
+
+
+def result_key(query, user_id, emotion):
+    digest = hashlib.sha1(f"{user_id}\0{emotion}\0{query}".encode()).hexdigest()
+    return f"diarysearch:result:{digest}"
+
+
+def search(query, user_id, emotion=None):
+    """
+    user_id 가 볼 수 있는 (공개 또는 본인) 일기 중 query 의 모든 term 을 포함한 일기를
+    점수 순으로 담은 sorted set key 를 반환한다. 같은 검색은 잠시 재사용한다.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return None
+    conn = get_connection()
+    key = result_key(" ".join(terms), user_id, emotion)
+    if conn.exists(key):
+        return key
+
+    docs = int(conn.hget(STATS_KEY, "docs") or 0)
+    pipe = conn.pipeline()
+    for term in terms:
+        pipe.zcard(term_key(term))
+    dfs = pipe.execute()
+    if not all(dfs):
+        return None
+
+    # 공개/본인/감정 set 은 weight 0 으로 거르기만 한다 (교집합은 가장 작은 set 부터 계산됨)
+    weights = {term_key(term): idf(docs, df) for term, df in zip(terms, dfs)}
+    filters = {emotion_key(emotion): 0} if emotion is not None else {}
+    public, own = f"{key}:public", f"{key}:own"
+    pipe = conn.pipeline()
+    pipe.zinterstore(public, {**weights, **filters, PUBLIC_KEY: 0})
+    pipe.zinterstore(own, {**weights, **filters, user_key(user_id): 0})
+    pipe.zunionstore(key, [public, own], aggregate="MAX")
+    pipe.delete(public, own)
+    # 결과가 없어도 key 를 남겨 같은 검색을 반복하지 않는다
+    pipe.zadd(key, {"_": -1})
+    pipe.expire(key, settings.DIARY_SEARCH_RESULT_TIMEOUT)
+    pipe.execute()
+    return key
+
+
+def page(key, offset, size):
+    """(diary id, 점수) 목록과 다음 페이지가 있는지."""
+    if key is None:
+        return [], False
+    rows = get_connection().zrevrangebyscore(
+        key, "+inf", 0, start=offset, num=size + 1, withscores=True
+    )
+    has_next = len(rows) > size
+    return [(member.decode(), score) for member, score in rows[:size]], has_next
+
+
+def rebuild(chunk_size=1000):
+    from .models import Diary
+
+    conn = get_connection()
+    keys = list(conn.scan_iter(match="diarysearch:*", count=1000))
+    for i in range(0, len(keys), 1000):
+        conn.delete(*keys[i : i + 1000])
+
+    rows = Diary.objects.order_by("pk").only(
+        "id", "text", "content", "writer", "is_public", "emotion"
+    )
+    # 평균 문서 길이를 먼저 구해야 weight 가 맞는다
+    docs = length = 0
+    for diary in rows.iterator(chunk_size=chunk_size):
+        docs += 1
+        length += len(document_terms(diary))
+    avgdl = length / docs if docs else 1
+    for diary in rows.iterator(chunk_size=chunk_size):
+        index(diary, conn, avgdl)
+    return docs
@@ -0,0 +1,62 @@
+from django.db import connection, transaction
+
+# 하루 요약은 그날 일기 몇 개로 다시 계산한다 (user, date index 로 한 번의 조회)
+
+
+def summarize(rows):
+    """rows: [(emotion_status, probs)] -> (diary_count, 평균 probs, 대표 감정)"""
+    from .models import EmotionStatus
+
+    analysed = [
+        probs for status, probs in rows if status == EmotionStatus.DONE and probs
+    ]
+    if not analysed:
+        return len(rows), [], None
+
+    mean = [
+        {
+            "name": item["name"],
+            "pv": round(sum(probs[i]["pv"] for probs in analysed) / len(analysed), 2),
+        }
+        for i, item in enumerate(analysed[0])
+    ]
+    dominant = max(range(len(mean)), key=lambda i: mean[i]["pv"])
+    return len(rows), mean, dominant
+
+
+def refresh(user_id, date):
+    from .models import DailyEmotionSummary, Diary
+
+    with transaction.atomic():
+        rows = list(
+            Diary.objects.filter(writer=user_id, date=date).values_list(
+                "emotion_status", "probs"
+            )
+        )
+        if not rows:
+            DailyEmotionSummary.objects.filter(user=user_id, date=date).delete()
+            return
+        diary_count, probs, emotion = summarize(rows)
+        # INSERT ... ON DUPLICATE KEY UPDATE: 동시에 갱신해도 IntegrityError 가 없다.
+        # MySQL 은 충돌 대상 필드를 지정할 수 없고 (unique key 전체), 다른 DB 는 지정해야 한다.
+        target = connection.features.supports_update_conflicts_with_target
+        DailyEmotionSummary.objects.bulk_create(
+            [
+                DailyEmotionSummary(
+                    user_id=user_id,
+                    date=date,
+                    diary_count=diary_count,
+                    probs=probs,
+                    emotion=emotion,
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=["user", "date"] if target else None,
+            update_fields=["diary_count", "probs", "emotion"],
+        )
+
+
+def refresh_many(keys):
+    # keys: {(user_id, date)}
+    for user_id, date in keys:
+        refresh(user_id, date)
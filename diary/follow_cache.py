@@ -0,0 +1,80 @@
+from django.conf import settings
+
+from . import zset_cache
+
+# 팔로우 관계 캐시: follow:{user_id}:followings / follow:{user_id}:followers
+# sorted set (diary.zset_cache), member 는 상대 user id, score 는 팔로우한 시각
+FOLLOWINGS = "followings"
+FOLLOWERS = "followers"
+
+
+def get_connection():
+    return zset_cache.get_connection()
+
+
+def cache_key(user_id, kind):
+    return f"follow:{user_id}:{kind}"
+
+
+def rows(user_id, kind):
+    from .models import Follow
+
+    if kind == FOLLOWINGS:
+        rows = Follow.objects.filter(follower=user_id).values_list(
+            "following_id", "created_at"
+        )
+    else:
+        rows = Follow.objects.filter(following=user_id).values_list(
+            "follower_id", "created_at"
+        )
+    return [(other, created.timestamp()) for other, created in rows]
+
+
+def load(user_id, kind):
+    return zset_cache.load(
+        cache_key(user_id, kind),
+        lambda: rows(user_id, kind),
+        settings.FOLLOW_CACHE_TIMEOUT,
+    )
+
+
+def ensure(user_id, kind):
+    return zset_cache.ensure(
+        cache_key(user_id, kind),
+        lambda: rows(user_id, kind),
+        settings.FOLLOW_CACHE_TIMEOUT,
+    )
+
+
+def ids(user_id, kind):
+    members = get_connection().zrevrange(ensure(user_id, kind), 0, -1)
+    return [int(member) for member in members if member != zset_cache.EMPTY.encode()]
+
+
+def is_following(follower_id, following_id):
+    key = ensure(follower_id, FOLLOWINGS)
+    return get_connection().zscore(key, str(following_id)) is not None
+
+
+def edges(follower_id, following_id):
+    return (
+        (follower_id, FOLLOWINGS, following_id),
+        (following_id, FOLLOWERS, follower_id),
+    )
+
+
+def add_edge(follower_id, following_id, created_at):
+    for user_id, kind, other in edges(follower_id, following_id):
+        zset_cache.add(
+            cache_key(user_id, kind),
+            other,
+            created_at.timestamp(),
+            settings.FOLLOW_CACHE_TIMEOUT,
+        )
+
+
+def remove_edge(follower_id, following_id):
+    for user_id, kind, other in edges(follower_id, following_id):
+        zset_cache.remove(
+            cache_key(user_id, kind), other, settings.FOLLOW_CACHE_TIMEOUT
+        )
@@ -0,0 +1,131 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django_redis import get_redis_connection
+
+from . import diary_search, emotion_summary
+from .backends import model_version
+from .batching import InferenceBusy
+from .sentiment_cache import get_cached, normalize_text, set_cached
+
+logger = logging.getLogger(__name__)
+
+# Redis keys
+QUEUE_KEY = "sentiment:queue"
+PROCESSING_KEY = "sentiment:processing"
+DELAYED_KEY = "sentiment:delayed"
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def enqueue_sentiment(diary_id, attempts=0):
+    job = json.dumps({"diary_id": str(diary_id), "attempts": attempts})
+    get_connection().lpush(QUEUE_KEY, job)
+
+
+def schedule_retry(job):
+    # 재시도 간격은 시도 횟수마다 두 배
+    attempts = job["attempts"] + 1
+    delay = settings.SENTIMENT_RETRY_DELAY * (2 ** (attempts - 1))
+    retry = json.dumps({"diary_id": job["diary_id"], "attempts": attempts})
+    get_connection().zadd(DELAYED_KEY, {retry: time.time() + delay})
+
+
+def postpone(job):
+    # 시도 횟수를 늘리지 않고 SENTIMENT_RETRY_DELAY 뒤에 다시 처리
+    retry = json.dumps({"diary_id": job["diary_id"], "attempts": job["attempts"]})
+    get_connection().zadd(
+        DELAYED_KEY, {retry: time.time() + settings.SENTIMENT_RETRY_DELAY}
+    )
+
+
+def promote_delayed():
+    conn = get_connection()
+    due = conn.zrangebyscore(DELAYED_KEY, "-inf", time.time())
+    for job in due:
+        # zrem 이 성공한 worker 만 큐에 다시 넣는다
+        if conn.zrem(DELAYED_KEY, job):
+            conn.lpush(QUEUE_KEY, job)
+    return len(due)
+
+
+def requeue_stale():
+    """이전 worker 가 처리 도중 종료되어 processing 에 남은 작업을 큐로 되돌린다."""
+    conn = get_connection()
+    moved = 0
+    while conn.rpoplpush(PROCESSING_KEY, QUEUE_KEY):
+        moved += 1
+    return moved
+
+
+def next_job(timeout=5):
+    raw = get_connection().brpoplpush(QUEUE_KEY, PROCESSING_KEY, timeout=timeout)
+    if raw is None:
+        return None, None
+    return raw, json.loads(raw)
+
+
+def ack(raw):
+    get_connection().lrem(PROCESSING_KEY, 1, raw)
+
+
+def run_job(model, job):
+    from .models import Diary, EmotionStatus
+
+    diary = (
+        Diary.objects.filter(pk=job["diary_id"])
+        .only("id", "text", "writer", "date")
+        .first()
+    )
+    if diary is None:
+        # 분석 전에 삭제된 일기
+        return
+
+    diary_text = normalize_text(diary.text)
+    result = get_cached(diary_text, track=False)
+    if result is None:
+        # engine 이 밀려 있으면 InferenceBusy, 결과가 늦으면 TimeoutError
+        result = model.sentiment_analysis(
+            diary_text, timeout=settings.SENTIMENT_INFERENCE_TIMEOUT
+        )
+        set_cached(diary_text, result)
+    emotion, probs = result
+    Diary.objects.filter(pk=diary.pk).update(
+        emotion=emotion,
+        probs=probs,
+        emotion_status=EmotionStatus.DONE,
+        emotion_model=model_version(),
+    )
+    emotion_summary.refresh(diary.writer_id, diary.date)
+    diary_search.set_emotion(diary.pk, emotion)
+
+
+def mark_failed(job):
+    from .models import Diary, EmotionStatus
+
+    Diary.objects.filter(pk=job["diary_id"]).update(
+        emotion_status=EmotionStatus.FAILED
+    )
+
+
+def process_job(model, raw, job):
+    close_old_connections()
+    try:
+        run_job(model, job)
+    except InferenceBusy:
+        # 작업 실패가 아니라 batching engine 이 밀려 있는 것
+        logger.warning("sentiment engine busy, postponing job: %s", job)
+        postpone(job)
+    except Exception:
+        logger.exception("sentiment job failed: %s", job)
+        if job["attempts"] < settings.SENTIMENT_MAX_RETRIES:
+            schedule_retry(job)
+        else:
+            mark_failed(job)
+    finally:
+        ack(raw)
@@ -0,0 +1,207 @@
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+
+# 좋아요 write-behind (settings.LIKE_WRITE_BEHIND)
+#
+# like:{diary_id}:users     좋아요한 user id set (DB + 아직 반영 안 된 변경), EMPTY 포함
+# like:{diary_id}:ops       DB 에 반영할 변경 hash, user id -> "1"(like) / "0"(unlike)
+# like:{diary_id}:flushing  flusher 가 처리 중인 ops
+# like:dirty                ops 가 쌓인 diary id set
+# like:flushing             처리 중인 diary id set (flusher 가 죽으면 다음 실행 때 다시 처리)
+#
+# DB 반영은 멱등 (추가는 ignore_conflicts, 삭제, like_count 는 다시 count) 이라
+# 같은 ops 를 두 번 적용해도 결과가 같다. Redis 가 데이터를 잃으면 마지막 flush
+# 이후의 변경만 사라진다.
+EMPTY = "_"
+DIRTY_KEY = "like:dirty"
+FLUSHING_KEY = "like:flushing"
+
+# KEYS: users, ops, dirty / ARGV: user id, diary id, ttl
+TOGGLE = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local liked = 1
+if redis.call('SREM', KEYS[1], ARGV[1]) == 1 then
+    liked = 0
+else
+    redis.call('SADD', KEYS[1], ARGV[1])
+end
+redis.call('HSET', KEYS[2], ARGV[1], liked)
+redis.call('SADD', KEYS[3], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {liked, redis.call('SCARD', KEYS[1]) - 1}
+"""
+
+# KEYS: users, flushing, ops / ARGV: ttl, EMPTY, user ids (DB)
+LOAD = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+for i = 2, #ARGV do
+    redis.call('SADD', KEYS[1], ARGV[i])
+end
+for _, ops in ipairs({KEYS[2], KEYS[3]}) do
+    local changes = redis.call('HGETALL', ops)
+    for i = 1, #changes, 2 do
+        if changes[i + 1] == '1' then
+            redis.call('SADD', KEYS[1], changes[i])
+        else
+            redis.call('SREM', KEYS[1], changes[i])
+        end
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# KEYS: ops, flushing, dirty, flushing set / ARGV: diary id
+CLAIM = """
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[3], ARGV[1])
+end
+redis.call('SADD', KEYS[4], ARGV[1])
+return redis.call('HGETALL', KEYS[2])
+"""
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def enabled():
+    return settings.LIKE_WRITE_BEHIND
+
+
+def users_key(diary_id):
+    return f"like:{diary_id}:users"
+
+
+def ops_key(diary_id):
+    return f"like:{diary_id}:ops"
+
+
+def flushing_key(diary_id):
+    return f"like:{diary_id}:flushing"
+
+
+def load(diary_id):
+    from .models import Diary
+
+    user_ids = Diary.like.through.objects.filter(diary_id=diary_id).values_list(
+        "usermodel_id", flat=True
+    )
+    get_connection().eval(
+        LOAD,
+        3,
+        users_key(diary_id),
+        flushing_key(diary_id),
+        ops_key(diary_id),
+        settings.LIKE_BUFFER_TIMEOUT,
+        EMPTY,
+        *user_ids,
+    )
+
+
+def toggle(diary_id, user):
+    """좋아요를 Redis 에만 기록하고 (liked, like_count) 를 반환한다."""
+    conn = get_connection()
+    keys = (users_key(diary_id), ops_key(diary_id), DIRTY_KEY)
+    args = (user.pk, str(diary_id), settings.LIKE_BUFFER_TIMEOUT)
+    result = conn.eval(TOGGLE, 3, *keys, *args)
+    if result == -1:
+        load(diary_id)
+        result = conn.eval(TOGGLE, 3, *keys, *args)
+    liked, like_count = result
+    return bool(liked), like_count
+
+
+def count(diary_id):
+    """Redis 에 올라와 있는 diary 의 좋아요 수, 없으면 None."""
+    size = get_connection().scard(users_key(diary_id))
+    return size - 1 if size else None
+
+
+def overlay(diaries, user):
+    """
+    아직 DB 에 반영되지 않은 좋아요를 조회 결과에 덮어쓴다.
+    Redis 에 올라와 있는 diary 만 like_count / liked 를 바꾼다.
+    """
+    if not enabled() or not diaries:
+        return diaries
+    pipe = get_connection().pipeline()
+    for diary in diaries:
+        pipe.scard(users_key(diary.pk))
+        pipe.sismember(users_key(diary.pk), user.pk)
+    results = pipe.execute()
+    for index, diary in enumerate(diaries):
+        size, member = results[index * 2], results[index * 2 + 1]
+        if size:
+            diary.like_count = size - 1
+            diary.liked = bool(member)
+    return diaries
+
+
+def flush(batch=None):
+    """쌓인 변경을 DB 에 반영하고 처리한 diary 수를 반환한다."""
+    conn = get_connection()
+    batch = batch or settings.LIKE_FLUSH_BATCH
+    # 이전 flusher 가 끝내지 못한 diary 부터 처리
+    diary_ids = conn.smembers(FLUSHING_KEY)
+    diary_ids |= set(conn.srandmember(DIRTY_KEY, batch))
+
+    for diary_id in diary_ids:
+        diary_id = diary_id.decode()
+        changes = conn.eval(
+            CLAIM,
+            4,
+            ops_key(diary_id),
+            flushing_key(diary_id),
+            DIRTY_KEY,
+            FLUSHING_KEY,
+            diary_id,
+        )
+        ops = {
+            int(changes[i]): changes[i + 1] == b"1" for i in range(0, len(changes), 2)
+        }
+        write(diary_id, ops)
+
+        pipe = conn.pipeline()
+        pipe.delete(flushing_key(diary_id))
+        pipe.srem(FLUSHING_KEY, diary_id)
+        pipe.execute()
+    return len(diary_ids)
+
+
+def write(diary_id, ops):
+    from .models import Diary, UserModel
+
+    through = Diary.like.through
+    likes = [user_id for user_id, liked in ops.items() if liked]
+    unlikes = [user_id for user_id, liked in ops.items() if not liked]
+
+    with transaction.atomic():
+        if not Diary.objects.filter(pk=diary_id).exists():
+            # 그 사이 삭제된 diary
+            return
+        rows = through.objects.filter(diary_id=diary_id)
+        if unlikes:
+            rows.filter(usermodel_id__in=unlikes).delete()
+        if likes:
+            user_ids = UserModel.objects.filter(pk__in=likes).values_list(
+                "pk", flat=True
+            )
+            through.objects.bulk_create(
+                [through(diary_id=diary_id, usermodel_id=pk) for pk in user_ids],
+                ignore_conflicts=True,
+            )
+        Diary.objects.filter(pk=diary_id).update(like_count=rows.count())
+
+
+def pending():
+    conn = get_connection()
+    return conn.scard(DIRTY_KEY) + conn.scard(FLUSHING_KEY)
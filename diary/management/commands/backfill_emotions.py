@@ -0,0 +1,153 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from diary import diary_search, emotion_summary
+from diary.backends import model_version
+from diary.bert import get_model
+from diary.models import Diary, EmotionStatus
+from diary.sentiment_cache import normalize_text
+
+UPDATE_FIELDS = ["emotion", "probs", "emotion_status", "emotion_model"]
+
+
+def score(batch):
+    # batch: [(pk, text)], pool 프로세스마다 모델을 한 번만 로드
+    model = get_model()
+    results = model.sentiment_analysis_batch([text for _, text in batch])
+    return [(pk, emotion, probs) for (pk, _), (emotion, probs) in zip(batch, results)]
+
+
+class Command(BaseCommand):
+    help = "Recompute emotion/probs for existing diaries in resumable batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=32, help="Texts per forward pass."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows fetched from the database per query.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Inference processes (1 runs the model in this process).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=str(settings.BASE_DIR / ".backfill_emotions.json"),
+            help="File recording the last written primary key.",
+        )
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore an existing checkpoint."
+        )
+        parser.add_argument(
+            "--stale-only",
+            action="store_true",
+            help="Only rescore rows produced by a different model version.",
+        )
+
+    def handle(self, *args, **options):
+        self.version = model_version()
+        self.checkpoint = options["checkpoint"]
+        last_pk = None if options["restart"] else self.load_checkpoint()
+        if last_pk:
+            self.stdout.write(f"resuming after {last_pk}")
+
+        self.written = 0
+        started = time.monotonic()
+        batches = self.batches(
+            last_pk, options["chunk_size"], options["batch_size"], options["stale_only"]
+        )
+
+        if options["workers"] <= 1:
+            for batch in batches:
+                self.write(score(batch))
+        else:
+            with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+                # 결과는 제출 순서대로 기록해야 checkpoint 가 단조 증가한다
+                pending = deque()
+                for batch in batches:
+                    pending.append(pool.submit(score, batch))
+                    if len(pending) >= options["workers"] * 2:
+                        self.write(pending.popleft().result())
+                while pending:
+                    self.write(pending.popleft().result())
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"rescored {self.written} diaries in {elapsed:.1f}s")
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def batches(self, last_pk, chunk_size, batch_size, stale_only):
+        queryset = Diary.objects.order_by("pk")
+        if stale_only:
+            queryset = queryset.exclude(emotion_model=self.version)
+
+        batch = []
+        while True:
+            # pk 기준 keyset 으로 잘라 메모리 사용량을 chunk 크기로 제한
+            chunk = queryset.filter(pk__gt=last_pk) if last_pk else queryset
+            rows = 0
+            for pk, text in chunk.values_list("pk", "text")[:chunk_size].iterator():
+                rows += 1
+                last_pk = pk
+                text = normalize_text(text)
+                if text == "":
+                    continue
+                batch.append((pk, text))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if rows < chunk_size:
+                break
+        if batch:
+            yield batch
+
+    def write(self, results):
+        Diary.objects.bulk_update(
+            [
+                Diary(
+                    pk=pk,
+                    emotion=emotion,
+                    probs=probs,
+                    emotion_status=EmotionStatus.DONE,
+                    emotion_model=self.version,
+                )
+                for pk, emotion, probs in results
+            ],
+            UPDATE_FIELDS,
+        )
+        for pk, emotion, _ in results:
+            diary_search.set_emotion(pk, emotion)
+        # 달력 요약도 함께 갱신
+        emotion_summary.refresh_many(
+            set(
+                Diary.objects.filter(pk__in=[pk for pk, _, _ in results])
+                .values_list("writer_id", "date")
+                .distinct()
+            )
+        )
+        self.written += len(results)
+        self.save_checkpoint(results[-1][0])
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint):
+            return None
+        with open(self.checkpoint) as f:
+            return json.load(f)["last_pk"]
+
+    def save_checkpoint(self, last_pk):
+        tmp = f"{self.checkpoint}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"last_pk": str(last_pk), "written": self.written}, f)
+        os.replace(tmp, self.checkpoint)
@@ -0,0 +1,271 @@
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from diary.corpus import synthetic_diaries
+
+
+def parse_ints(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def parse_backend(value):
+    # torch / onnx / onnx-int8
+    if value == "onnx-int8":
+        return "onnx", True
+    if value == "onnx":
+        return "onnx", False
+    return value, None
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return round(values[index] * 1000, 2)
+
+
+def peak_rss_mb():
+    # 프로세스 전체의 최대값, Linux 에서 ru_maxrss 단위는 KB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def scaling_worker(
+    index, processes, threads, backend, texts, iterations, barrier, results
+):
+    from diary.bert import BertModel
+    from diary.cpu import configure_process
+
+    # run_sentiment_worker --processes 와 같은 CPU affinity 정책
+    configure_process(index, processes)
+    name, quantized = parse_backend(backend)
+    model = BertModel(backend=name, quantized=quantized, threads=threads)
+    model.sentiment_analysis_batch(texts)
+
+    barrier.wait()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        model.sentiment_analysis_batch(texts)
+    results.put(time.perf_counter() - started)
+
+
+def latency_case(backend, threads, length, batch_size, iterations, warmup, results):
+    # case 마다 새 프로세스에서 모델을 로드해야 peak RSS 가 앞 case 의 값을 물려받지 않는다
+    from diary.bert import BertModel
+
+    name, quantized = parse_backend(backend)
+    started = time.perf_counter()
+    model = BertModel(backend=name, quantized=quantized, threads=threads)
+    load_seconds = time.perf_counter() - started
+
+    texts = synthetic_diaries(batch_size, length, seed=length)
+    for _ in range(warmup):
+        model.sentiment_analysis_batch(texts)
+
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        model.sentiment_analysis_batch(texts)
+        latencies.append(time.perf_counter() - started)
+
+    results.put(
+        {
+            "backend": backend,
+            "threads": threads,
+            "length": length,
+            "batch_size": batch_size,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "texts_per_second": round(batch_size * iterations / sum(latencies), 2),
+            "peak_rss_mb": peak_rss_mb(),
+            "load_seconds": round(load_seconds, 2),
+        }
+    )
+
+
+def collect(processes, results, timeout, barrier=None):
+    """
+    processes 의 결과를 하나씩 받는다. 결과를 넣기 전에 죽은 프로세스가 있거나
+    timeout 초가 지나면 barrier 를 깨고 남은 프로세스를 종료한다.
+    """
+    deadline = time.monotonic() + timeout
+    collected = []
+    while len(collected) < len(processes):
+        try:
+            collected.append(results.get(timeout=1))
+            continue
+        except queue.Empty:
+            pass
+        failed = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+        if failed or time.monotonic() > deadline:
+            if barrier is not None:
+                barrier.abort()
+            for process in processes:
+                process.terminate()
+                process.join()
+            reason = f"exit codes {failed}" if failed else f"no result in {timeout}s"
+            raise CommandError(f"benchmark process failed: {reason}")
+    for process in processes:
+        process.join()
+    return collected
+
+
+def run_isolated(target, *args, timeout):
+    """target(*args, queue) 를 fork 한 프로세스에서 실행하고 queue 에 넣은 결과를 반환한다."""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(target=target, args=(*args, results))
+    process.start()
+    return collect([process], results, timeout)[0]
+
+
+class Command(BaseCommand):
+    help = "Benchmark sentiment inference latency, throughput and memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+        parser.add_argument(
+            "--lengths", default="50,200,800,3000", help="Diary lengths in characters."
+        )
+        parser.add_argument("--batch-sizes", default="1,8,32")
+        parser.add_argument("--threads", default="1,2,4")
+        parser.add_argument(
+            "--iterations", type=int, default=20, help="Timed calls per case."
+        )
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--output", help="Write JSON results to this file.")
+        parser.add_argument(
+            "--scaling",
+            action="store_true",
+            help="Measure aggregate throughput for every --workers x --threads "
+            "combination instead of single-process latency.",
+        )
+        parser.add_argument(
+            "--workers", default="1,2,4", help="Process counts for --scaling."
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=600,
+            help="Seconds to wait for one benchmark process before giving up.",
+        )
+        parser.add_argument(
+            "--online",
+            action="store_true",
+            help="Allow downloading the model instead of using the local cache.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["online"]:
+            os.environ["HF_HUB_OFFLINE"] = "1"
+            os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+        if options["scaling"]:
+            results = self.run_scaling(options)
+        else:
+            results = self.run_latency(options)
+
+        report = {
+            "meta": {
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "timestamp": int(time.time()),
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"wrote {len(results)} results to {options['output']}")
+
+    def run_latency(self, options):
+        results = []
+        for backend in options["backends"].split(","):
+            for threads in parse_ints(options["threads"]):
+                for length in parse_ints(options["lengths"]):
+                    for batch_size in parse_ints(options["batch_sizes"]):
+                        result = run_isolated(
+                            latency_case,
+                            backend,
+                            threads,
+                            length,
+                            batch_size,
+                            options["iterations"],
+                            options["warmup"],
+                            timeout=options["timeout"],
+                        )
+                        results.append(result)
+                        self.stdout.write(json.dumps(result))
+        return results
+
+    def run_scaling(self, options):
+        # 첫 번째 length / batch size 로 process 수 x thread 수 조합을 비교
+        length = parse_ints(options["lengths"])[0]
+        batch_size = parse_ints(options["batch_sizes"])[0]
+        texts = synthetic_diaries(batch_size, length, seed=length)
+        iterations = options["iterations"]
+        context = multiprocessing.get_context("fork")
+
+        results = []
+        for backend in options["backends"].split(","):
+            for processes in parse_ints(options["workers"]):
+                for threads in parse_ints(options["threads"]):
+                    barrier = context.Barrier(processes)
+                    outputs = context.Queue()
+                    workers = [
+                        context.Process(
+                            target=scaling_worker,
+                            args=(
+                                index,
+                                processes,
+                                threads,
+                                backend,
+                                texts,
+                                iterations,
+                                barrier,
+                                outputs,
+                            ),
+                        )
+                        for index in range(processes)
+                    ]
+                    for worker in workers:
+                        worker.start()
+                    elapsed = collect(workers, outputs, options["timeout"], barrier)
+
+                    texts_done = processes * iterations * batch_size
+                    result = {
+                        "backend": backend,
+                        "processes": processes,
+                        "threads": threads,
+                        "length": length,
+                        "batch_size": batch_size,
+                        "texts_per_second": round(texts_done / max(elapsed), 2),
+                        "mean_call_ms": round(
+                            sum(elapsed) / len(elapsed) / iterations * 1000, 2
+                        ),
+                    }
+                    results.append(result)
+                    self.stdout.write(json.dumps(result))
+        return results
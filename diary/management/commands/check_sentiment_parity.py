@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from diary.backends import parity_report
+from diary.bert import BertModel
+from diary.corpus import SAMPLE_DIARIES
+
+
+class Command(BaseCommand):
+    help = "Compare ONNX Runtime predictions against the torch backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fp32",
+            action="store_false",
+            dest="quantized",
+            help="Check the fp32 ONNX model instead of the int8 one.",
+        )
+        parser.add_argument(
+            "--min-agreement",
+            type=float,
+            default=0.95,
+            help="Fail when the class agreement rate falls below this value.",
+        )
+
+    def handle(self, *args, **options):
+        reference = BertModel(backend="torch")
+        candidate = BertModel(backend="onnx", quantized=options["quantized"])
+        report = parity_report(reference, candidate, SAMPLE_DIARIES)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+        if report["agreement"] < options["min_agreement"]:
+            raise CommandError(
+                f"{candidate.backend.name} agreement {report['agreement']} "
+                f"is below {options['min_agreement']}"
+            )
@@ -0,0 +1,52 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from diary.models import Diary, UserModel
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the diary list queries and fail if they do not use the "
+        "(is_public, date, time) / (writer, date, time) indexes. Run it against a "
+        "database with realistic data: on near-empty tables MySQL may prefer a scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="User id (default: first user).")
+        parser.add_argument("--month", help="YYYY-MM (default: this month).")
+
+    def handle(self, *args, **options):
+        user = (
+            UserModel.objects.get(pk=options["user"])
+            if options["user"]
+            else UserModel.objects.order_by("pk").first()
+        )
+        if user is None:
+            raise CommandError("no users to explain queries for")
+        year, month = (
+            options["month"] or datetime.date.today().strftime("%Y-%m")
+        ).split("-")
+        public, own = Diary.objects.in_month(year, month).visible_branches(user)
+        ordering = ("-date", "-time", "-id")
+
+        public_index, writer_index = (index.name for index in Diary._meta.indexes)
+        checks = [
+            ("month, public", public.order_by(*ordering), public_index),
+            ("month, own private", own.order_by(*ordering), writer_index),
+            (
+                "by user",
+                Diary.objects.filter(writer=user).order_by(*ordering),
+                writer_index,
+            ),
+        ]
+
+        failed = []
+        for label, queryset, index in checks:
+            plan = queryset.values_list("pk")[:31].explain()
+            self.stdout.write(f"-- {label}\n{plan}\n")
+            if index not in plan:
+                failed.append(f"{label} does not use {index}")
+        if failed:
+            raise CommandError("; ".join(failed))
+        self.stdout.write("all diary list queries use their indexes")
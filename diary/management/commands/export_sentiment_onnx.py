@@ -0,0 +1,28 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from diary.backends import export_onnx
+
+
+class Command(BaseCommand):
+    help = "Export the sentiment model to ONNX (optionally int8 quantized)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-quantize",
+            action="store_true",
+            help="Only export the fp32 model, skip dynamic int8 quantization.",
+        )
+        parser.add_argument(
+            "--skip-parity",
+            action="store_true",
+            help="Do not compare the exported model against the torch backend.",
+        )
+
+    def handle(self, *args, **options):
+        quantize = not options["no_quantize"]
+        for path in export_onnx(quantize=quantize):
+            self.stdout.write(f"exported {path}")
+
+        if not options["skip_parity"]:
+            call_command("check_sentiment_parity", quantized=quantize)
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from diary import like_buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Write diary likes buffered in Redis (LIKE_WRITE_BEHIND) to the database. "
+        "Keep it running until the buffer is empty after turning the mode off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.LIKE_FLUSH_INTERVAL,
+            help="Seconds between flushes.",
+        )
+        parser.add_argument("--batch", type=int, default=settings.LIKE_FLUSH_BATCH)
+        parser.add_argument(
+            "--once", action="store_true", help="Flush until empty, then exit."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            flushed = like_buffer.flush(options["batch"])
+            if flushed:
+                self.stdout.write(f"flushed likes for {flushed} diaries")
+            if options["once"]:
+                if not like_buffer.pending():
+                    return
+                continue
+            if flushed < options["batch"]:
+                time.sleep(options["interval"])
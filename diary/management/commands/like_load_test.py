@@ -0,0 +1,75 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from diary import like_buffer
+from diary.models import Diary, UserModel, toggle_like
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare like toggle throughput on one diary with direct database writes "
+        "and with the Redis write-behind buffer. Every user toggles an even number "
+        "of times, so the diary ends with the likes it started with."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("diary", help="Diary id to like.")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument(
+            "--toggles", type=int, default=20, help="Toggles per user (made even)."
+        )
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--modes", default="direct,buffered")
+
+    def handle(self, *args, **options):
+        diary_id = options["diary"]
+        if not Diary.objects.filter(pk=diary_id).exists():
+            raise CommandError(f"diary {diary_id} does not exist")
+        users = list(UserModel.objects.order_by("pk")[: options["users"]])
+        toggles = options["toggles"] + options["toggles"] % 2
+        start_count = Diary.objects.get(pk=diary_id).like_count
+
+        for mode in options["modes"].split(","):
+            if mode == "direct":
+
+                def run(user):
+                    close_old_connections()
+                    for _ in range(toggles):
+                        toggle_like(Diary, diary_id, user)
+
+            else:
+                # 이전에 쌓인 변경을 먼저 비운다
+                while like_buffer.pending():
+                    like_buffer.flush()
+
+                def run(user):
+                    for _ in range(toggles):
+                        like_buffer.toggle(diary_id, user)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                list(pool.map(run, users))
+            elapsed = time.perf_counter() - started
+
+            flush_seconds = 0
+            if mode != "direct":
+                started = time.perf_counter()
+                while like_buffer.pending():
+                    like_buffer.flush()
+                flush_seconds = time.perf_counter() - started
+
+            like_count = Diary.objects.get(pk=diary_id).like_count
+            result = {
+                "mode": mode,
+                "users": len(users),
+                "toggles": len(users) * toggles,
+                "toggles_per_second": round(len(users) * toggles / elapsed, 1),
+                "flush_seconds": round(flush_seconds, 3),
+                "like_count": like_count,
+                "consistent": like_count == start_count,
+            }
+            self.stdout.write(json.dumps(result))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from diary import presence
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop presence entries older than PRESENCE_RETENTION and the legacy "
+        "user:{id}:last_seen keys."
+    )
+
+    def handle(self, *args, **options):
+        removed, legacy = presence.prune()
+        self.stdout.write(f"pruned {removed} presence entries, {legacy} legacy keys")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import TruncMonth
+
+from diary import ranking
+from diary.models import Diary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis monthly popularity rankings from Diary.like_count."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "months", nargs="*", help="YYYY-MM months to rebuild (default: all)."
+        )
+
+    def handle(self, *args, **options):
+        months = options["months"]
+        if not months:
+            months = [
+                ranking.month_of(month)
+                for month in Diary.objects.filter(is_public=True)
+                .annotate(month=TruncMonth("date"))
+                .values_list("month", flat=True)
+                .distinct()
+            ]
+        for month in months:
+            ranking.load(month)
+        self.stdout.write(f"rebuilt {len(months)} monthly ranking(s)")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from diary import diary_search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the Redis diary full-text index from the database. Also "
+        "recomputes BM25 weights against the current average diary length."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = diary_search.rebuild(options["chunk_size"])
+        self.stdout.write(f"indexed {total} diaries")
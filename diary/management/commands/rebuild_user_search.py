@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from diary import user_search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis n-gram user search index from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = user_search.rebuild(options["chunk_size"])
+        self.stdout.write(f"indexed {total} users")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from diary import username_bloom
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the Redis username Bloom filter from the database. Run it after "
+        "changing USERNAME_BLOOM_CAPACITY or when renames push the false-positive "
+        "rate up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = username_bloom.rebuild(options["chunk_size"])
+        bits, hashes = username_bloom.size()
+        self.stdout.write(f"added {total} usernames ({bits} bits, {hashes} hashes)")
@@ -0,0 +1,132 @@
+import json
+import os
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from diary.batching import BatchingEngine
+from diary.bert import get_model, preload, warmup
+from diary.cpu import configure_process
+from diary.inference import next_job, process_job, promote_delayed, requeue_stale
+
+
+class Command(BaseCommand):
+    help = "Consume the diary sentiment queue and store emotion/probs results."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=5,
+            help="Seconds to block waiting for a job before polling retries.",
+        )
+        parser.add_argument(
+            "--requeue-stale",
+            action="store_true",
+            help="Move jobs left in the processing list by a crashed worker "
+            "back to the queue before starting.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.SENTIMENT_WORKER_CONCURRENCY,
+            help="Number of consumer threads feeding the batching engine.",
+        )
+        parser.add_argument("--max-batch-size", type=int, default=None)
+        parser.add_argument("--max-wait-ms", type=float, default=None)
+        parser.add_argument(
+            "--stats-interval",
+            type=int,
+            default=60,
+            help="Seconds between batching statistics reports (0 disables).",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Fork this many worker processes sharing the preloaded weights.",
+        )
+        parser.add_argument(
+            "--no-preload",
+            action="store_false",
+            dest="preload",
+            help="Load the model in each forked process instead of the master "
+            "(for comparing per-worker memory).",
+        )
+
+    def handle(self, *args, **options):
+        if options["requeue_stale"]:
+            moved = requeue_stale()
+            self.stdout.write(f"requeued {moved} stale job(s)")
+
+        processes = options["processes"]
+        if processes <= 1:
+            self.serve(options)
+            return
+
+        if options["preload"]:
+            preload()
+        # 자식 프로세스가 DB 연결을 공유하지 않도록 fork 전에 닫는다
+        connections.close_all()
+
+        children = []
+        for index in range(processes):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    self.serve(options, index, processes)
+                finally:
+                    os._exit(0)
+            children.append(pid)
+        self.stdout.write(f"forked sentiment workers: {children}")
+
+        try:
+            for pid in children:
+                os.waitpid(pid, 0)
+        except KeyboardInterrupt:
+            for pid in children:
+                os.kill(pid, signal.SIGTERM)
+
+    def serve(self, options, index=0, processes=1):
+        # 프로세스마다 코어를 나눠 쓰도록 스레드 수 / CPU affinity 설정
+        threads = configure_process(index, processes)
+        get_model().backend.set_threads(threads)
+
+        engine = BatchingEngine(
+            warmup(),
+            max_batch_size=options["max_batch_size"],
+            max_wait_ms=options["max_wait_ms"],
+        ).start()
+
+        for i in range(options["concurrency"]):
+            threading.Thread(
+                target=self.consume,
+                args=(engine, options["timeout"]),
+                name=f"sentiment-consumer-{i}",
+                daemon=True,
+            ).start()
+        self.stdout.write(
+            f"sentiment worker {os.getpid()} started "
+            f"({options['concurrency']} consumer(s), {threads} thread(s))"
+        )
+
+        interval = options["stats_interval"]
+        try:
+            while True:
+                time.sleep(interval or 3600)
+                if interval:
+                    self.stdout.write(json.dumps(engine.stats()))
+        except KeyboardInterrupt:
+            engine.stop(timeout=5)
+
+    def consume(self, engine, timeout):
+        while True:
+            promote_delayed()
+            raw, job = next_job(timeout=timeout)
+            if job is None:
+                continue
+            process_job(engine, raw, job)
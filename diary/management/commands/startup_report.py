@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP_CODE = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+class Command(BaseCommand):
+    help = "Break down Django startup import cost per module (python -X importtime)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--modules",
+            action="store_true",
+            help="Report individual modules instead of top-level packages.",
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SETUP_CODE],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr[-2000:])
+
+        totals = defaultdict(int)
+        total_us = 0
+        for line in result.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, _, name = line[len("import time:") :].split("|")
+            name = name.strip()
+            key = name if options["modules"] else name.split(".")[0]
+            totals[key] += int(self_us)
+            total_us += int(self_us)
+
+        self.stdout.write(f"total import time: {total_us / 1000:.1f} ms")
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        for name, us in ranked[: options["top"]]:
+            share = us / total_us * 100 if total_us else 0
+            self.stdout.write(f"{us / 1000:10.1f} ms {share:5.1f}%  {name}")
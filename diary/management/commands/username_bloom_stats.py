@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from diary.username_bloom import reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = "Show username Bloom filter fill ratio and observed false-positive rate."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the counters after printing."
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(stats(), indent=2))
+        if options["reset"]:
+            reset_stats()
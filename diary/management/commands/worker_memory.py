@@ -0,0 +1,88 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def smaps_rollup(pid):
+    # 값 단위는 kB
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def children_of(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+class Command(BaseCommand):
+    help = "Report RSS/PSS/unique memory of worker processes (Linux only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("pids", nargs="*", type=int)
+        parser.add_argument(
+            "--parent",
+            type=int,
+            help="Report the children of this process (e.g. the worker master).",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        pids = list(options["pids"])
+        if options["parent"]:
+            pids += children_of(options["parent"])
+        if not pids:
+            raise CommandError("Pass worker pids or --parent")
+
+        rows = []
+        for pid in pids:
+            if not os.path.exists(f"/proc/{pid}"):
+                raise CommandError(f"No such process: {pid}")
+            values = smaps_rollup(pid)
+            rows.append(
+                {
+                    "pid": pid,
+                    "rss_mb": round(values.get("Rss", 0) / 1024, 1),
+                    "pss_mb": round(values.get("Pss", 0) / 1024, 1),
+                    # 이 프로세스만 쓰는 메모리 (USS)
+                    "unique_mb": round(
+                        (
+                            values.get("Private_Clean", 0)
+                            + values.get("Private_Dirty", 0)
+                        )
+                        / 1024,
+                        1,
+                    ),
+                    "shared_mb": round(
+                        (values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0))
+                        / 1024,
+                        1,
+                    ),
+                }
+            )
+
+        totals = {
+            key: round(sum(row[key] for row in rows), 1)
+            for key in ("rss_mb", "pss_mb", "unique_mb")
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps({"workers": rows, "total": totals}))
+            return
+
+        self.stdout.write(
+            f"{'pid':>8} {'rss':>9} {'pss':>9} {'unique':>9} {'shared':>9}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['pid']:>8} {row['rss_mb']:>8}M {row['pss_mb']:>8}M "
+                f"{row['unique_mb']:>8}M {row['shared_mb']:>8}M"
+            )
+        self.stdout.write(
+            f"{'total':>8} {totals['rss_mb']:>8}M {totals['pss_mb']:>8}M "
+            f"{totals['unique_mb']:>8}M"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0027_diary_images_alter_usermodel_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diary',
+            name='emotion_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0028_diary_emotion_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diary',
+            name='emotion_model',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.7 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_follows(apps, schema_editor):
+    UserModel = apps.get_model('diary', 'UserModel')
+    Follow = apps.get_model('diary', 'Follow')
+
+    def counts(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef('pk')})
+                .values(field)
+                .annotate(total=Count('id'))
+                .values('total')
+            ),
+            0,
+        )
+
+    UserModel.objects.update(
+        follower_count=counts('following'),
+        following_count=counts('follower'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0029_diary_emotion_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usermodel',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usermodel',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_follows, migrations.RunPython.noop),
+    ]
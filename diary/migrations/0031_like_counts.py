@@ -0,0 +1,44 @@
+# Generated by Django 5.0.7 on 2026-10-18 17:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_likes(apps, schema_editor):
+    for model_name in ('Diary', 'Comment'):
+        model = apps.get_model('diary', model_name)
+        through = model.like.through
+        field = f'{model._meta.model_name}_id'
+        model.objects.update(
+            like_count=Coalesce(
+                Subquery(
+                    through.objects.filter(**{field: OuterRef('pk')})
+                    .values(field)
+                    .annotate(total=Count('id'))
+                    .values('total')
+                ),
+                0,
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0030_usermodel_follow_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='diary',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_likes, migrations.RunPython.noop),
+    ]
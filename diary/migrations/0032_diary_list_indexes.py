@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0031_like_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diary',
+            index=models.Index(fields=['is_public', 'date', 'time'], name='diary_diary_is_publ_c4f5fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diary',
+            index=models.Index(fields=['writer', 'date', 'time'], name='diary_diary_writer__2a2dcc_idx'),
+        ),
+    ]
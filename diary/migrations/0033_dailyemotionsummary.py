@@ -0,0 +1,67 @@
+# Generated by Django 5.0.7 on 2026-10-18 18:40
+
+from itertools import groupby
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def summarize_days(apps, schema_editor):
+    Diary = apps.get_model('diary', 'Diary')
+    DailyEmotionSummary = apps.get_model('diary', 'DailyEmotionSummary')
+
+    rows = (
+        Diary.objects.order_by('writer_id', 'date')
+        .values_list('writer_id', 'date', 'emotion_status', 'probs')
+        .iterator()
+    )
+    summaries = []
+    for (user_id, date), day in groupby(rows, key=lambda row: row[:2]):
+        day = list(day)
+        analysed = [probs for _, _, status, probs in day if status == 'done' and probs]
+        probs, emotion = [], None
+        if analysed:
+            probs = [
+                {
+                    'name': item['name'],
+                    'pv': round(sum(p[i]['pv'] for p in analysed) / len(analysed), 2),
+                }
+                for i, item in enumerate(analysed[0])
+            ]
+            emotion = max(range(len(probs)), key=lambda i: probs[i]['pv'])
+        summaries.append(
+            DailyEmotionSummary(
+                user_id=user_id,
+                date=date,
+                diary_count=len(day),
+                probs=probs,
+                emotion=emotion,
+            )
+        )
+    DailyEmotionSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0032_diary_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyEmotionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('diary_count', models.PositiveIntegerField(default=0)),
+                ('probs', models.JSONField(blank=True, default=list)),
+                ('emotion', models.IntegerField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='emotion_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(summarize_days, migrations.RunPython.noop),
+    ]
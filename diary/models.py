@@ -1,9 +1,8 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import AbstractUser, Group, Permission
+import datetime
 import uuid
 import os
-from .bert import BertModel
-import boto3
 import base64
 from io import BytesIO
 import re
@@ -21,6 +20,8 @@ def is_base64_encoded(data):
 
 class S3ImgUploader:
     def __init__(self, file=None, old_url=None):
+        import boto3
+
         self.file = file
         self.old_url = old_url
         self.s3_client = boto3.client(
@@ -56,6 +57,22 @@ class S3ImgUploader:
             print(f"Error deleting old image: {e}")
 
 
+# F() 로 따로 갱신하는 카운터 컬럼
+def exclude_counters(instance, counters, kwargs):
+    """
+    이미 있는 행을 update_fields 없이 저장하면 읽어 둔 카운터 값으로 덮어써
+    그 사이의 증감이 사라진다. 그런 저장은 counters 를 뺀 필드만 저장한다.
+    """
+    if instance._state.adding or kwargs.get("force_insert"):
+        return
+    if kwargs.get("update_fields") is None:
+        kwargs["update_fields"] = [
+            field.name
+            for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in counters
+        ]
+
+
 # User
 class UserModel(AbstractUser):
     name = models.CharField(max_length=100, null=False, verbose_name="name")
@@ -64,6 +81,10 @@ class UserModel(AbstractUser):
         upload_to="profile_images/", default="profile_images/default.jpg"
     )
 
+    # Follow 생성/삭제 시 signals 에서 갱신
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
     groups = models.ManyToManyField(
         Group,
         related_name="customuser_set",  # 변경된 역참조 이름
@@ -97,6 +118,7 @@ class UserModel(AbstractUser):
         except UserModel.DoesNotExist:
             pass
 
+        exclude_counters(self, ("follower_count", "following_count"), kwargs)
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
@@ -124,8 +146,74 @@ class Follow(models.Model):
         ]
 
 
+# Like
+def toggle_like(model, pk, user):
+    """
+    Diary / Comment 좋아요 토글. 좋아요 목록을 읽지 않고 중간 테이블의 한 행만
+    확인하며, like_count 도 같은 트랜잭션에서 갱신한다. (liked, like_count) 반환.
+    """
+    through = model.like.through
+    row = {f"{model._meta.model_name}_id": pk, "usermodel_id": user.pk}
+    with transaction.atomic():
+        deleted, _ = through.objects.filter(**row).delete()
+        if deleted:
+            liked, delta = False, -1
+        else:
+            liked, delta = True, 1
+            try:
+                with transaction.atomic():
+                    through.objects.create(**row)
+            except IntegrityError:
+                # 동시에 들어온 같은 요청이 먼저 추가했으면 이미 좋아요 상태,
+                # 행이 없으면 (예: 일기 / 사용자가 삭제됨) 다른 오류
+                if not through.objects.filter(**row).exists():
+                    raise
+                delta = 0
+        if delta:
+            model.objects.filter(pk=pk).update(
+                like_count=models.F("like_count") + delta
+            )
+        like_count = model.objects.filter(pk=pk).values_list("like_count", flat=True)
+        return liked, like_count.get()
+
+
 # Diary
-bert_model = BertModel()
+def month_range(year, month):
+    # [start, end)
+    start = datetime.date(int(year), int(month), 1)
+    end = (start + datetime.timedelta(days=31)).replace(day=1)
+    return start, end
+
+
+class EmotionStatus(models.TextChoices):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class DiaryQuerySet(models.QuerySet):
+    def in_month(self, year, month):
+        # date__year / date__month 대신 범위 조건을 써야 (.., date, time) index 를 탄다
+        start, end = month_range(year, month)
+        return self.filter(date__gte=start, date__lt=end)
+
+    def visible_branches(self, user):
+        """
+        공개 일기 OR 내 일기 를 각자 index 를 타는 두 조건으로 나눈다.
+        (is_public, date, time) / (writer, date, time), 서로 겹치지 않는다.
+        """
+        return [
+            self.filter(is_public=True),
+            self.filter(writer=user, is_public=False),
+        ]
+
+    def for_list(self, user):
+        # 목록 조회: 작성자는 join, 좋아요는 누른 사람 목록 대신 user 가 눌렀는지만
+        # EXISTS 로 함께 읽는다 (행마다 쿼리 없음, 좋아요 수와 상관없음)
+        likes = Diary.like.through.objects.filter(
+            diary_id=models.OuterRef("pk"), usermodel_id=user.pk
+        )
+        return self.select_related("writer").annotate(liked=models.Exists(likes))
 
 
 class Diary(models.Model):
@@ -136,10 +224,24 @@ class Diary(models.Model):
     date = models.DateField()
     time = models.TimeField(auto_now_add=True)
     like = models.ManyToManyField(UserModel, related_name="liked_diaries", blank=True)
+    like_count = models.PositiveIntegerField(default=0)
     writer = models.ForeignKey(UserModel, on_delete=models.CASCADE)
     is_public = models.BooleanField(default=True)
     emotion = models.IntegerField(blank=True, null=True)
     probs = models.JSONField(default=list, blank=True)
+    emotion_status = models.CharField(
+        max_length=10, choices=EmotionStatus.choices, default=EmotionStatus.DONE
+    )
+    # 결과를 만든 모델 (diary.backends.model_version)
+    emotion_model = models.CharField(max_length=200, blank=True, default="")
+
+    objects = DiaryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_public", "date", "time"]),
+            models.Index(fields=["writer", "date", "time"]),
+        ]
 
     def delete(self, *args, **kwargs):
         if self.images:
@@ -148,17 +250,138 @@ class Diary(models.Model):
                     os.remove(image)
         super().delete(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # text 가 바뀌었을 때만 감정 분석을 다시 한다
+        instance._loaded_text = instance.__dict__.get("text", models.DEFERRED)
+        # 인기 순위 (diary.ranking) 는 공개 여부 / 날짜가 바뀌었을 때만 갱신한다
+        instance._loaded_ranking = (
+            instance.__dict__.get("date"),
+            instance.__dict__.get("is_public"),
+        )
+        # 검색 index (diary.diary_search) 도 바뀐 필드만 반영한다
+        instance._loaded_search = instance.search_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using, fields, **kwargs)
+        # deferred 였던 text 를 처음 읽은 경우도 포함
+        if fields is None or "text" in fields:
+            self._loaded_text = self.__dict__.get("text", models.DEFERRED)
+        loaded = getattr(self, "_loaded_search", {})
+        for name, value in self.search_values().items():
+            if fields is None or name in fields:
+                loaded[name] = value
+        self._loaded_search = loaded
+
+    def search_values(self):
+        return {
+            name: self.__dict__.get(name, models.DEFERRED)
+            for name in ("text", "content", "is_public", "emotion")
+        }
+
+    def search_changes(self):
+        """마지막으로 읽거나 저장한 뒤 바뀐 검색 필드 (deferred 인 필드는 제외)."""
+        loaded = getattr(self, "_loaded_search", {})
+        return {
+            name
+            for name, value in self.search_values().items()
+            if value is not models.DEFERRED
+            and value != loaded.get(name, models.DEFERRED)
+        }
+
+    def text_changed(self):
+        if self._state.adding:
+            return True
+        if "text" in self.get_deferred_fields():
+            # .only() 로 text 없이 읽고 text 를 건드리지 않은 저장
+            return False
+        return self.text != getattr(self, "_loaded_text", models.DEFERRED)
+
     def save(self, *args, **kwargs):
-        diary_text = self.text.replace("\n", " ")
-        modified_text = diary_text.replace(" ", "")
-        if modified_text != "":
-            emotion, probs = bert_model.sentiment_analysis(diary_text)
-            self.emotion = emotion
-            self.probs = probs
+        from .inference import enqueue_sentiment
+        from .backends import model_version
+        from .sentiment_cache import get_cached, normalize_text, record
+
+        update_fields = kwargs.get("update_fields")
+        analyze = False
+        if update_fields is not None and "text" not in update_fields:
+            record("skipped")
+        elif self.text_changed() or self.emotion_status == EmotionStatus.FAILED:
+            diary_text = normalize_text(self.text)
+            if diary_text != "":
+                cached = get_cached(diary_text)
+                if cached is not None:
+                    self.emotion, self.probs = cached
+                    self.emotion_status = EmotionStatus.DONE
+                    self.emotion_model = model_version()
+                else:
+                    # 감정 분석은 worker 에서 처리 (run_sentiment_worker)
+                    self.emotion_status = EmotionStatus.PENDING
+                    analyze = True
+                if update_fields is not None:
+                    kwargs["update_fields"] = {
+                        *update_fields,
+                        "emotion",
+                        "probs",
+                        "emotion_status",
+                        "emotion_model",
+                    }
+        else:
+            record("skipped")
+
+        exclude_counters(self, ("like_count",), kwargs)
         super().save(*args, **kwargs)
+        self._loaded_text = self.text
+        self._loaded_ranking = (self.date, self.is_public)
+        self._loaded_search = self.search_values()
+        if analyze:
+            diary_id = self.pk
+            transaction.on_commit(lambda: enqueue_sentiment(diary_id))
+
+
+# Emotion summary
+class DailyEmotionSummary(models.Model):
+    """사용자의 하루 일기 감정 요약 (diary.emotion_summary 가 갱신)."""
+
+    user = models.ForeignKey(
+        UserModel, related_name="emotion_summaries", on_delete=models.CASCADE
+    )
+    date = models.DateField()
+    diary_count = models.PositiveIntegerField(default=0)
+    # 분석이 끝난 일기들의 평균 확률, Diary.probs 와 같은 형식
+    probs = models.JSONField(default=list, blank=True)
+    emotion = models.IntegerField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ("user", "date")
 
 
 # Comment
+class CommentQuerySet(models.QuerySet):
+    def for_list(self):
+        # 작성자는 이름/이미지만 join, 좋아요는 prefetch (팔로우 관계는 조회하지 않음)
+        return (
+            self.select_related("writer")
+            .only(
+                "id",
+                "diary",
+                "created_at",
+                "comment",
+                "like_count",
+                "writer__id",
+                "writer__username",
+                "writer__image",
+            )
+            .prefetch_related(
+                models.Prefetch(
+                    "like", queryset=UserModel.objects.only("id", "username")
+                )
+            )
+        )
+
+
 class Comment(models.Model):
     id = models.AutoField(primary_key=True, null=False, blank=False)
     diary = models.ForeignKey(Diary, null=False, blank=False, on_delete=models.CASCADE)
@@ -171,6 +394,13 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=False, blank=False)
     comment = models.TextField(null=False)
     like = models.ManyToManyField(UserModel, related_name="liked_comments", blank=True)
+    like_count = models.PositiveIntegerField(default=0)
+
+    objects = CommentQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        exclude_counters(self, ("like_count",), kwargs)
+        super().save(*args, **kwargs)
 
     def count_likes(self):
-        return self.like.count()
+        return self.like_count
@@ -0,0 +1,161 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    정렬 키 (예: date, time, id) 기준 cursor pagination.
+
+    OFFSET 없이 마지막 행의 키보다 뒤에 있는 행만 조회하므로 몇 페이지를 넘기든
+    비용이 page_size 에 비례한다. ordering 의 마지막 필드는 유일해야 한다.
+    """
+
+    page_size = 30
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+
+        rows = list(queryset.order_by(*self.ordering)[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def paginate_union(self, branches, queryset, request, view=None):
+        """
+        OR 조건 대신 서로 겹치지 않는 branch 를 각자의 index 로 조회해 합친다.
+        branch 마다 정렬 키만 page_size + 1 개 읽고, 합친 페이지의 행은 queryset
+        (예: for_list(user)) 에서 pk 로 가져온다.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset.model)
+        names = [field.lstrip("-") for field in self.ordering]
+
+        keys = []
+        for branch in branches:
+            if cursor is not None:
+                branch = branch.filter(self.after(cursor))
+            branch = branch.order_by(*self.ordering).values_list("pk", *names)
+            keys += branch[: page_size + 1]
+        # 안정 정렬을 뒤쪽 키부터 적용하면 ordering 전체 순서가 된다
+        for index in reversed(range(len(names))):
+            descending = self.ordering[index].startswith("-")
+            keys.sort(key=lambda row: row[index + 1], reverse=descending)
+
+        self.has_next = len(keys) > page_size
+        pks = [row[0] for row in keys[:page_size]]
+        rows = queryset.in_bulk(pks)
+        rows = [rows[pk] for pk in pks]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.last)
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def after(self, cursor):
+        # (a, b, c) 보다 뒤: a > A or (a = A and b > B) or (a = A and b = B and c > C)
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, cursor):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+            values.append(
+                value.isoformat() if hasattr(value, "isoformat") else str(value)
+            )
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request, model=None):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound("Invalid cursor")
+        if model is not None:
+            values = self.clean_cursor(values, model)
+        return values
+
+    def clean_cursor(self, values, model):
+        # 형식이 맞지 않는 값 (예: 날짜가 아닌 date) 은 filter 에서 500 이 되므로 미리 확인
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            try:
+                value = model._meta.get_field(field.lstrip("-")).to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound("Invalid cursor")
+            if value is None:
+                raise NotFound("Invalid cursor")
+            cleaned.append(value)
+        return cleaned
+
+
+class RankedPagination(KeysetPagination):
+    """
+    이미 순위가 매겨진 결과 (예: diary_search 의 Redis sorted set) 의 cursor pagination.
+    cursor 는 결과 안의 위치다.
+    """
+
+    page_size = 20
+    max_page_size = 50
+
+    def __init__(self):
+        super().__init__(ordering=("offset",))
+
+    def paginate_ranked(self, read, request):
+        # read(offset, size) -> (rows, has_next)
+        self.request = request
+        cursor = self.decode_cursor(request)
+        offset = cursor[0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise NotFound("Invalid cursor")
+        rows, self.has_next = read(offset, self.get_page_size(request))
+        self.last = offset + len(rows)
+        return rows
+
+    def encode_cursor(self, offset):
+        return base64.urlsafe_b64encode(json.dumps([offset]).encode()).decode()
@@ -0,0 +1,88 @@
+import datetime
+import time
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from . import follow_cache
+
+# 접속 상태: presence:last_seen sorted set, member 는 user id, score 는 마지막 접속 시각
+# 접속을 종료한 사용자 (leave) 는 -종료 시각 으로 저장해 online 으로 세지 않는다
+# PRESENCE_RETENTION 보다 오래된 기록은 갱신할 때 함께 지운다
+PRESENCE_KEY = "presence:last_seen"
+LEGACY_PATTERN = "user:*:last_seen"
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def record(user_id, score, now):
+    cutoff = now - settings.PRESENCE_RETENTION
+    pipe = get_connection().pipeline()
+    pipe.zadd(PRESENCE_KEY, {str(user_id): score})
+    pipe.zremrangebyscore(PRESENCE_KEY, -cutoff, cutoff)
+    pipe.execute()
+
+
+def touch(user_id, now=None):
+    now = now or time.time()
+    record(user_id, now, now)
+
+
+def leave(user_id, now=None):
+    """마지막 연결이 끊긴 시각을 기록한다. 바로 offline 이 된다."""
+    now = now or time.time()
+    record(user_id, -now, now)
+
+
+def describe(last_seen, now):
+    if last_seen is None:
+        return {"status": False, "last_active": None}
+    online = last_seen > 0 and now - last_seen <= settings.PRESENCE_ONLINE_SECONDS
+    last_active = timezone.localtime(
+        datetime.datetime.fromtimestamp(abs(last_seen), tz=datetime.timezone.utc)
+    )
+    return {"status": online, "last_active": last_active.isoformat()}
+
+
+def statuses(user_ids):
+    """{user id: {"status", "last_active"}}, 한 번의 pipeline 으로 조회한다."""
+    now = time.time()
+    pipe = get_connection().pipeline()
+    for user_id in user_ids:
+        pipe.zscore(PRESENCE_KEY, str(user_id))
+    return {
+        user_id: describe(last_seen, now)
+        for user_id, last_seen in zip(user_ids, pipe.execute())
+    }
+
+
+def online_followers(user_id):
+    """지금 접속 중인 팔로워 id, 최근 접속 순."""
+    conn = get_connection()
+    followers = follow_cache.ensure(user_id, follow_cache.FOLLOWERS)
+    # score 는 presence 의 접속 시각만 남긴다 (팔로우 시각 weight 0)
+    tmp = f"presence:tmp:{uuid.uuid4().hex}"
+    pipe = conn.pipeline()
+    pipe.zinterstore(tmp, {followers: 0, PRESENCE_KEY: 1})
+    pipe.zrevrangebyscore(
+        tmp, "+inf", time.time() - settings.PRESENCE_ONLINE_SECONDS, withscores=True
+    )
+    pipe.delete(tmp)
+    _, rows, _ = pipe.execute()
+    return [(int(member), last_seen) for member, last_seen in rows]
+
+
+def prune(now=None):
+    """오래된 기록과 예전 user:{id}:last_seen 문자열 key 를 지운다."""
+    now = now or time.time()
+    conn = get_connection()
+    cutoff = now - settings.PRESENCE_RETENTION
+    removed = conn.zremrangebyscore(PRESENCE_KEY, -cutoff, cutoff)
+    legacy = list(conn.scan_iter(match=LEGACY_PATTERN, count=1000))
+    for i in range(0, len(legacy), 1000):
+        conn.delete(*legacy[i : i + 1000])
+    return removed, len(legacy)
@@ -0,0 +1,96 @@
+from django.conf import settings
+
+from . import like_buffer, zset_cache
+
+# 월별 공개 일기 인기 순위: ranking:diary:{YYYY-MM}
+# sorted set (diary.zset_cache), member 는 diary id, score 는 like_count
+# EMPTY 멤버의 score 는 -1 이라 top() 에 섞이지 않는다
+EMPTY_SCORE = -1
+
+
+def get_connection():
+    return zset_cache.get_connection()
+
+
+def month_of(date):
+    # date 객체 / "YYYY-MM-DD" 문자열 모두 처리
+    return str(date)[:7]
+
+
+def ranking_key(month):
+    return f"ranking:diary:{month}"
+
+
+def rows(month):
+    from .models import Diary
+
+    year, month_number = month.split("-")
+    return (
+        Diary.objects.in_month(year, month_number)
+        .filter(is_public=True)
+        .values_list("id", "like_count")
+    )
+
+
+def load(month):
+    return zset_cache.load(
+        ranking_key(month), lambda: rows(month), settings.RANKING_TIMEOUT, EMPTY_SCORE
+    )
+
+
+def ensure(month):
+    return zset_cache.ensure(
+        ranking_key(month), lambda: rows(month), settings.RANKING_TIMEOUT, EMPTY_SCORE
+    )
+
+
+def top(month, limit):
+    """좋아요가 많은 순서의 diary id (같은 점수는 id 역순)."""
+    members = get_connection().zrevrangebyscore(
+        ensure(month), "+inf", 0, start=0, num=limit
+    )
+    return [member.decode() for member in members]
+
+
+def update(diary, like_count):
+    # 순위가 없는 달은 다음 조회 때 DB 에서 읽으므로 version 만 올린다
+    if not diary.is_public:
+        return
+    zset_cache.add(
+        ranking_key(month_of(diary.date)),
+        diary.pk,
+        like_count,
+        settings.RANKING_TIMEOUT,
+    )
+
+
+def refresh(diary):
+    """
+    커밋된 좋아요 수를 다시 읽어 반영한다. 요청마다 받은 like_count 를 그대로 쓰면
+    동시에 들어온 요청의 반영 순서가 뒤바뀌어 오래된 값이 남을 수 있다.
+    """
+    from .models import Diary
+
+    like_count = like_buffer.count(diary.pk) if like_buffer.enabled() else None
+    if like_count is None:
+        like_count = (
+            Diary.objects.filter(pk=diary.pk)
+            .values_list("like_count", flat=True)
+            .first()
+        )
+    if like_count is not None:
+        update(diary, like_count)
+
+
+def remove(diary_id, date):
+    zset_cache.remove(ranking_key(month_of(date)), diary_id, settings.RANKING_TIMEOUT)
+
+
+def sync(diary, old_date=None):
+    """공개 여부 / 날짜가 바뀐 diary 를 순위에 반영한다."""
+    if old_date is not None and month_of(old_date) != month_of(diary.date):
+        remove(diary.pk, old_date)
+    if diary.is_public:
+        refresh(diary)
+    else:
+        remove(diary.pk, diary.date)
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from rest_framework.renderers import JSONRenderer
+
+from . import follow_cache
+
+logger = logging.getLogger(__name__)
+
+# WebSocket push (diary.consumers.ActivityConsumer)
+# user.{id}   사용자 본인 연결, 팔로우한 사용자의 접속 상태를 받는다
+# diary.{id}  일기를 보고 있는 연결, 새 댓글 / 좋아요 수를 받는다
+#
+# presence:connections:{user_id}  sorted set, member 는 channel name, score 는 만료 시각
+# heartbeat 로 갱신한다. disconnect 없이 죽은 process 의 연결은 만료되면 세지 않는다.
+
+
+def user_group(user_id):
+    return f"user.{user_id}"
+
+
+def diary_group(diary_id):
+    return f"diary.{diary_id}"
+
+
+def send(group, event):
+    # push 실패가 요청을 실패시키지 않도록 한다 (클라이언트는 다음 조회 때 맞춰진다)
+    try:
+        async_to_sync(get_channel_layer().group_send)(group, event)
+    except Exception:
+        logger.exception("push to %s failed", group)
+
+
+def send_on_commit(group, event):
+    transaction.on_commit(lambda: send(group, event))
+
+
+def connections_key(user_id):
+    return f"presence:connections:{user_id}"
+
+
+def connected(user_id, channel_name, now=None):
+    """연결을 기록 / 갱신한다. 살아 있는 첫 연결이면 True (online 이 됨)."""
+    now = now or time.time()
+    key = connections_key(user_id)
+    timeout = settings.PRESENCE_CONNECTION_TIMEOUT
+    pipe = get_redis_connection("default").pipeline()
+    pipe.zremrangebyscore(key, "-inf", now)
+    pipe.zadd(key, {channel_name: now + timeout})
+    pipe.zcard(key)
+    pipe.expire(key, timeout)
+    _, added, count, _ = pipe.execute()
+    return added == 1 and count == 1
+
+
+def disconnected(user_id, channel_name, now=None):
+    """남은 (만료되지 않은) 연결이 없으면 True (offline 이 됨)."""
+    now = now or time.time()
+    key = connections_key(user_id)
+    pipe = get_redis_connection("default").pipeline()
+    pipe.zrem(key, channel_name)
+    pipe.zremrangebyscore(key, "-inf", now)
+    pipe.zcard(key)
+    _, _, count = pipe.execute()
+    return count == 0
+
+
+async def push_presence(user_id, online):
+    event = {"type": "presence", "user": user_id, "status": online}
+    follower_ids = await database_sync_to_async(follow_cache.ids)(
+        user_id, follow_cache.FOLLOWERS
+    )
+    groups = [user_group(follower_id) for follower_id in follower_ids]
+    layer = get_channel_layer()
+    # 팔로워마다 기다리지 않고 한 번에 보낸다, 실패한 push 는 로그만 남긴다
+    results = await asyncio.gather(
+        *(layer.group_send(group, event) for group in groups),
+        return_exceptions=True,
+    )
+    for group, result in zip(groups, results):
+        if isinstance(result, Exception):
+            logger.error("push to %s failed", group, exc_info=result)
+
+
+def push_comment(comment):
+    from .serializers import CommentSerializer
+
+    # channel layer 는 msgpack 으로 보내므로 UUID / datetime 을 JSON 값으로 바꿔 둔다
+    data = json.loads(JSONRenderer().render(CommentSerializer(comment).data))
+    send_on_commit(diary_group(comment.diary_id), {"type": "comment", "comment": data})
+
+
+def push_like(diary_id, like_count):
+    send_on_commit(
+        diary_group(diary_id),
+        {"type": "like", "diary": str(diary_id), "like_count": like_count},
+    )
+
+
+def push_comment_like(diary_id, comment_id, like_count):
+    send_on_commit(
+        diary_group(diary_id),
+        {"type": "comment.like", "comment": comment_id, "like_count": like_count},
+    )
@@ -0,0 +1,91 @@
+import atexit
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .backends import model_version
+
+STATS_KEY = "sentiment:cache:stats"
+
+# 저장할 때마다 Redis 를 호출하지 않도록 프로세스 안에서 세고
+# SENTIMENT_CACHE_STATS_INTERVAL 마다 한 번의 pipeline 으로 더한다
+_counts = Counter()
+_counts_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def normalize_text(text):
+    # 줄바꿈/연속 공백은 토큰화 결과에 영향이 없으므로 하나로 합친다
+    return " ".join((text or "").split())
+
+
+def cache_key(text):
+    digest = hashlib.sha256(f"{model_version()}\0{text}".encode()).hexdigest()
+    return f"sentiment:result:{digest}"
+
+
+def get_cached(text, track=True):
+    result = cache.get(cache_key(text))
+    if track:
+        record("hits" if result is not None else "misses")
+    return result
+
+
+def set_cached(text, result):
+    emotion, probs = result
+    cache.set(cache_key(text), (emotion, probs), settings.SENTIMENT_CACHE_TIMEOUT)
+
+
+def record(counter):
+    with _counts_lock:
+        _counts[counter] += 1
+        due = time.monotonic() - _flushed_at >= settings.SENTIMENT_CACHE_STATS_INTERVAL
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    global _flushed_at
+    with _counts_lock:
+        counts = dict(_counts)
+        _counts.clear()
+        _flushed_at = time.monotonic()
+    if not counts:
+        return
+    pipe = get_redis_connection("default").pipeline()
+    for counter, count in counts.items():
+        pipe.hincrby(STATS_KEY, counter, count)
+    pipe.execute()
+
+
+atexit.register(flush_stats)
+
+
+def stats():
+    flush_stats()
+    raw = get_redis_connection("default").hgetall(STATS_KEY)
+    counters = {key.decode(): int(value) for key, value in raw.items()}
+    hits = counters.get("hits", 0)
+    misses = counters.get("misses", 0)
+    skipped = counters.get("skipped", 0)
+    lookups = hits + misses
+    saves = lookups + skipped
+    return {
+        "hits": hits,
+        "misses": misses,
+        "skipped": skipped,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0,
+        # 모델을 실행하지 않고 끝난 저장 비율
+        "inference_avoided": round((hits + skipped) / saves, 4) if saves else 0,
+    }
+
+
+def reset_stats():
+    with _counts_lock:
+        _counts.clear()
+    get_redis_connection("default").delete(STATS_KEY)
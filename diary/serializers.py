@@ -1,9 +1,17 @@
+from django.db import transaction
 from rest_framework.exceptions import ValidationError
 from rest_framework import serializers
 from drf_extra_fields.fields import Base64ImageField
+from . import follow_cache
 from .models import UserModel, Follow, Diary, Comment
 
 
+def image_url(image):
+    # ImageField 값 또는 저장된 경로 문자열
+    name = getattr(image, "name", image)
+    return "https://dailydiaryappbucket.s3.amazonaws.com/" + name
+
+
 # User
 class UserSerializer(serializers.ModelSerializer):
     image = Base64ImageField(required=False)
@@ -26,16 +34,13 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
     def get_image_url(self, obj):
-        imageUrl = "https://dailydiaryappbucket.s3.amazonaws.com/" + obj.image.name
-        return imageUrl
+        return image_url(obj.image)
 
     def get_followings(self, obj):
-        followings = Follow.objects.filter(follower=obj)
-        return [following.following.username for following in followings]
+        return usernames(follow_cache.ids(obj.pk, follow_cache.FOLLOWINGS))
 
     def get_followers(self, obj):
-        followers = Follow.objects.filter(following=obj)
-        return [follower.follower.username for follower in followers]
+        return usernames(follow_cache.ids(obj.pk, follow_cache.FOLLOWERS))
 
     def create(self, validated_data):
         user = UserModel(
@@ -48,9 +53,40 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+def usernames(user_ids):
+    if not user_ids:
+        return []
+    names = dict(
+        UserModel.objects.filter(id__in=user_ids).values_list("id", "username")
+    )
+    return [names[user_id] for user_id in user_ids if user_id in names]
+
+
+class UserProfileSerializer(serializers.ModelSerializer):
+    """팔로우 목록 대신 팔로우 수만 내려주는 가벼운 사용자 정보."""
+
+    image_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserModel
+        fields = [
+            "id",
+            "username",
+            "name",
+            "email",
+            "image_url",
+            "follower_count",
+            "following_count",
+        ]
+        read_only_fields = fields
+
+    def get_image_url(self, obj):
+        return image_url(obj.image)
+
+
 # Follow
 class FollowSerializer(serializers.ModelSerializer):
-    follower = UserSerializer(read_only=True)
+    follower = UserProfileSerializer(read_only=True)
     following = serializers.PrimaryKeyRelatedField(queryset=UserModel.objects.all())
 
     class Meta:
@@ -74,13 +110,14 @@ class FollowSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         follower = self.context.get("request").user
         following = validated_data["following"]
-        follow = Follow.objects.create(follower=follower, following=following)
+        # 팔로우 수 갱신(signals)과 같은 트랜잭션에서 처리
+        with transaction.atomic():
+            follow = Follow.objects.create(follower=follower, following=following)
         return follow
 
 
 # Comment
 class CommentSerializer(serializers.ModelSerializer):
-    like_count = serializers.SerializerMethodField()
     likes = serializers.SerializerMethodField()
     writer_name = serializers.CharField(source="writer.username", read_only=True)
     writer_image_url = serializers.SerializerMethodField()
@@ -100,12 +137,7 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ("writer_name", "likes", "like_count", "created_at")
 
     def get_writer_image_url(self, obj):
-        user = UserModel.objects.get(username=obj.writer)
-        serializer = UserSerializer(user)
-        return serializer.data["image_url"]
-
-    def get_like_count(self, obj):
-        return obj.like.count()
+        return image_url(obj.writer.image)
 
     def get_likes(self, obj):
         return [user.username for user in obj.like.all()]
@@ -128,20 +160,34 @@ class DiarySerializer(serializers.ModelSerializer):
     writer_name = serializers.CharField(source="writer.username", read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
     # images = serializers.ListField()
-    like_count = serializers.SerializerMethodField()
     likes = serializers.SerializerMethodField()
 
     class Meta:
         model = Diary
         fields = "__all__"
         excluded = ["like"]
-        read_only_fields = ("writer", "likes", "like_count", "created_at")
-
-    def get_like_count(self, obj):
-        return obj.like.count()
+        read_only_fields = (
+            "writer",
+            "likes",
+            "like_count",
+            "created_at",
+            "emotion",
+            "probs",
+            "emotion_status",
+        )
 
     def get_likes(self, obj):
-        return [user.username for user in obj.like.all()]
+        likes = [user.username for user in obj.like.all()]
+        # like_buffer.overlay(): 아직 DB 에 반영되지 않은 본인 좋아요
+        liked = getattr(obj, "liked", None)
+        request = self.context.get("request")
+        if liked is not None and request is not None:
+            username = request.user.username
+            if liked and username not in likes:
+                likes.append(username)
+            elif not liked and username in likes:
+                likes.remove(username)
+        return likes
 
     def create(self, validated_data):
         request = self.context.get("request")
@@ -172,3 +218,18 @@ class DiarySerializer(serializers.ModelSerializer):
         validated_data["content"] = content
 
         return Diary.objects.create(**validated_data)
+
+
+class DiaryListSerializer(DiarySerializer):
+    """
+    Diary.objects.for_list(user) 와 함께 사용, 행마다 추가 쿼리가 없다.
+    좋아요는 누른 사람 목록 대신 like_count 와 요청한 사용자의 liked 만 내려준다.
+    """
+
+    comments = None
+    likes = None
+    liked = serializers.BooleanField(read_only=True)
+
+    class Meta(DiarySerializer.Meta):
+        fields = None
+        exclude = ["like"]
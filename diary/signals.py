@@ -1,8 +1,18 @@
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-import boto3
 from django.conf import settings
-from .models import UserModel, Diary
+from . import (
+    diary_search,
+    emotion_summary,
+    follow_cache,
+    ranking,
+    realtime,
+    user_search,
+    username_bloom,
+)
+from .models import UserModel, Diary, Comment, Follow
 
 
 # update 될때 기존 이미지 삭제
@@ -13,6 +23,8 @@ def delete_old_image_usermodel(sender, instance, **kwargs):
 
         if old_instance.image != "default.jpg":
             if old_instance.image != instance.image:
+                import boto3
+
                 s3_client = boto3.client(
                     "s3",
                     aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
@@ -28,3 +40,108 @@ def delete_old_image_usermodel(sender, instance, **kwargs):
                     s3_client.delete_object(Bucket=bucket_name, Key=old_image_path)
                 except Exception as e:
                     pass
+
+
+# 팔로우 수 / 팔로우 캐시 갱신
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    UserModel.objects.filter(pk=instance.follower_id).update(
+        following_count=F("following_count") + 1
+    )
+    UserModel.objects.filter(pk=instance.following_id).update(
+        follower_count=F("follower_count") + 1
+    )
+    transaction.on_commit(
+        lambda: follow_cache.add_edge(
+            instance.follower_id, instance.following_id, instance.created_at
+        )
+    )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    UserModel.objects.filter(pk=instance.follower_id).update(
+        following_count=F("following_count") - 1
+    )
+    UserModel.objects.filter(pk=instance.following_id).update(
+        follower_count=F("follower_count") - 1
+    )
+    transaction.on_commit(
+        lambda: follow_cache.remove_edge(instance.follower_id, instance.following_id)
+    )
+
+
+# 월별 인기 순위 갱신
+@receiver(post_save, sender=Diary)
+def diary_saved(sender, instance, created, **kwargs):
+    old_date, old_public = getattr(instance, "_loaded_ranking", (None, None))
+    if not created and (old_date, old_public) == (instance.date, instance.is_public):
+        return
+    transaction.on_commit(lambda: ranking.sync(instance, old_date))
+
+
+@receiver(post_delete, sender=Diary)
+def diary_deleted(sender, instance, **kwargs):
+    diary_id, date = instance.pk, instance.date
+    transaction.on_commit(lambda: ranking.remove(diary_id, date))
+
+
+# 달력용 하루 감정 요약 갱신
+@receiver(post_save, sender=Diary)
+def diary_saved_summary(sender, instance, **kwargs):
+    old_date, _ = getattr(instance, "_loaded_ranking", (None, None))
+    keys = {(instance.writer_id, instance.date)}
+    if old_date is not None:
+        keys.add((instance.writer_id, old_date))
+    transaction.on_commit(lambda: emotion_summary.refresh_many(keys))
+
+
+@receiver(post_delete, sender=Diary)
+def diary_deleted_summary(sender, instance, **kwargs):
+    user_id, date = instance.writer_id, instance.date
+    transaction.on_commit(lambda: emotion_summary.refresh(user_id, date))
+
+
+# 사용자 검색 index 갱신
+@receiver(post_save, sender=UserModel)
+def user_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: user_search.index_user(instance))
+    # 가입 / username 변경
+    username = instance.username
+    transaction.on_commit(lambda: username_bloom.add(username))
+
+
+@receiver(post_delete, sender=UserModel)
+def user_deleted(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: user_search.remove(user_id))
+
+
+# 일기 검색 index 갱신
+@receiver(post_save, sender=Diary)
+def diary_saved_search(sender, instance, created, **kwargs):
+    # save() 가 끝나면 _loaded_search 가 바뀌므로 바뀐 필드는 지금 확인한다
+    changes = instance.search_changes()
+    if created or changes & {"text", "content"}:
+        transaction.on_commit(lambda: diary_search.index(instance))
+        return
+    diary_id, is_public, emotion = instance.pk, instance.is_public, instance.emotion
+    if "is_public" in changes:
+        transaction.on_commit(lambda: diary_search.set_public(diary_id, is_public))
+    if "emotion" in changes and emotion is not None:
+        transaction.on_commit(lambda: diary_search.set_emotion(diary_id, emotion))
+
+
+@receiver(post_delete, sender=Diary)
+def diary_deleted_search(sender, instance, **kwargs):
+    diary_id = instance.pk
+    transaction.on_commit(lambda: diary_search.remove(diary_id))
+
+
+# 일기를 보고 있는 WebSocket 연결에 새 댓글 push
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        realtime.push_comment(instance)
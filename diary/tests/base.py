@@ -0,0 +1,73 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+
+from ..models import Diary, UserModel
+
+# Redis 를 쓰는 테스트는 db 15 를 비워 가며 사용한다 (개발용 db 1 은 건드리지 않음)
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://127.0.0.1:6379/15",
+        "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+    }
+}
+TEST_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+PROBS = [
+    {"name": name, "pv": pv}
+    for name, pv in zip(
+        ["매우 부정", "부정", "중립", "긍정", "매우 긍정"], [5, 5, 10, 60, 20]
+    )
+]
+
+
+class FakeModel:
+    """감정 분석 모델 대신 정해진 결과를 돌려준다."""
+
+    def __init__(self, result=(3, PROBS), error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def sentiment_analysis(self, sentence, timeout=None):
+        self.calls.append(sentence)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class FakeEncodedModel:
+    """encode() 는 글자 수만큼의 토큰, predict_encoded() 는 window 수를 돌려준다."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+
+    def encode(self, sentence):
+        return [list(range(len(sentence)))]
+
+    def predict_encoded(self, encoded):
+        self.batches.append([len(windows[0]) for windows in encoded])
+        if self.error is not None:
+            raise self.error
+        return [(len(windows[0]), []) for windows in encoded]
+
+
+@override_settings(
+    CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, LIKE_WRITE_BEHIND=False
+)
+class RedisTestCase(TestCase):
+    def setUp(self):
+        self.redis = get_redis_connection("default")
+        self.redis.flushdb()
+        self.addCleanup(self.redis.flushdb)
+
+    def make_user(self, username, **kwargs):
+        kwargs.setdefault("name", username)
+        return UserModel.objects.create_user(username=username, password="pw", **kwargs)
+
+    def make_diary(self, writer, text="", **kwargs):
+        kwargs.setdefault("date", datetime.date(2026, 10, 1))
+        return Diary.objects.create(writer=writer, text=text, **kwargs)
@@ -0,0 +1,52 @@
+import importlib.util
+import pathlib
+import tempfile
+from unittest import skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from ..backends import get_backend, model_version, parity_report
+
+
+class FakeBatchModel:
+    def __init__(self, results):
+        self.results = results
+
+    def sentiment_analysis_batch(self, sentences):
+        return [self.results[sentence] for sentence in sentences]
+
+
+# 추론 backend
+class BackendTests(TestCase):
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend("tensorflow")
+
+    @override_settings(SENTIMENT_MODEL_REVISION=7)
+    def test_model_version_names_the_backend(self):
+        self.assertTrue(model_version("torch").endswith(":torch:7"))
+        self.assertTrue(model_version("onnx", quantized=True).endswith(":onnx-int8:7"))
+        self.assertTrue(model_version("onnx", quantized=False).endswith(":onnx:7"))
+
+    @skipUnless(importlib.util.find_spec("onnxruntime"), "onnxruntime not installed")
+    def test_missing_onnx_model(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(SENTIMENT_ONNX_DIR=pathlib.Path(directory)):
+                with self.assertRaises(ImproperlyConfigured):
+                    get_backend("onnx", quantized=True)
+
+    def test_parity_report(self):
+        def probs(pv):
+            return [{"name": "긍정", "pv": pv}]
+
+        reference = FakeBatchModel({"a": (3, probs(60.0)), "b": (1, probs(10.0))})
+        candidate = FakeBatchModel({"a": (3, probs(61.5)), "b": (2, probs(10.0))})
+
+        report = parity_report(reference, candidate, ["a", "b"])
+
+        self.assertEqual(report["agreement"], 0.5)
+        self.assertEqual(report["max_pv_diff"], 1.5)
+        self.assertEqual(
+            report["mismatches"], [{"text": "b", "expected": 1, "actual": 2}]
+        )
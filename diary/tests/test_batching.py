@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+from ..batching import BatchingEngine, InferenceBusy
+from .base import FakeEncodedModel
+
+
+# micro-batching
+class BatchingEngineTests(TestCase):
+    def engine(self, model, **kwargs):
+        kwargs.setdefault("max_wait_ms", 50)
+        engine = BatchingEngine(model, **kwargs)
+        self.addCleanup(engine.stop, 5)
+        return engine
+
+    def test_concurrent_requests_share_a_forward_pass(self):
+        model = FakeEncodedModel()
+        engine = self.engine(model, max_batch_size=8, padding_ratio=10)
+        # engine 스레드를 시작하기 전에 넣어 두면 한 배치로 모인다
+        futures = [engine.submit("x" * length) for length in (3, 5, 4)]
+        engine.start()
+
+        self.assertEqual([f.result(5)[0] for f in futures], [3, 5, 4])
+        self.assertEqual(model.batches, [[3, 4, 5]])
+        self.assertEqual(engine.stats()["batch_size_histogram"], {3: 1})
+
+    def test_requests_are_split_by_length(self):
+        model = FakeEncodedModel()
+        engine = self.engine(model, max_batch_size=8, padding_ratio=1.5)
+        futures = [engine.submit("x" * length) for length in (2, 3, 10, 12)]
+        engine.start()
+
+        for future in futures:
+            future.result(5)
+        self.assertEqual(model.batches, [[2, 3], [10, 12]])
+
+    def test_max_batch_size(self):
+        model = FakeEncodedModel()
+        engine = self.engine(model, max_batch_size=2, padding_ratio=10)
+        futures = [engine.submit("xx") for _ in range(5)]
+        engine.start()
+
+        for future in futures:
+            future.result(5)
+        self.assertEqual([len(batch) for batch in model.batches], [2, 2, 1])
+
+    def test_full_queue_raises_busy(self):
+        engine = self.engine(FakeEncodedModel(), max_pending=1)
+        engine.submit("a")
+        with self.assertRaises(InferenceBusy):
+            engine.submit("b", timeout=0.01)
+
+    def test_forward_error_is_returned_to_every_caller(self):
+        engine = self.engine(FakeEncodedModel(error=ValueError("boom")))
+        futures = [engine.submit("a"), engine.submit("b")]
+        with self.assertLogs("diary.batching", "ERROR"):
+            engine.start()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result(5)
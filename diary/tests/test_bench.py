@@ -0,0 +1,91 @@
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .base import PROBS
+
+
+class FakeBenchModel:
+    # torch 만 메모리를 많이 쓰는 것처럼 (64MB), "crash" 는 로드 중 프로세스가 죽는다
+    def __init__(self, backend=None, quantized=None, threads=None):
+        if backend == "crash":
+            os._exit(3)
+        self.weights = bytearray(64 * 1024 * 1024) if backend == "torch" else b""
+
+    def sentiment_analysis_batch(self, sentences):
+        return [(0, PROBS) for _ in sentences]
+
+
+# 추론 benchmark
+@mock.patch("diary.bert.BertModel", FakeBenchModel)
+class BenchSentimentTests(TestCase):
+    def bench(self, *args):
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "bench_sentiment",
+                *args,
+                "--iterations=2",
+                "--warmup=0",
+                f"--output={output.name}",
+                stdout=io.StringIO(),
+            )
+            return json.load(output)
+
+    def test_latency_report(self):
+        report = self.bench(
+            "--backends=torch,onnx", "--threads=1", "--lengths=50", "--batch-sizes=1,4"
+        )
+
+        self.assertIn("revision", report["meta"])
+        rows = report["results"]
+        self.assertEqual(
+            [(row["backend"], row["batch_size"]) for row in rows],
+            [("torch", 1), ("torch", 4), ("onnx", 1), ("onnx", 4)],
+        )
+        for key in ("p50_ms", "p95_ms", "p99_ms", "texts_per_second", "load_seconds"):
+            self.assertIn(key, rows[0])
+
+    def test_peak_rss_is_measured_per_case(self):
+        rows = self.bench(
+            "--backends=torch,onnx", "--threads=1", "--lengths=50", "--batch-sizes=1"
+        )["results"]
+        torch_rss, onnx_rss = (row["peak_rss_mb"] for row in rows)
+        # onnx case 는 앞의 torch case 의 최대 메모리를 물려받지 않는다
+        self.assertGreater(torch_rss - onnx_rss, 50)
+
+
+# 프로세스 x 스레드 조합, 추론 스레드 정책
+@mock.patch("diary.bert.BertModel", FakeBenchModel)
+class BenchScalingTests(TestCase):
+    def scaling(self, backend):
+        out = io.StringIO()
+        call_command(
+            "bench_sentiment",
+            "--scaling",
+            f"--backends={backend}",
+            "--workers=1,2",
+            "--threads=1",
+            "--lengths=50",
+            "--batch-sizes=2",
+            "--iterations=2",
+            "--timeout=30",
+            stdout=out,
+        )
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_scaling_report(self):
+        rows = self.scaling("onnx")
+        self.assertEqual([row["processes"] for row in rows], [1, 2])
+        self.assertTrue(all(row["texts_per_second"] > 0 for row in rows))
+
+    def test_crashed_worker_aborts_instead_of_hanging(self):
+        started = time.monotonic()
+        with self.assertRaisesMessage(CommandError, "exit codes [3"):
+            self.scaling("crash")
+        self.assertLess(time.monotonic() - started, 10)
@@ -0,0 +1,126 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from unittest import mock, skipUnless
+
+import numpy as np
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import bert
+from ..bert import BertModel
+
+
+# 무거운 모듈은 처음 사용할 때 import
+class LazyImportTests(TestCase):
+    HEAVY_MODULES = [
+        "torch",
+        "transformers",
+        "onnxruntime",
+        "boto3",
+        "numpy",
+        "pandas",
+    ]
+
+    def test_startup_does_not_import_heavy_modules(self):
+        code = (
+            "import json, sys, django; django.setup(); "
+            "from django.urls import get_resolver; get_resolver().url_patterns; "
+            "import diary.signals; "
+            f"print(json.dumps([m for m in {self.HEAVY_MODULES!r} if m in sys.modules]))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout.splitlines()[-1]), [])
+
+
+class FakeTokenizer:
+    def pad(self, encoded, return_tensors=None):
+        windows = encoded["input_ids"]
+        width = max(len(window) for window in windows)
+        return {
+            "input_ids": np.array([w + [0] * (width - len(w)) for w in windows]),
+            "attention_mask": np.array(
+                [[1] * len(w) + [0] * (width - len(w)) for w in windows]
+            ),
+        }
+
+
+class FakeLogitsBackend:
+    """window 의 첫 토큰을 정답 class 로 하는 logits."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def logits(self, input_ids, attention_mask):
+        self.calls += 1
+        logits = np.full((len(input_ids), 5), -50.0)
+        logits[np.arange(len(input_ids)), input_ids[:, 0]] = 50.0
+        return logits
+
+
+# 긴 일기는 겹치는 window 로 나눠 분석
+class WindowedInferenceTests(TestCase):
+    def model(self):
+        model = BertModel.__new__(BertModel)
+        model.tokenizer = FakeTokenizer()
+        model.backend = FakeLogitsBackend()
+        return model
+
+    def test_windows_are_weighted_by_token_count(self):
+        model = self.model()
+        # class 4 window 는 실제 토큰 6개, class 0 window 는 2개 ([CLS], [SEP] 제외)
+        windows = [[4] + [9] * 7, [0, 9, 9, 9]]
+
+        ((predicted, probs),) = model.predict_encoded([windows])
+
+        self.assertEqual(predicted, 4)
+        self.assertEqual([item["pv"] for item in probs], [25.0, 0, 0, 0, 75.0])
+
+    def test_all_texts_run_in_one_forward_pass(self):
+        model = self.model()
+        results = model.predict_encoded([[[1, 9, 9]], [[2, 9], [3, 9, 9, 9, 9]]])
+
+        self.assertEqual(model.backend.calls, 1)
+        self.assertEqual([predicted for predicted, _ in results], [1, 3])
+
+
+# fork 전에 가중치를 로드해 worker 끼리 공유
+class PreloadTests(TestCase):
+    @override_settings(SENTIMENT_BACKEND="onnx")
+    def test_onnx_is_not_preloaded(self):
+        with mock.patch("diary.bert.get_model") as get_model:
+            self.assertIsNone(bert.preload())
+        get_model.assert_not_called()
+
+    @override_settings(SENTIMENT_BACKEND="torch")
+    def test_torch_weights_are_frozen_before_fork(self):
+        param = mock.Mock()
+        model = mock.Mock()
+        model.backend.model.parameters.return_value = [param]
+        with mock.patch("diary.bert.get_model", return_value=model), mock.patch(
+            "gc.freeze"
+        ) as freeze:
+            self.assertIs(bert.preload(), model)
+
+        param.requires_grad_.assert_called_once_with(False)
+        freeze.assert_called_once_with()
+        # fork 전에 추론을 돌리면 스레드 풀이 생긴다
+        model.sentiment_analysis.assert_not_called()
+
+    @skipUnless(os.path.exists("/proc/self/smaps_rollup"), "Linux only")
+    def test_worker_memory_report(self):
+        out = io.StringIO()
+        call_command("worker_memory", str(os.getpid()), "--json", stdout=out)
+        report = json.loads(out.getvalue())
+        (row,) = report["workers"]
+        self.assertEqual(row["pid"], os.getpid())
+        self.assertGreater(row["rss_mb"], 0)
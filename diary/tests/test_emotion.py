@@ -0,0 +1,205 @@
+import datetime
+from unittest import mock
+
+import numpy as np
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .. import analytics, bert, emotion_summary
+from ..models import DailyEmotionSummary, Diary, EmotionStatus
+from .base import PROBS, RedisTestCase
+
+
+# 하루 감정 요약과 달력
+class EmotionSummaryTests(RedisTestCase):
+    day = datetime.date(2026, 10, 1)
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("writer")
+
+    def probs(self, *pvs):
+        return [{"name": item["name"], "pv": pv} for item, pv in zip(PROBS, pvs)]
+
+    def analysed(self, *pvs, **kwargs):
+        kwargs.setdefault("date", self.day)
+        return self.make_diary(
+            self.user,
+            emotion_status=EmotionStatus.DONE,
+            probs=self.probs(*pvs),
+            **kwargs,
+        )
+
+    def summary(self, date=None):
+        return DailyEmotionSummary.objects.filter(
+            user=self.user, date=date or self.day
+        ).first()
+
+    def test_summarize(self):
+        rows = [
+            (EmotionStatus.DONE, self.probs(10, 10, 20, 40, 20)),
+            (EmotionStatus.DONE, self.probs(30, 10, 20, 20, 20)),
+            (EmotionStatus.PENDING, []),
+        ]
+        diary_count, probs, emotion = emotion_summary.summarize(rows)
+        self.assertEqual(diary_count, 3)
+        self.assertEqual([item["pv"] for item in probs], [20, 10, 20, 30, 20])
+        self.assertEqual(emotion, 3)
+        self.assertEqual(
+            emotion_summary.summarize([(EmotionStatus.PENDING, [])]), (1, [], None)
+        )
+
+    def test_refresh_upserts_and_deletes(self):
+        diary = self.analysed(10, 10, 20, 40, 20)
+        # 다른 worker 가 이미 만든 요약
+        DailyEmotionSummary.objects.update_or_create(
+            user=self.user, date=self.day, defaults={"diary_count": 9}
+        )
+        emotion_summary.refresh(self.user.pk, self.day)
+        self.assertEqual(DailyEmotionSummary.objects.count(), 1)
+        self.assertEqual(self.summary().diary_count, 1)
+        self.assertEqual(self.summary().emotion, 3)
+        self.assertEqual(self.summary().probs, diary.probs)
+
+        Diary.objects.filter(pk=diary.pk).delete()
+        emotion_summary.refresh(self.user.pk, self.day)
+        self.assertIsNone(self.summary())
+
+    def test_signals_follow_saves_and_moves(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            diary = self.analysed(10, 10, 20, 40, 20)
+            self.make_diary(self.user)
+        self.assertEqual(self.summary().diary_count, 2)
+
+        moved = datetime.date(2026, 10, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            diary.date = moved
+            diary.save()
+        self.assertEqual(self.summary().diary_count, 1)
+        self.assertIsNone(self.summary().emotion)
+        self.assertEqual(self.summary(moved).emotion, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            diary.delete()
+        self.assertIsNone(self.summary(moved))
+
+    def test_calendar(self):
+        other = self.make_user("other")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.analysed(0, 0, 10, 10, 80, date=datetime.date(2026, 10, 3))
+            self.make_diary(self.user, date=self.day)
+            self.make_diary(self.user, date=datetime.date(2026, 11, 1))
+            self.make_diary(other, date=self.day)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get("/api/diary/calendar/?month=2026-10")
+        self.assertEqual(
+            response.json(),
+            [
+                {"date": "2026-10-01", "diary_count": 1, "emotion": None},
+                {"date": "2026-10-03", "diary_count": 1, "emotion": 4},
+            ],
+        )
+        for query in ("", "?month=2026", "?month=2026-13"):
+            response = client.get(f"/api/diary/calendar/{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+# 감정 통계
+class AnalyticsTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("writer")
+
+    def analysed(self, date, dominant, **kwargs):
+        probs = [{"name": name, "pv": 10} for name in bert.emotion]
+        probs[dominant]["pv"] = 60
+        kwargs.setdefault("is_public", True)
+        return self.make_diary(
+            self.user,
+            date=date,
+            emotion_status=EmotionStatus.DONE,
+            probs=probs,
+            **kwargs,
+        )
+
+    def test_summarize_empty(self):
+        dates, probs = analytics.load_probs(Diary.objects.all())
+        self.assertEqual(
+            analytics.summarize(dates, probs),
+            {"count": 0, "distribution": [], "weekly": [], "moving_average": []},
+        )
+
+    def test_summarize(self):
+        # 2026-10-05 는 월요일
+        dates = np.array(["2026-10-05", "2026-10-06", "2026-10-14"], "datetime64[D]")
+        probs = np.array(
+            [[60, 10, 10, 10, 10], [10, 10, 10, 60, 10], [10, 10, 10, 60, 10]],
+            dtype=np.float64,
+        )
+        result = analytics.summarize(dates, probs)
+
+        self.assertEqual(result["count"], 3)
+        self.assertEqual(
+            [(row["count"], row["ratio"]) for row in result["distribution"]],
+            [(1, 0.3333), (0, 0), (0, 0), (2, 0.6667), (0, 0)],
+        )
+        self.assertEqual(result["distribution"][0]["pv"], 26.67)
+        self.assertEqual(
+            [(row["week"], row["count"]) for row in result["weekly"]],
+            [("2026-10-05", 2), ("2026-10-12", 1)],
+        )
+        self.assertEqual(result["weekly"][0]["pv"], [35, 10, 10, 35, 10])
+        moving = {row["date"]: row["pv"] for row in result["moving_average"]}
+        self.assertEqual(moving["2026-10-06"], [35, 10, 10, 35, 10])
+        # 7일 안에 일기가 없는 날은 빠진다
+        self.assertNotIn("2026-10-13", moving)
+        self.assertEqual(moving["2026-10-14"], [10, 10, 10, 60, 10])
+
+    def test_load_probs_reads_in_chunks(self):
+        for day in range(1, 6):
+            self.analysed(datetime.date(2026, 10, day), day % 5)
+        self.make_diary(self.user)
+        self.make_diary(self.user, emotion_status=EmotionStatus.DONE, probs=[])
+
+        with CaptureQueriesContext(connection) as queries:
+            dates, probs = analytics.load_probs(Diary.objects.all(), chunk_size=2)
+        self.assertEqual(len(queries), 4)
+        self.assertEqual(probs.shape, (5, 5))
+        self.assertEqual(sorted(probs.argmax(axis=1)), [0, 1, 2, 3, 4])
+        self.assertEqual(str(dates.min()), "2026-10-01")
+
+    def test_mood_uses_local_date_and_cache(self):
+        other = self.make_user("other")
+        self.analysed(datetime.date(2026, 10, 1), 3)
+        self.analysed(datetime.date(2026, 10, 15), 3)
+        self.analysed(datetime.date(2026, 10, 16), 0, is_public=False)
+        self.make_diary(
+            other,
+            date=datetime.date(2026, 10, 16),
+            is_public=True,
+            emotion_status=EmotionStatus.DONE,
+            probs=PROBS,
+        )
+
+        today = datetime.date(2026, 10, 20)
+        with mock.patch.object(analytics.timezone, "localdate", return_value=today):
+            self.assertEqual(analytics.mood(days=10)["count"], 2)
+            self.assertEqual(analytics.mood(self.user.pk, days=10)["count"], 1)
+            self.assertEqual(analytics.mood(self.user.pk, days=30)["count"], 2)
+
+            # 캐시된 결과
+            self.analysed(datetime.date(2026, 10, 18), 3)
+            self.assertEqual(analytics.mood(self.user.pk, days=10)["count"], 1)
+
+    def test_view_validates_params(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f"/api/diary/analytics/?user={self.user.pk}&days=7")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 0)
+        for query in ("user=abc", "days=-1", "days=x"):
+            response = client.get(f"/api/diary/analytics/?{query}")
+            self.assertEqual(response.status_code, 400, query)
@@ -0,0 +1,62 @@
+from rest_framework.test import APIClient
+
+from .. import follow_cache
+from ..models import Follow, UserModel
+from .base import RedisTestCase
+
+
+# 팔로우 수 / 팔로우 관계 캐시
+class FollowCacheTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+        self.carol = self.make_user("carol")
+        self.followers = follow_cache.cache_key(self.bob.pk, follow_cache.FOLLOWERS)
+
+    def follow(self, follower, following):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Follow.objects.create(follower=follower, following=following)
+
+    def test_counts_are_maintained(self):
+        follow = self.follow(self.alice, self.bob)
+        self.follow(self.carol, self.bob)
+        self.bob.refresh_from_db()
+        self.alice.refresh_from_db()
+        self.assertEqual((self.bob.follower_count, self.alice.following_count), (2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.delete()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.follower_count, 1)
+
+    def test_full_save_keeps_counts_changed_after_load(self):
+        bob = UserModel.objects.get(pk=self.bob.pk)
+        self.follow(self.alice, self.bob)
+        bob.name = "robert"
+        bob.save()
+
+        self.bob.refresh_from_db()
+        self.assertEqual((self.bob.name, self.bob.follower_count), ("robert", 1))
+
+    def test_edges_update_a_loaded_cache(self):
+        self.follow(self.alice, self.bob)
+        self.assertEqual(
+            follow_cache.ids(self.bob.pk, follow_cache.FOLLOWERS), [self.alice.pk]
+        )
+
+        self.follow(self.carol, self.bob)
+        self.assertEqual(
+            follow_cache.ids(self.bob.pk, follow_cache.FOLLOWERS),
+            [self.carol.pk, self.alice.pk],
+        )
+        self.assertGreater(self.redis.ttl(self.followers), 0)
+        self.assertTrue(follow_cache.is_following(self.carol.pk, self.bob.pk))
+
+    def test_profile_returns_counts(self):
+        self.follow(self.alice, self.bob)
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.get("/api/user/bob/")
+        self.assertEqual(response.json()["follower_count"], 1)
+        self.assertTrue(response.json()["following"])
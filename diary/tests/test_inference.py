@@ -0,0 +1,268 @@
+import io
+import json
+import pathlib
+import tempfile
+import time
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from .. import cpu, inference, sentiment_cache
+from ..backends import model_version
+from ..batching import BatchingEngine
+from ..models import Diary, EmotionStatus
+from .base import PROBS, FakeEncodedModel, FakeModel, RedisTestCase
+
+
+# 감정 분석 작업 큐
+class SentimentQueueTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("writer")
+
+    def queued_jobs(self):
+        return [
+            json.loads(raw) for raw in self.redis.lrange(inference.QUEUE_KEY, 0, -1)
+        ]
+
+    def test_save_enqueues_job_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            diary = self.make_diary(self.user, text="오늘은 좋은 하루")
+        self.assertEqual(diary.emotion_status, EmotionStatus.PENDING)
+        self.assertEqual(
+            self.queued_jobs(), [{"diary_id": str(diary.pk), "attempts": 0}]
+        )
+
+    def test_process_job_stores_result(self):
+        diary = self.make_diary(self.user, text="오늘은 좋은 하루")
+        inference.enqueue_sentiment(diary.pk)
+        raw, job = inference.next_job(timeout=1)
+        model = FakeModel()
+
+        inference.process_job(model, raw, job)
+
+        diary.refresh_from_db()
+        self.assertEqual(diary.emotion_status, EmotionStatus.DONE)
+        self.assertEqual((diary.emotion, diary.probs), (3, PROBS))
+        self.assertEqual(model.calls, ["오늘은 좋은 하루"])
+        self.assertEqual(self.redis.llen(inference.PROCESSING_KEY), 0)
+
+    @override_settings(SENTIMENT_RETRY_DELAY=10, SENTIMENT_MAX_RETRIES=2)
+    def test_failed_job_is_retried_with_backoff(self):
+        diary = self.make_diary(self.user, text="text")
+        raw = json.dumps({"diary_id": str(diary.pk), "attempts": 1})
+        self.redis.lpush(inference.PROCESSING_KEY, raw)
+
+        before = time.time()
+        with self.assertLogs("diary.inference", "ERROR"):
+            inference.process_job(FakeModel(error=RuntimeError()), raw, json.loads(raw))
+
+        ((retry, due),) = self.redis.zrange(
+            inference.DELAYED_KEY, 0, -1, withscores=True
+        )
+        self.assertEqual(json.loads(retry)["attempts"], 2)
+        # 두 번째 재시도는 10 * 2 초 뒤
+        self.assertAlmostEqual(due - before, 20, delta=1)
+        self.assertEqual(self.redis.llen(inference.PROCESSING_KEY), 0)
+
+    @override_settings(SENTIMENT_MAX_RETRIES=2)
+    def test_job_is_marked_failed_after_max_retries(self):
+        diary = self.make_diary(self.user, text="text")
+        job = {"diary_id": str(diary.pk), "attempts": 2}
+
+        with self.assertLogs("diary.inference", "ERROR"):
+            inference.process_job(FakeModel(error=RuntimeError()), json.dumps(job), job)
+
+        diary.refresh_from_db()
+        self.assertEqual(diary.emotion_status, EmotionStatus.FAILED)
+        self.assertEqual(self.redis.zcard(inference.DELAYED_KEY), 0)
+
+    def test_promote_delayed_moves_only_due_jobs(self):
+        self.redis.zadd(
+            inference.DELAYED_KEY,
+            {"due": time.time() - 1, "later": time.time() + 60},
+        )
+        self.assertEqual(inference.promote_delayed(), 1)
+        self.assertEqual(self.redis.lrange(inference.QUEUE_KEY, 0, -1), [b"due"])
+        self.assertEqual(self.redis.zrange(inference.DELAYED_KEY, 0, -1), [b"later"])
+
+    def test_requeue_stale(self):
+        self.redis.lpush(inference.PROCESSING_KEY, "a", "b")
+        self.assertEqual(inference.requeue_stale(), 2)
+        self.assertEqual(self.redis.llen(inference.QUEUE_KEY), 2)
+
+    def test_deleted_diary_job_is_dropped(self):
+        job = {"diary_id": "00000000-0000-0000-0000-000000000000", "attempts": 0}
+        model = FakeModel()
+        inference.process_job(model, json.dumps(job), job)
+        self.assertEqual(model.calls, [])
+        self.assertEqual(self.redis.zcard(inference.DELAYED_KEY), 0)
+
+
+# text 가 바뀐 저장만 분석
+class SentimentSkipTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        sentiment_cache.reset_stats()
+        self.user = self.make_user("writer")
+        self.diary = self.make_diary(self.user, text="오늘은 좋은 하루")
+        self.redis.delete(inference.QUEUE_KEY)
+
+    def saved(self, diary, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            diary.save(**kwargs)
+        return self.redis.llen(inference.QUEUE_KEY)
+
+    def test_non_text_save_is_not_analysed(self):
+        diary = Diary.objects.get(pk=self.diary.pk)
+        diary.is_public = False
+        self.assertEqual(self.saved(diary), 0)
+
+    def test_deferred_text_is_unchanged(self):
+        diary = Diary.objects.only("id", "writer", "date", "is_public").get(
+            pk=self.diary.pk
+        )
+        diary.is_public = False
+        self.assertEqual(self.saved(diary), 0)
+        # text 를 나중에 읽기만 한 경우도 마찬가지
+        diary.text
+        self.assertEqual(self.saved(diary), 0)
+
+    def test_changed_text_is_analysed(self):
+        diary = Diary.objects.only("id", "writer", "date", "text").get(pk=self.diary.pk)
+        diary.text = "다른 내용"
+        self.assertEqual(self.saved(diary), 1)
+        self.assertEqual(diary.emotion_status, EmotionStatus.PENDING)
+
+    def test_cached_result_skips_the_queue(self):
+        sentiment_cache.set_cached("같은 내용", (4, PROBS))
+        diary = Diary.objects.get(pk=self.diary.pk)
+        diary.text = "같은  내용\n"
+        self.assertEqual(self.saved(diary), 0)
+        self.assertEqual(diary.emotion_status, EmotionStatus.DONE)
+        self.assertEqual(diary.emotion, 4)
+
+    @override_settings(SENTIMENT_CACHE_STATS_INTERVAL=3600)
+    def test_stats_are_written_in_batches(self):
+        for _ in range(3):
+            diary = Diary.objects.get(pk=self.diary.pk)
+            diary.is_public = not diary.is_public
+            self.saved(diary)
+        # 저장마다 Redis 에 쓰지 않는다
+        self.assertFalse(self.redis.exists(sentiment_cache.STATS_KEY))
+        self.assertEqual(sentiment_cache.stats()["skipped"], 3)
+        self.assertEqual(self.redis.hget(sentiment_cache.STATS_KEY, "skipped"), b"3")
+
+
+class FakeScoringModel:
+    def __init__(self):
+        self.texts = []
+
+    def sentiment_analysis_batch(self, sentences):
+        self.texts += sentences
+        return [(len(sentence) % 5, PROBS) for sentence in sentences]
+
+
+# 재개 가능한 감정 일괄 재계산
+class BackfillEmotionsTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        user = self.make_user("writer")
+        self.diaries = sorted(
+            (self.make_diary(user, text=f"일기 {i}") for i in range(5)),
+            key=lambda diary: diary.pk,
+        )
+        self.make_diary(user, text="  ")
+        self.model = FakeScoringModel()
+        patcher = mock.patch(
+            "diary.management.commands.backfill_emotions.get_model",
+            return_value=self.model,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = pathlib.Path(directory.name) / "checkpoint.json"
+
+    def backfill(self, **options):
+        call_command(
+            "backfill_emotions",
+            checkpoint=str(self.checkpoint),
+            batch_size=2,
+            chunk_size=2,
+            stdout=io.StringIO(),
+            **options,
+        )
+
+    def test_rescores_every_diary_in_batches(self):
+        self.backfill()
+
+        self.assertEqual(len(self.model.texts), 5)
+        self.assertFalse(
+            Diary.objects.exclude(text="  ")
+            .exclude(emotion_status=EmotionStatus.DONE, emotion_model=model_version())
+            .exists()
+        )
+        # 끝까지 처리하면 checkpoint 를 지운다
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_resumes_after_checkpoint(self):
+        self.checkpoint.write_text(json.dumps({"last_pk": str(self.diaries[2].pk)}))
+
+        self.backfill()
+
+        self.assertEqual(self.model.texts, [d.text for d in self.diaries[3:]])
+
+    def test_stale_only(self):
+        Diary.objects.filter(pk__in=[d.pk for d in self.diaries[:4]]).update(
+            emotion_model=model_version()
+        )
+        self.backfill(stale_only=True)
+        self.assertEqual(self.model.texts, [self.diaries[4].text])
+
+
+class InferenceThreadingTests(RedisTestCase):
+    def full_engine(self):
+        # engine 스레드를 시작하지 않았으므로 넣은 요청은 처리되지 않는다
+        engine = BatchingEngine(FakeEncodedModel(), max_pending=1)
+        engine.submit("queued")
+        return engine
+
+    @override_settings(SENTIMENT_INFERENCE_TIMEOUT=0.05)
+    def test_busy_engine_postpones_without_using_an_attempt(self):
+        diary = self.make_diary(self.make_user("writer"), text="text")
+        job = {"diary_id": str(diary.pk), "attempts": 1}
+
+        with self.assertLogs("diary.inference", "WARNING"):
+            inference.process_job(self.full_engine(), json.dumps(job), job)
+
+        (retry,) = self.redis.zrange(inference.DELAYED_KEY, 0, -1)
+        self.assertEqual(json.loads(retry), job)
+        diary.refresh_from_db()
+        self.assertEqual(diary.emotion_status, EmotionStatus.PENDING)
+
+    @override_settings(SENTIMENT_INFERENCE_TIMEOUT=0.05)
+    def test_stalled_engine_times_out_and_retries(self):
+        diary = self.make_diary(self.make_user("writer"), text="text")
+        job = {"diary_id": str(diary.pk), "attempts": 0}
+        engine = BatchingEngine(FakeEncodedModel(), max_pending=4)
+
+        with self.assertLogs("diary.inference", "ERROR"):
+            inference.process_job(engine, json.dumps(job), job)
+
+        (retry,) = self.redis.zrange(inference.DELAYED_KEY, 0, -1)
+        self.assertEqual(json.loads(retry)["attempts"], 1)
+
+    def test_cpu_slices_do_not_overlap(self):
+        cpus = list(range(8))
+        slices = [cpu.cpu_slice(index, 4, cpus) for index in range(4)]
+        self.assertEqual(slices, [[0, 1], [2, 3], [4, 5], [6, 7]])
+
+    @override_settings(SENTIMENT_INTRA_OP_THREADS=0)
+    def test_threads_are_split_between_processes(self):
+        with mock.patch("diary.cpu.available_cpus", return_value=list(range(8))):
+            self.assertEqual(cpu.intra_op_threads(4), 2)
+            self.assertEqual(cpu.intra_op_threads(16), 1)
+        with override_settings(SENTIMENT_INTRA_OP_THREADS=3):
+            self.assertEqual(cpu.intra_op_threads(4), 3)
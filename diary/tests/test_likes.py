@@ -0,0 +1,175 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.db.models import QuerySet
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from .. import like_buffer
+from ..models import Comment, Diary, toggle_like
+from .base import RedisTestCase
+
+
+# 좋아요 토글
+class ToggleLikeTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("liker")
+        self.diary = self.make_diary(self.make_user("writer"), is_public=True)
+        self.url = f"/api/diary/like/{self.diary.pk}/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_anonymous_request_is_rejected(self):
+        response = APIClient().post(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.diary.like.exists())
+
+    def test_toggle(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.json(), {"liked": True, "like_count": 1})
+        self.assertTrue(self.diary.like.filter(pk=self.user.pk).exists())
+
+        response = self.client.post(self.url)
+        self.assertEqual(response.json(), {"liked": False, "like_count": 0})
+        self.assertFalse(self.diary.like.exists())
+
+    def test_concurrent_like_keeps_count(self):
+        # 같은 요청이 delete 와 create 사이에 먼저 행을 추가한 상황
+        self.diary.like.add(self.user)
+        with mock.patch.object(QuerySet, "delete", return_value=(0, {})):
+            liked, like_count = toggle_like(Diary, self.diary.pk, self.user)
+        self.assertTrue(liked)
+        self.assertEqual(like_count, 0)
+        self.assertTrue(self.diary.like.filter(pk=self.user.pk).exists())
+
+    def test_other_integrity_errors_are_raised(self):
+        through = Diary.like.through
+        error = IntegrityError("foreign key")
+        with mock.patch.object(through.objects, "create", side_effect=error):
+            with self.assertRaises(IntegrityError):
+                toggle_like(Diary, self.diary.pk, self.user)
+        self.diary.refresh_from_db()
+        self.assertEqual(self.diary.like_count, 0)
+
+    def test_full_save_keeps_likes_counted_after_load(self):
+        # 수정 화면이 일기를 읽은 뒤 다른 요청이 좋아요를 누른 상황
+        diary = Diary.objects.get(pk=self.diary.pk)
+        toggle_like(Diary, self.diary.pk, self.user)
+        diary.content = "수정"
+        diary.save()
+
+        self.diary.refresh_from_db()
+        self.assertEqual((self.diary.content, self.diary.like_count), ("수정", 1))
+
+    def test_comment_full_save_keeps_like_count(self):
+        comment = Comment.objects.create(
+            diary=self.diary, writer=self.user, comment="댓글"
+        )
+        toggle_like(Comment, comment.pk, self.user)
+        comment.comment = "수정"
+        comment.save()
+
+        comment.refresh_from_db()
+        self.assertEqual(comment.like_count, 1)
+
+
+# 좋아요 write-behind
+@override_settings(LIKE_WRITE_BEHIND=True)
+class LikeBufferTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+        self.diary = self.make_diary(self.make_user("writer"), is_public=True)
+        self.diary_id = str(self.diary.pk)
+
+    def db_likes(self):
+        self.diary.refresh_from_db()
+        names = sorted(self.diary.like.values_list("username", flat=True))
+        return names, self.diary.like_count
+
+    def test_toggle_loads_existing_likes(self):
+        self.diary.like.add(self.bob)
+        self.assertEqual(like_buffer.toggle(self.diary_id, self.alice), (True, 2))
+        self.assertEqual(like_buffer.toggle(self.diary_id, self.bob), (False, 1))
+        self.assertTrue(self.redis.ttl(like_buffer.users_key(self.diary_id)) > 0)
+        # DB 에는 flush 전까지 반영되지 않는다
+        self.assertEqual(self.db_likes(), (["bob"], 0))
+        self.assertEqual(like_buffer.pending(), 1)
+
+    def test_flush_writes_final_state(self):
+        self.diary.like.add(self.bob)
+        like_buffer.toggle(self.diary_id, self.alice)
+        like_buffer.toggle(self.diary_id, self.bob)
+        like_buffer.toggle(self.diary_id, self.alice)
+        like_buffer.toggle(self.diary_id, self.alice)
+
+        self.assertEqual(like_buffer.flush(), 1)
+        self.assertEqual(self.db_likes(), (["alice"], 1))
+        self.assertEqual(like_buffer.pending(), 0)
+        self.assertFalse(self.redis.exists(like_buffer.ops_key(self.diary_id)))
+        self.assertFalse(self.redis.exists(like_buffer.flushing_key(self.diary_id)))
+        self.assertEqual(like_buffer.flush(), 0)
+
+    def test_load_replays_unflushed_ops(self):
+        like_buffer.toggle(self.diary_id, self.alice)
+        # users set 만 만료된 상황
+        self.redis.delete(like_buffer.users_key(self.diary_id))
+        self.assertEqual(like_buffer.toggle(self.diary_id, self.bob), (True, 2))
+
+    def test_interrupted_flush_is_retried(self):
+        like_buffer.toggle(self.diary_id, self.alice)
+        with mock.patch.object(like_buffer, "write", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                like_buffer.flush()
+        # 처리 중인 ops 에 더해 새 변경도 쌓인다
+        like_buffer.toggle(self.diary_id, self.bob)
+        self.assertTrue(self.redis.exists(like_buffer.flushing_key(self.diary_id)))
+        self.assertEqual(like_buffer.pending(), 2)
+
+        # 남은 flushing ops 부터 반영하고, 새 ops 는 다음 flush 에서 반영
+        like_buffer.flush()
+        self.assertEqual(self.db_likes(), (["alice"], 1))
+        like_buffer.flush()
+        self.assertEqual(self.db_likes(), (["alice", "bob"], 2))
+        self.assertEqual(like_buffer.pending(), 0)
+
+    def test_write_is_idempotent(self):
+        self.diary.like.add(self.bob)
+        ops = {self.alice.pk: True, self.bob.pk: False, 999999: True}
+        like_buffer.write(self.diary_id, ops)
+        like_buffer.write(self.diary_id, ops)
+        self.assertEqual(self.db_likes(), (["alice"], 1))
+
+    def test_write_skips_deleted_diary(self):
+        self.diary.delete()
+        like_buffer.write(self.diary_id, {self.alice.pk: True})
+        self.assertFalse(Diary.like.through.objects.exists())
+
+    def test_overlay(self):
+        other = self.make_diary(self.alice, is_public=True)
+        like_buffer.toggle(self.diary_id, self.alice)
+        diaries = list(Diary.objects.filter(pk__in=[self.diary.pk, other.pk]))
+        like_buffer.overlay(diaries, self.alice)
+
+        overlaid = {str(diary.pk): diary for diary in diaries}
+        self.assertEqual(overlaid[self.diary_id].like_count, 1)
+        self.assertTrue(overlaid[self.diary_id].liked)
+        # Redis 에 없는 diary 는 DB 값 그대로
+        self.assertFalse(hasattr(overlaid[str(other.pk)], "liked"))
+
+    def test_like_view_and_flush_command(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.post(f"/api/diary/like/{self.diary_id}/")
+        self.assertEqual(response.json(), {"liked": True, "like_count": 1})
+
+        response = client.get(f"/api/diary/{self.diary_id}/")
+        self.assertEqual(response.json()["like_count"], 1)
+        self.assertEqual(response.json()["likes"], ["alice"])
+
+        call_command("flush_likes", "--once", stdout=io.StringIO())
+        self.assertEqual(self.db_likes(), (["alice"], 1))
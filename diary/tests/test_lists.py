@@ -0,0 +1,246 @@
+import base64
+import datetime
+import io
+import json
+import time
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import Comment, Diary, Follow
+from .base import RedisTestCase
+
+
+# 일기 목록은 행 수와 상관없이 같은 수의 쿼리
+class DiaryListQueryTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("reader")
+        self.writer = self.make_user("writer")
+        self.likers = [self.make_user(f"liker{i}") for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_diaries(self, count):
+        for i in range(count):
+            diary = self.make_diary(self.writer, text=f"일기 {i}")
+            diary.like.add(*self.likers)
+            Comment.objects.create(diary=diary, writer=self.likers[0], comment="댓글")
+
+    def query_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), len(response.json()["results"])
+
+    def assertConstantQueries(self, url):
+        self.add_diaries(2)
+        queries, rows = self.query_count(url)
+        self.assertEqual(rows, 2)
+
+        self.add_diaries(20)
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        results = response.json()["results"]
+        self.assertEqual(len(results), 22)
+        # 누른 사람 목록은 내려주지 않는다
+        self.assertNotIn("likes", results[0])
+        self.assertNotIn("like", results[0])
+        self.assertFalse(results[0]["liked"])
+
+    def test_month_list(self):
+        self.assertConstantQueries("/api/diary/filter/?month=2026-10")
+
+    def test_date_list(self):
+        self.assertConstantQueries("/api/diary/filter/?date=2026-10-01")
+
+    def test_by_user_list(self):
+        self.assertConstantQueries(f"/api/diary/by_user/{self.writer.pk}")
+
+    def test_liked_is_for_the_current_user(self):
+        liked = self.make_diary(self.writer, text="좋아요")
+        liked.like.add(self.user, *self.likers)
+        self.make_diary(self.writer, text="다른 사람만", is_public=True).like.add(
+            *self.likers
+        )
+
+        response = self.client.get("/api/diary/filter/?date=2026-10-01")
+        results = {row["id"]: row["liked"] for row in response.json()["results"]}
+        self.assertEqual(list(results.values()).count(True), 1)
+        self.assertTrue(results[str(liked.pk)])
+
+    def test_owner_sees_private_diaries(self):
+        self.make_diary(self.writer, text="공개")
+        self.make_diary(self.writer, text="비공개", is_public=False)
+        url = f"/api/diary/by_user/{self.writer.pk}"
+
+        self.assertEqual(len(self.client.get(url).json()["results"]), 1)
+        self.client.force_authenticate(self.writer)
+        self.assertEqual(len(self.client.get(url).json()["results"]), 2)
+
+
+# 댓글 목록은 작성자 / 좋아요를 한 번에 읽는다
+class CommentListQueryTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("reader")
+        self.diary = self.make_diary(self.user, text="일기")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/comments/{self.diary.pk}/"
+
+    def add_comments(self, count):
+        for i in range(count):
+            writer = self.make_user(f"commenter{Comment.objects.count()}")
+            Follow.objects.create(follower=writer, following=self.user)
+            comment = Comment.objects.create(
+                diary=self.diary, writer=writer, comment=f"댓글 {i}"
+            )
+            comment.like.add(self.user)
+
+    def test_comment_list_query_count_is_constant(self):
+        self.add_comments(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse(
+            any("diary_follow" in query["sql"] for query in queries.captured_queries)
+        )
+
+        self.add_comments(10)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(self.url)
+        results = response.json()["results"]
+        self.assertEqual(len(results), 12)
+        self.assertEqual(results[0]["likes"], ["reader"])
+        self.assertTrue(results[0]["writer_image_url"].endswith("default.jpg"))
+
+
+# keyset pagination
+class KeysetPaginationTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("reader")
+        self.writer = self.make_user("writer")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.json()["results"]]
+            url = response.json()["next"]
+        return ids
+
+    def test_pages_cover_every_row_once(self):
+        diaries = [
+            self.make_diary(self.writer, date=datetime.date(2026, 10, day % 3 + 1))
+            for day in range(7)
+        ]
+        self.make_diary(self.writer, is_public=False)
+        expected = [
+            str(diary.pk)
+            for diary in sorted(
+                diaries, key=lambda d: (d.date, d.time, d.pk), reverse=True
+            )
+        ]
+
+        by_user = f"/api/diary/by_user/{self.writer.pk}?page_size=2"
+        self.assertEqual(self.collect(by_user), expected)
+        month = "/api/diary/filter/?month=2026-10&page_size=3"
+        self.assertEqual(self.collect(month), expected)
+        self.assertEqual(self.collect(month + "&option=old"), expected[::-1])
+
+    def test_undecodable_cursor_is_not_found(self):
+        response = self.client.get("/api/diary/filter/?month=2026-10&cursor=%%%")
+        self.assertEqual(response.status_code, 404)
+        cursor = self.cursor(["2026-10-01"])
+        response = self.client.get(f"/api/diary/filter/?month=2026-10&cursor={cursor}")
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_invalid_values_is_not_found(self):
+        self.make_diary(self.writer)
+        for values in (
+            ["not-a-date", "12:00:00", "1"],
+            ["2026-10-01", "12:00:00", "not-an-id"],
+            [None, "12:00:00", "1"],
+            [["2026-10-01"], "12:00:00", "1"],
+        ):
+            cursor = self.cursor(values)
+            for url in (
+                f"/api/diary/filter/?month=2026-10&cursor={cursor}",
+                f"/api/diary/by_user/{self.writer.pk}?cursor={cursor}",
+            ):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404, (url, values))
+
+
+# 일기 목록 쿼리의 index (MySQL 에서만 확인할 수 있다)
+@skipUnless(connection.vendor == "mysql", "EXPLAIN key is MySQL specific")
+class DiaryIndexTests(RedisTestCase):
+    ordering = ("-date", "-time", "-id")
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("reader")
+        writers = [self.make_user(f"writer{i}") for i in range(5)]
+        for day in range(1, 29):
+            for writer in writers:
+                self.make_diary(
+                    writer,
+                    date=datetime.date(2026, 10, day),
+                    is_public=day % 2 == 0,
+                )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE TABLE {Diary._meta.db_table}")
+        self.public_index, self.writer_index = (
+            index.name for index in Diary._meta.indexes
+        )
+
+    def explain_key(self, queryset):
+        sql, params = queryset.values_list("pk")[:31].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        keys = [row["key"] for row in rows if row["table"] == Diary._meta.db_table]
+        self.assertEqual(len(keys), 1, rows)
+        return keys[0]
+
+    def test_index_names(self):
+        self.assertEqual(
+            [index.fields for index in Diary._meta.indexes],
+            [["is_public", "date", "time"], ["writer", "date", "time"]],
+        )
+
+    def test_month_branches_use_their_indexes(self):
+        public, own = Diary.objects.in_month(2026, 10).visible_branches(self.user)
+        self.assertEqual(
+            self.explain_key(public.order_by(*self.ordering)), self.public_index
+        )
+        self.assertEqual(
+            self.explain_key(own.order_by(*self.ordering)), self.writer_index
+        )
+
+    def test_by_user_uses_writer_index(self):
+        queryset = Diary.objects.filter(writer=self.user).order_by(*self.ordering)
+        self.assertEqual(self.explain_key(queryset), self.writer_index)
+
+    def test_explain_command(self):
+        out = io.StringIO()
+        call_command(
+            "explain_diary_queries",
+            "--user",
+            self.user.pk,
+            "--month",
+            "2026-10",
+            stdout=out,
+        )
+        self.assertIn("all diary list queries use their indexes", out.getvalue())
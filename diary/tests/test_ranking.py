@@ -0,0 +1,82 @@
+import datetime
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from .. import ranking
+from ..models import Diary
+from .base import RedisTestCase
+
+
+# 월별 인기 순위
+class RankingTests(RedisTestCase):
+    month = "2026-10"
+
+    def setUp(self):
+        super().setUp()
+        self.writer = self.make_user("writer")
+        self.likers = [self.make_user(f"liker{i}") for i in range(3)]
+        self.key = ranking.ranking_key(self.month)
+
+    def like(self, diary, *users):
+        for user in users:
+            client = APIClient()
+            client.force_authenticate(user)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(f"/api/diary/like/{diary.pk}/")
+            self.assertEqual(response.status_code, 200)
+
+    def test_top_orders_by_like_count(self):
+        first = self.make_diary(self.writer, is_public=True)
+        second = self.make_diary(self.writer, is_public=True)
+        self.make_diary(self.writer, is_public=False)
+        self.assertEqual(len(ranking.top(self.month, 10)), 2)
+
+        self.like(second, *self.likers)
+        self.like(first, self.likers[0])
+        self.assertEqual(ranking.top(self.month, 10), [str(second.pk), str(first.pk)])
+        self.assertEqual(ranking.top(self.month, 1), [str(second.pk)])
+
+    def test_refresh_uses_committed_count(self):
+        diary = self.make_diary(self.writer, is_public=True)
+        ranking.ensure(self.month)
+        # 늦게 도착한 요청의 오래된 값
+        ranking.update(diary, 5)
+        ranking.refresh(diary)
+        self.assertEqual(self.redis.zscore(self.key, str(diary.pk)), 0)
+
+    @override_settings(LIKE_WRITE_BEHIND=True)
+    def test_refresh_reads_like_buffer(self):
+        diary = self.make_diary(self.writer, is_public=True)
+        ranking.ensure(self.month)
+        self.like(diary, *self.likers[:2])
+        self.assertEqual(Diary.objects.get(pk=diary.pk).like_count, 0)
+        self.assertEqual(self.redis.zscore(self.key, str(diary.pk)), 2)
+
+    def test_private_and_moved_diaries_leave_ranking(self):
+        diary = self.make_diary(self.writer, is_public=True)
+        ranking.ensure(self.month)
+        with self.captureOnCommitCallbacks(execute=True):
+            diary.date = datetime.date(2026, 11, 2)
+            diary.save()
+        self.assertEqual(ranking.top(self.month, 10), [])
+        self.assertEqual(ranking.top("2026-11", 10), [str(diary.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            diary.is_public = False
+            diary.save()
+        self.assertEqual(ranking.top("2026-11", 10), [])
+
+    def test_filter_view(self):
+        diary = self.make_diary(self.writer, is_public=True)
+        self.like(diary, self.likers[0])
+        client = APIClient()
+        client.force_authenticate(self.writer)
+
+        response = client.get("/api/diary/filter/?month=2026-10&option=like")
+        self.assertEqual(
+            [row["id"] for row in response.json()["results"]], [str(diary.pk)]
+        )
+        for query in ("month=2026", "month=2026-13", "month=abc-10", "date=2026-10-32"):
+            response = client.get(f"/api/diary/filter/?{query}")
+            self.assertEqual(response.status_code, 400, query)
@@ -0,0 +1,227 @@
+import datetime
+import io
+import json
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from .. import presence, realtime
+from ..consumers import ActivityConsumer
+from ..models import Follow
+from .base import RedisTestCase
+
+
+# 접속 상태
+class PresenceTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+        self.carol = self.make_user("carol")
+        self.now = time.time()
+
+    def follow(self, follower, following):
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=follower, following=following)
+
+    def test_touch_and_statuses(self):
+        presence.touch(self.alice.pk, self.now - 10)
+        presence.touch(self.bob.pk, self.now - 120)
+        result = presence.statuses([self.alice.pk, self.bob.pk, self.carol.pk])
+
+        self.assertTrue(result[self.alice.pk]["status"])
+        self.assertFalse(result[self.bob.pk]["status"])
+        self.assertEqual(
+            datetime.datetime.fromisoformat(result[self.bob.pk]["last_active"]),
+            datetime.datetime.fromtimestamp(self.now - 120, tz=datetime.timezone.utc),
+        )
+        self.assertEqual(result[self.carol.pk], {"status": False, "last_active": None})
+
+    def test_touch_drops_expired_entries(self):
+        presence.touch(self.alice.pk, self.now - settings.PRESENCE_RETENTION - 1)
+        presence.touch(self.bob.pk, self.now)
+        self.assertIsNone(self.redis.zscore(presence.PRESENCE_KEY, str(self.alice.pk)))
+
+    def test_online_followers(self):
+        self.follow(self.alice, self.carol)
+        self.follow(self.bob, self.carol)
+        presence.touch(self.alice.pk, self.now - 30)
+        presence.touch(self.bob.pk, self.now - 5)
+        # 팔로워가 아닌 사용자는 접속 중이어도 빠진다
+        presence.touch(self.make_user("dave").pk, self.now)
+        self.assertEqual(
+            [user_id for user_id, _ in presence.online_followers(self.carol.pk)],
+            [self.bob.pk, self.alice.pk],
+        )
+
+        presence.touch(self.alice.pk, self.now - 120)
+        self.assertEqual(
+            [user_id for user_id, _ in presence.online_followers(self.carol.pk)],
+            [self.bob.pk],
+        )
+        self.assertEqual(list(self.redis.scan_iter(match="presence:tmp:*")), [])
+
+    def test_prune(self):
+        presence.touch(self.alice.pk, self.now - settings.PRESENCE_RETENTION - 1)
+        self.redis.zadd(
+            presence.PRESENCE_KEY,
+            {str(self.bob.pk): self.now - settings.PRESENCE_RETENTION - 5},
+        )
+        self.redis.set(f"user:{self.carol.pk}:last_seen", "old")
+        out = io.StringIO()
+        call_command("prune_presence", stdout=out)
+        self.assertIn("pruned 2 presence entries, 1 legacy keys", out.getvalue())
+        self.assertEqual(self.redis.zcard(presence.PRESENCE_KEY), 0)
+
+    def test_views(self):
+        client = APIClient()
+        client.force_login(self.alice)
+        self.assertEqual(client.get("/api/update-status/").status_code, 200)
+        self.follow(self.alice, self.bob)
+
+        response = client.get(f"/api/check-status/{self.alice.pk}/")
+        self.assertTrue(response.json()["status"])
+        response = client.get(f"/api/check-status/?ids={self.alice.pk},{self.bob.pk}")
+        self.assertEqual(
+            [(key, row["status"]) for key, row in response.json().items()],
+            [(str(self.alice.pk), True), (str(self.bob.pk), False)],
+        )
+        response = client.get("/api/online-followers/")
+        self.assertEqual(response.json(), [])
+        client.force_login(self.bob)
+        response = client.get("/api/online-followers/")
+        self.assertEqual([row["id"] for row in response.json()], [self.alice.pk])
+
+    def test_bulk_status_validation(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        for query in ("", "?ids=", "?ids=1,a", "?ids=-1"):
+            response = client.get(f"/api/check-status/{query}")
+            self.assertEqual(response.status_code, 400, query)
+        ids = ",".join(["1"] * (settings.PRESENCE_BULK_LIMIT + 1))
+        response = client.get(f"/api/check-status/?ids={ids}")
+        self.assertEqual(response.status_code, 400)
+
+
+# WebSocket 접속 상태
+class ActivityConsumerTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.bob, following=self.alice)
+
+    async def open(self, user):
+        scope = {
+            "type": "websocket",
+            "path": "/ws/activity/",
+            "headers": [],
+            "query_string": b"",
+            "subprotocols": [],
+            "user": user,
+        }
+        socket = ApplicationCommunicator(ActivityConsumer.as_asgi(), scope)
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output())["type"], "websocket.accept")
+        # accept 뒤의 연결 기록 / 알림이 끝날 때까지
+        await socket.receive_nothing(timeout=0.2)
+        return socket
+
+    async def close(self, socket):
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait()
+
+    async def events(self, socket):
+        events = []
+        while not await socket.receive_nothing(timeout=0.2):
+            events.append(json.loads((await socket.receive_output())["text"]))
+        return events
+
+    def status(self, user):
+        return presence.statuses([user.pk])[user.pk]
+
+    async def test_first_and_last_connection_are_announced(self):
+        follower = await self.open(self.bob)
+        first = await self.open(self.alice)
+        online = {"type": "presence", "user": self.alice.pk, "status": True}
+        self.assertEqual(await self.events(follower), [online])
+
+        # 두 번째 탭은 알리지 않는다
+        second = await self.open(self.alice)
+        await self.close(first)
+        self.assertEqual(await self.events(follower), [])
+        self.assertTrue(self.status(self.alice)["status"])
+
+        await self.close(second)
+        offline = {"type": "presence", "user": self.alice.pk, "status": False}
+        self.assertEqual(await self.events(follower), [offline])
+        status = self.status(self.alice)
+        self.assertFalse(status["status"])
+        self.assertIsNotNone(status["last_active"])
+        await self.close(follower)
+
+    async def test_heartbeat_keeps_connection_alive(self):
+        socket = await self.open(self.alice)
+        key = realtime.connections_key(self.alice.pk)
+        (channel,) = self.redis.zrange(key, 0, -1)
+        self.redis.zadd(key, {channel: time.time() + 1})
+        await socket.send_input(
+            {"type": "websocket.receive", "text": json.dumps({"type": "heartbeat"})}
+        )
+        self.assertTrue(await socket.receive_nothing(timeout=0.2))
+        self.assertGreater(
+            self.redis.zscore(key, channel),
+            time.time() + settings.PRESENCE_CONNECTION_TIMEOUT - 10,
+        )
+        await self.close(socket)
+
+    async def test_expired_connections_do_not_count(self):
+        # disconnect 없이 죽은 연결
+        self.assertTrue(realtime.connected(self.alice.pk, "dead", time.time() - 600))
+        follower = await self.open(self.bob)
+        socket = await self.open(self.alice)
+        online = {"type": "presence", "user": self.alice.pk, "status": True}
+        self.assertEqual(await self.events(follower), [online])
+
+        await self.close(socket)
+        self.assertEqual(len(await self.events(follower)), 1)
+        await self.close(follower)
+
+    async def test_anonymous_connection_is_closed(self):
+        socket = ApplicationCommunicator(
+            ActivityConsumer.as_asgi(),
+            {"type": "websocket", "path": "/ws/activity/", "user": AnonymousUser()},
+        )
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output())["type"], "websocket.close")
+
+    def test_leave_is_offline_and_pruned(self):
+        now = time.time()
+        presence.leave(self.alice.pk, now - 5)
+        status = self.status(self.alice)
+        self.assertFalse(status["status"])
+        self.assertAlmostEqual(
+            datetime.datetime.fromisoformat(status["last_active"]).timestamp(),
+            now - 5,
+            places=3,
+        )
+        self.assertEqual(presence.online_followers(self.bob.pk), [])
+
+        presence.leave(self.bob.pk, now - settings.PRESENCE_RETENTION - 1)
+        presence.touch(self.alice.pk, now)
+        self.assertIsNone(self.redis.zscore(presence.PRESENCE_KEY, str(self.bob.pk)))
+
+    def test_push_presence_logs_failed_sends(self):
+        with mock.patch.object(
+            realtime, "get_channel_layer"
+        ) as get_layer, self.assertLogs("diary.realtime", "ERROR"):
+            get_layer.return_value.group_send = mock.AsyncMock(side_effect=RuntimeError)
+            async_to_sync(realtime.push_presence)(self.alice.pk, True)
+        get_layer.return_value.group_send.assert_awaited_once()
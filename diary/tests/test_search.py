@@ -0,0 +1,304 @@
+import datetime
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from .. import diary_search, user_search, username_bloom
+from ..models import Diary, UserModel
+from ..serializers import image_url
+from .base import RedisTestCase
+
+
+# 사용자 검색 index
+class UserSearchTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice = self.make_user("alice", name="앨리스")
+            self.alicia = self.make_user("alicia", name="Kim")
+            self.bob = self.make_user("bob", name="Alice Bob")
+
+    def usernames(self, keyword):
+        return [doc["username"] for doc in user_search.search(keyword)]
+
+    def grams_of(self, user_id):
+        return {
+            key.decode().split(":", 2)[2]
+            for key in self.redis.scan_iter(match=user_search.gram_key("*"))
+            if self.redis.sismember(key, user_id)
+        }
+
+    def test_fallback_before_rebuild(self):
+        self.assertEqual(self.usernames("ali"), ["alice", "alicia"])
+        self.assertEqual(self.usernames("lic"), [])
+
+    def test_search_ranks_prefix_first(self):
+        self.assertEqual(user_search.rebuild(chunk_size=2), 3)
+        self.assertEqual(self.usernames("alice"), ["alice", "bob"])
+        self.assertEqual(self.usernames("ALI"), ["alice", "alicia", "bob"])
+        self.assertEqual(self.usernames("lic"), ["alice", "alicia", "bob"])
+        self.assertEqual(self.usernames("리스"), ["alice"])
+        self.assertEqual(self.usernames(" "), [])
+
+    def test_rename_and_delete(self):
+        user_search.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.username = "carol"
+            self.alice.save()
+        self.assertEqual(self.usernames("alic"), ["alicia", "bob"])
+        self.assertEqual(self.usernames("car"), ["carol"])
+        self.assertNotIn("al", self.grams_of(self.alice.pk))
+
+        user_id = self.alice.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.delete()
+        self.assertEqual(self.usernames("car"), [])
+        self.assertEqual(self.grams_of(user_id), set())
+        self.assertIsNone(self.redis.hget(user_search.DOC_KEY, user_id))
+
+    def test_concurrent_rename_is_retried(self):
+        user_search.rebuild()
+        terms = user_search.terms
+        raced = []
+
+        def race(doc):
+            # 첫 시도가 문서를 읽은 뒤 다른 요청이 먼저 이름을 바꾼 상황
+            if not raced:
+                raced.append(doc)
+                user_search.index(self.alice.pk, "alison", "앨리스", "default.jpg")
+            return terms(doc)
+
+        with mock.patch.object(user_search, "terms", side_effect=race):
+            user_search.index(self.alice.pk, "carol", "앨리스", "default.jpg")
+
+        self.assertEqual(self.usernames("carol"), ["carol"])
+        # 끼어든 "alison" 의 gram 도 남지 않는다
+        self.assertEqual(self.usernames("alis"), [])
+        self.assertNotIn("is", self.grams_of(self.alice.pk))
+
+    def test_view(self):
+        user_search.rebuild()
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        response = client.get("/api/search/ali/?limit=1")
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "id": self.alice.pk,
+                    "username": "alice",
+                    "name": "앨리스",
+                    "image_url": image_url(self.alice.image),
+                }
+            ],
+        )
+
+
+# 일기 전문 검색 index
+class DiarySearchTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+
+    def write(self, writer, text, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.make_diary(writer, text, **kwargs)
+
+    def saved(self, diary, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            diary.save(**kwargs)
+
+    def found(self, query, user, emotion=None):
+        # 같은 검색은 잠시 결과를 재사용하므로 지운다
+        for key in self.redis.scan_iter(match="diarysearch:result:*"):
+            self.redis.delete(key)
+        key = diary_search.search(query, user.pk, emotion)
+        return {pk for pk, _ in diary_search.page(key, 0, 50)[0]}
+
+    def assertStatsMatchDocuments(self):
+        docs = [
+            self.redis.hgetall(key)
+            for key in self.redis.scan_iter(match=diary_search.doc_key("*"))
+        ]
+        stats = self.redis.hgetall(diary_search.STATS_KEY)
+        self.assertEqual(int(stats.get(b"docs", 0)), len(docs))
+        self.assertEqual(
+            int(stats.get(b"length", 0)), sum(int(doc[b"length"]) for doc in docs)
+        )
+
+    def test_search_visibility_and_terms(self):
+        public = self.write(self.alice, "오늘은 바다에 갔다", is_public=True)
+        private = self.write(self.alice, "바다 여행 계획", is_public=False)
+        self.write(self.bob, "산에 갔다", is_public=True)
+
+        self.assertEqual(
+            self.found("바다", self.alice), {str(public.pk), str(private.pk)}
+        )
+        self.assertEqual(self.found("바다", self.bob), {str(public.pk)})
+        # 모든 term 을 포함한 일기만
+        self.assertEqual(self.found("바다 갔다", self.alice), {str(public.pk)})
+        self.assertEqual(self.found("없는말", self.alice), set())
+        self.assertStatsMatchDocuments()
+
+    def test_only_changed_fields_are_reindexed(self):
+        diary = self.write(self.alice, "바다", is_public=False)
+        diary = Diary.objects.get(pk=diary.pk)
+        with mock.patch.object(diary_search, "index") as index:
+            diary.date = datetime.date(2026, 10, 2)
+            self.saved(diary)
+            self.assertFalse(index.called)
+
+            diary.is_public = True
+            self.saved(diary)
+            self.assertFalse(index.called)
+        self.assertEqual(self.found("바다", self.bob), {str(diary.pk)})
+
+        with mock.patch.object(diary_search, "index") as index:
+            # deferred 인 text 는 바뀌지 않은 것
+            deferred = Diary.objects.only("id", "writer", "is_public").get(pk=diary.pk)
+            deferred.is_public = False
+            self.saved(deferred)
+            self.assertFalse(index.called)
+        self.assertEqual(self.found("바다", self.bob), set())
+
+        diary = Diary.objects.get(pk=diary.pk)
+        diary.content = "산"
+        self.saved(diary)
+        self.assertEqual(self.found("산", self.alice), {str(diary.pk)})
+        self.assertStatsMatchDocuments()
+
+    def test_emotion(self):
+        diary = self.write(self.alice, "바다", is_public=True)
+        diary_search.set_emotion(diary.pk, 3)
+        self.assertEqual(self.found("바다", self.bob, 3), {str(diary.pk)})
+
+        diary = Diary.objects.get(pk=diary.pk)
+        diary.emotion = 1
+        self.saved(diary)
+        self.assertEqual(self.found("바다", self.bob, 3), set())
+        self.assertEqual(self.found("바다", self.bob, 1), {str(diary.pk)})
+        # index 에 없는 일기는 무시
+        diary_search.set_emotion(self.make_diary(self.alice).pk, 3)
+        diary_search.set_public(self.make_diary(self.alice).pk, True)
+        self.assertEqual(self.redis.zcard(diary_search.PUBLIC_KEY), 1)
+
+    def test_remove(self):
+        diary = self.write(self.alice, "바다 여행", is_public=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            Diary.objects.get(pk=diary.pk).delete()
+        self.assertEqual(self.found("바다", self.alice), set())
+        self.assertFalse(self.redis.exists(diary_search.doc_key(diary.pk)))
+        self.assertStatsMatchDocuments()
+        diary_search.remove(diary.pk)
+        self.assertStatsMatchDocuments()
+
+    def test_concurrent_index_is_retried(self):
+        diary = self.write(self.alice, "바다", is_public=True)
+        unindex = diary_search.unindex
+        raced = []
+
+        def race(pipe, diary_id, doc):
+            # 첫 시도가 문서를 읽은 뒤 다른 저장이 먼저 반영된 상황
+            if not raced:
+                raced.append(doc)
+                diary.text = "호수"
+                diary_search.index(diary)
+            return unindex(pipe, diary_id, doc)
+
+        latest = Diary.objects.get(pk=diary.pk)
+        latest.text = "하늘"
+        with mock.patch.object(diary_search, "unindex", side_effect=race):
+            diary_search.index(latest)
+
+        self.assertEqual(len(raced), 1)
+        self.assertEqual(self.found("하늘", self.alice), {str(diary.pk)})
+        self.assertEqual(self.found("호수", self.alice), set())
+        self.assertEqual(self.found("바다", self.alice), set())
+        self.assertStatsMatchDocuments()
+
+    def test_view(self):
+        diary = self.write(self.alice, "바다", is_public=True)
+        self.write(self.bob, "바다", is_public=False)
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.get("/api/diary/search/?q=바다")
+        self.assertEqual(
+            [row["id"] for row in response.json()["results"]], [str(diary.pk)]
+        )
+        response = client.get("/api/diary/search/?q=바다&emotion=9")
+        self.assertEqual(response.status_code, 400)
+
+
+# username Bloom filter
+class UsernameBloomTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user("Zoë")
+        username_bloom.reset_stats()
+
+    def test_normalize_matches_collation(self):
+        self.assertEqual(username_bloom.normalize("Zoë"), "zoe")
+        self.assertEqual(username_bloom.normalize("ÉLAN"), "elan")
+        self.assertEqual(username_bloom.normalize("Straße"), "strasse")
+        self.assertEqual(username_bloom.normalize(None), "")
+        self.assertEqual(username_bloom.offsets("ZOE"), username_bloom.offsets("zoë"))
+
+    def test_missing_filter_falls_back_to_db(self):
+        self.assertIsNone(username_bloom.might_exist("Zoë"))
+        self.assertTrue(username_bloom.username_exists("Zoë"))
+        self.assertEqual(username_bloom.stats()["unavailable"], 1)
+
+    def test_rebuild_and_lookup(self):
+        self.make_user("nobody")
+        self.assertEqual(username_bloom.rebuild(chunk_size=1), 2)
+        self.assertTrue(self.redis.exists("username:bloom:v2"))
+        self.assertFalse(self.redis.exists(username_bloom.BUILDING_KEY))
+        self.assertTrue(username_bloom.might_exist("zoe"))
+
+        with self.assertNumQueries(0):
+            self.assertFalse(username_bloom.username_exists("somebody"))
+        self.assertTrue(username_bloom.username_exists("Zoë"))
+        stats = username_bloom.stats()
+        self.assertEqual((stats["definitely_absent"], stats["present"]), (1, 1))
+
+    @override_settings(USERNAME_BLOOM_STATS_INTERVAL=3600)
+    def test_stats_are_written_in_batches(self):
+        username_bloom.rebuild()
+        for _ in range(3):
+            username_bloom.username_exists("somebody")
+        # 조회마다 Redis 에 쓰지 않는다
+        self.assertFalse(self.redis.exists(username_bloom.STATS_KEY))
+        self.assertEqual(username_bloom.stats()["definitely_absent"], 3)
+        self.assertEqual(
+            self.redis.hget(username_bloom.STATS_KEY, "definitely_absent"), b"3"
+        )
+
+    def test_signup_adds_to_filter(self):
+        username_bloom.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_user("newcomer")
+        self.assertTrue(username_bloom.might_exist("NEWCOMER"))
+
+    def test_signup_checks_the_database_only(self):
+        username_bloom.rebuild()
+        client = APIClient()
+        data = {"username": "newcomer", "password": "pw", "email": "n@example.com"}
+        with mock.patch.object(username_bloom, "might_exist") as might_exist:
+            response = client.post("/api/signup/", {**data, "name": "new"})
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()["username"], "newcomer")
+
+            response = client.post("/api/signup/", {**data, "name": "again"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("username", response.json())
+        self.assertFalse(might_exist.called)
+        self.assertEqual(UserModel.objects.filter(username="newcomer").count(), 1)
+
+    def test_username_filter_view(self):
+        username_bloom.rebuild()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertIs(client.get("/api/user/check-username/Zoë/").json(), True)
+        self.assertIs(client.get("/api/user/check-username/somebody/").json(), False)
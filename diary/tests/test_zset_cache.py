@@ -0,0 +1,80 @@
+from .. import zset_cache
+from .base import RedisTestCase
+
+
+# 버전이 붙은 sorted set 캐시 (팔로우 관계, 월별 인기 순위)
+class ZSetCacheTests(RedisTestCase):
+    key = "test:zset"
+    timeout = 60
+
+    def setUp(self):
+        super().setUp()
+        self.rows = [("a", 1), ("b", 2)]
+        self.reads = 0
+
+    def read_rows(self):
+        self.reads += 1
+        return list(self.rows)
+
+    def ensure(self):
+        return zset_cache.ensure(self.key, self.read_rows, self.timeout)
+
+    def members(self):
+        return self.redis.zrange(self.key, 0, -1, withscores=True)
+
+    def test_ensure_loads_once(self):
+        self.ensure()
+        self.ensure()
+        self.assertEqual(self.reads, 1)
+        self.assertEqual(self.members(), [(b"_", 0), (b"a", 1), (b"b", 2)])
+        self.assertGreater(self.redis.ttl(self.key), 0)
+
+    def test_empty_set_is_cached(self):
+        self.rows = []
+        self.ensure()
+        self.ensure()
+        self.assertEqual(self.reads, 1)
+        self.assertEqual(self.members(), [(b"_", 0)])
+
+    def test_add_and_remove_update_a_loaded_set(self):
+        self.ensure()
+        zset_cache.add(self.key, "c", 3, self.timeout)
+        zset_cache.remove(self.key, "a", self.timeout)
+        self.assertEqual(self.members(), [(b"_", 0), (b"b", 2), (b"c", 3)])
+        self.assertEqual(zset_cache.version(self.key), "2")
+
+    def test_add_does_not_create_a_missing_set(self):
+        zset_cache.add(self.key, "c", 3, self.timeout)
+        self.assertFalse(self.redis.exists(self.key))
+        self.assertEqual(zset_cache.version(self.key), "1")
+
+        # load 한 뒤 만료된 경우
+        self.ensure()
+        self.redis.delete(self.key)
+        zset_cache.add(self.key, "c", 3, self.timeout)
+        self.assertFalse(self.redis.exists(self.key))
+
+    def test_store_discards_rows_read_before_a_change(self):
+        read_version = zset_cache.version(self.key)
+        stale = self.read_rows()
+        zset_cache.add(self.key, "c", 3, self.timeout)
+
+        self.assertFalse(zset_cache.store(self.key, read_version, stale, self.timeout))
+        self.assertFalse(self.redis.exists(self.key))
+
+    def test_load_gives_up_while_rows_keep_changing(self):
+        def changing_rows():
+            # DB 를 읽는 사이에 매번 다른 요청이 멤버를 바꾼다
+            zset_cache.add(self.key, "c", 3, self.timeout)
+            return self.read_rows()
+
+        zset_cache.load(self.key, changing_rows, self.timeout)
+        self.assertEqual(self.reads, zset_cache.LOAD_ATTEMPTS)
+        self.assertFalse(self.redis.exists(self.key))
+
+        self.ensure()
+        self.assertEqual(self.members(), [(b"_", 0), (b"a", 1), (b"b", 2)])
+
+    def test_empty_score(self):
+        zset_cache.ensure(self.key, self.read_rows, self.timeout, empty_score=-1)
+        self.assertEqual(self.redis.zscore(self.key, zset_cache.EMPTY), -1)
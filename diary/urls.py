@@ -39,6 +39,10 @@ urlpatterns = [
     path(
         "check-status/<int:user_id>/", views.check_user_status, name="check_user_status"
     ),
+    # check active status of many users
+    path("check-status/", views.check_users_status, name="check_users_status"),
+    # followers online now
+    path("online-followers/", views.online_followers, name="online_followers"),
     ## Diary
     # search
     path(
@@ -46,6 +50,14 @@ urlpatterns = [
         views.DiaryFilterRetrieveView.as_view(),
         name="diary-retrieve-by-filter",
     ),
+    # full-text search
+    path("diary/search/", views.DiarySearchView.as_view(), name="diary-search"),
+    # emotion calendar
+    path("diary/calendar/", views.DiaryCalendarView.as_view(), name="diary-calendar"),
+    # mood statistics
+    path(
+        "diary/analytics/", views.DiaryAnalyticsView.as_view(), name="diary-analytics"
+    ),
     # retrieve
     path("diary/<str:pk>/", views.DiaryRetrieveView.as_view(), name="diary-retrieve"),
     # retrieve by username
@@ -66,6 +78,12 @@ urlpatterns = [
     ),
     # like
     path("diary/like/<str:pk>/", views.DiaryLikeView.as_view(), name="diary-like"),
+    # emotion analysis status
+    path(
+        "diary/emotion/<str:pk>/",
+        views.DiaryEmotionStatusView.as_view(),
+        name="diary-emotion-status",
+    ),
     ## Comment
     path("", include(comment_router.urls)),
     ## Follow
@@ -0,0 +1,195 @@
+import json
+import unicodedata
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+# 사용자 검색 index (username / name)
+#
+# usersearch:doc          hash, user id -> 검색 결과로 돌려줄 JSON
+# usersearch:gram:{gram}  set, 2-gram 을 포함하는 user id (한글도 글자 단위)
+# usersearch:prefix       sorted set (score 0), "{정규화된 값}\0{user id}" 로 prefix 검색
+# usersearch:built        rebuild_user_search 가 한 번이라도 실행됐는지
+#
+# 문서를 읽고 바꾸는 index / remove 는 usersearch:doc 을 WATCH 하는 transaction 이다.
+DOC_KEY = "usersearch:doc"
+PREFIX_KEY = "usersearch:prefix"
+BUILT_KEY = "usersearch:built"
+
+# 순위: 낮을수록 먼저
+EXACT, USERNAME_PREFIX, NAME_PREFIX, USERNAME_MATCH, NAME_MATCH = range(5)
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def normalize(value):
+    return unicodedata.normalize("NFKC", value or "").lower().strip()
+
+
+def gram_key(gram):
+    return f"usersearch:gram:{gram}"
+
+
+def grams(value):
+    value = normalize(value)
+    return {value[i : i + 2] for i in range(len(value) - 1)}
+
+
+def document(user_id, username, name, image):
+    from .serializers import image_url
+
+    return {
+        "id": user_id,
+        "username": username,
+        "name": name,
+        "image_url": image_url(image),
+    }
+
+
+def terms(doc):
+    return grams(doc["username"]) | grams(doc["name"])
+
+
+def prefixes(doc):
+    return {
+        f"{normalize(value)}\0{doc['id']}" for value in (doc["username"], doc["name"])
+    }
+
+
+def index(user_id, username, name, image):
+    doc = document(user_id, username, name, image)
+
+    def update(pipe):
+        old = pipe.hget(DOC_KEY, user_id)
+        old = json.loads(old) if old else None
+        if old == doc:
+            # last_login 갱신처럼 검색 필드가 그대로인 저장
+            return
+        pipe.multi()
+        if old:
+            for gram in terms(old) - terms(doc):
+                pipe.srem(gram_key(gram), user_id)
+            stale = prefixes(old) - prefixes(doc)
+            if stale:
+                pipe.zrem(PREFIX_KEY, *stale)
+        add(pipe, doc)
+
+    # 읽은 문서가 쓰기 전에 바뀌면 (동시에 들어온 저장) 다시 읽어서 처리한다
+    get_connection().transaction(update, DOC_KEY)
+
+
+def add(pipe, doc):
+    for gram in terms(doc):
+        pipe.sadd(gram_key(gram), doc["id"])
+    pipe.zadd(PREFIX_KEY, {member: 0 for member in prefixes(doc)})
+    pipe.hset(DOC_KEY, doc["id"], json.dumps(doc, ensure_ascii=False))
+
+
+def index_user(user):
+    index(user.pk, user.username, user.name, user.image)
+
+
+def remove(user_id):
+    def update(pipe):
+        old = pipe.hget(DOC_KEY, user_id)
+        if not old:
+            return
+        old = json.loads(old)
+        pipe.multi()
+        for gram in terms(old):
+            pipe.srem(gram_key(gram), user_id)
+        pipe.zrem(PREFIX_KEY, *prefixes(old))
+        pipe.hdel(DOC_KEY, user_id)
+
+    get_connection().transaction(update, DOC_KEY)
+
+
+def prefix_ids(query, limit):
+    # UTF-8 에는 0xff 바이트가 없으므로 "[query" ~ "[query\xff" 가 query 로 시작하는 값
+    start = f"[{query}".encode()
+    members = get_connection().zrangebylex(
+        PREFIX_KEY, start, start + b"\xff", start=0, num=limit
+    )
+    return [int(member.decode().rsplit("\0", 1)[1]) for member in members]
+
+
+def rank(doc, query):
+    username, name = normalize(doc["username"]), normalize(doc["name"])
+    if username == query:
+        tier = EXACT
+    elif username.startswith(query):
+        tier = USERNAME_PREFIX
+    elif name.startswith(query):
+        tier = NAME_PREFIX
+    elif query in username:
+        tier = USERNAME_MATCH
+    elif query in name:
+        tier = NAME_MATCH
+    else:
+        return None
+    return (tier, len(username), username)
+
+
+def search(keyword, limit=None):
+    """username / name 에 keyword 가 들어간 사용자, prefix 일치가 먼저 온다."""
+    limit = min(limit or settings.USER_SEARCH_LIMIT, settings.USER_SEARCH_MAX_LIMIT)
+    query = normalize(keyword)
+    if not query:
+        return []
+    conn = get_connection()
+    if not conn.exists(BUILT_KEY):
+        return fallback(query, limit)
+
+    # prefix 일치는 항상 후보에 넣고, 2글자 이상이면 bigram 교집합으로 중간 일치도 찾는다
+    candidates = prefix_ids(query, settings.USER_SEARCH_CANDIDATES)
+    if len(query) >= 2:
+        members = conn.sinter([gram_key(gram) for gram in grams(query)])
+        candidates += sorted(int(member) for member in members)
+    candidates = list(dict.fromkeys(candidates))[: settings.USER_SEARCH_CANDIDATES]
+    if not candidates:
+        return []
+
+    docs = [json.loads(doc) for doc in conn.hmget(DOC_KEY, candidates) if doc]
+    ranked = [(rank(doc, query), doc) for doc in docs]
+    ranked = sorted(
+        (item for item in ranked if item[0] is not None), key=lambda x: x[0]
+    )
+    return [doc for _, doc in ranked[:limit]]
+
+
+def fallback(query, limit):
+    # index 를 만들기 전: username prefix 만 DB 에서 찾는다
+    from .models import UserModel
+
+    rows = UserModel.objects.filter(username__istartswith=query).values_list(
+        "id", "username", "name", "image"
+    )[:limit]
+    return [document(*row) for row in rows]
+
+
+def rebuild(chunk_size=1000):
+    from .models import UserModel
+
+    conn = get_connection()
+    keys = [DOC_KEY, PREFIX_KEY, BUILT_KEY]
+    keys += list(conn.scan_iter(match=gram_key("*"), count=1000))
+    conn.delete(*keys)
+
+    rows = UserModel.objects.order_by("pk").values_list(
+        "id", "username", "name", "image"
+    )
+    last_pk, total = 0, 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+        pipe = conn.pipeline()
+        for row in chunk:
+            add(pipe, document(*row))
+        pipe.execute()
+        total += len(chunk)
+        if len(chunk) < chunk_size:
+            break
+        last_pk = chunk[-1][0]
+    conn.set(BUILT_KEY, 1)
+    return total
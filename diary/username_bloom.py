@@ -0,0 +1,178 @@
+import atexit
+import hashlib
+import math
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+# 사용 중인 username 의 Bloom filter (Redis bitmap)
+# 없다고 나오면 확실히 사용 가능, 있다고 나오면 DB 에서 다시 확인한다
+# 삭제는 할 수 없으므로 (이름 변경 전 username 은 남는다) 가끔 다시 만든다
+# normalize() 가 바뀌면 version 을 올린다 (rebuild_username_bloom 으로 다시 만들 때까지
+# filter 가 없는 것으로 보고 DB 에서 확인한다)
+BLOOM_KEY = "username:bloom:v2"
+BUILDING_KEY = "username:bloom:v2:building"
+STATS_KEY = "username:bloom:stats"
+
+# 조회마다 Redis 를 호출하지 않도록 프로세스 안에서 세고
+# USERNAME_BLOOM_STATS_INTERVAL 마다 한 번의 pipeline 으로 더한다
+_counts = Counter()
+_counts_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def size():
+    """(bit 수, hash 수) capacity 개를 넣었을 때 오탐율이 error_rate 가 되도록."""
+    capacity = settings.USERNAME_BLOOM_CAPACITY
+    error_rate = settings.USERNAME_BLOOM_ERROR_RATE
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def normalize(username):
+    # MySQL 기본 collation (utf8mb4_0900_ai_ci) 은 대소문자와 악센트를 구분하지 않는다
+    decomposed = unicodedata.normalize("NFKD", username or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def offsets(username):
+    # double hashing: h1 + i * h2
+    bits, hashes = size()
+    digest = hashlib.sha256(normalize(username).encode()).digest()
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def add(username, conn=None):
+    conn = conn or get_connection()
+    # 아직 만들지 않은 filter 에 일부만 넣으면 "확실히 없음" 이 틀리게 된다
+    # rebuild 중이면 새로 만드는 filter 에도 넣는다
+    keys = [key for key in (BLOOM_KEY, BUILDING_KEY) if conn.exists(key)]
+    pipe = conn.pipeline()
+    for key in keys:
+        for offset in offsets(username):
+            pipe.setbit(key, offset, 1)
+    pipe.execute()
+
+
+def might_exist(username):
+    """False 면 확실히 없는 username, None 이면 filter 가 아직 없다."""
+    conn = get_connection()
+    if not conn.exists(BLOOM_KEY):
+        return None
+    pipe = conn.pipeline()
+    for offset in offsets(username):
+        pipe.getbit(BLOOM_KEY, offset)
+    return all(pipe.execute())
+
+
+def username_exists(username):
+    from .models import UserModel
+
+    maybe = might_exist(username)
+    if maybe is False:
+        record("definitely_absent")
+        return False
+    exists = UserModel.objects.filter(username=username).exists()
+    if maybe is None:
+        record("unavailable")
+    elif exists:
+        record("present")
+    else:
+        record("false_positive")
+    return exists
+
+
+def record(counter):
+    with _counts_lock:
+        _counts[counter] += 1
+        due = time.monotonic() - _flushed_at >= settings.USERNAME_BLOOM_STATS_INTERVAL
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    global _flushed_at
+    with _counts_lock:
+        counts = dict(_counts)
+        _counts.clear()
+        _flushed_at = time.monotonic()
+    if not counts:
+        return
+    pipe = get_connection().pipeline()
+    for counter, count in counts.items():
+        pipe.hincrby(STATS_KEY, counter, count)
+    pipe.execute()
+
+
+atexit.register(flush_stats)
+
+
+def stats():
+    flush_stats()
+    conn = get_connection()
+    counters = {
+        key.decode(): int(value) for key, value in conn.hgetall(STATS_KEY).items()
+    }
+    absent = counters.get("definitely_absent", 0)
+    false_positive = counters.get("false_positive", 0)
+    bits, hashes = size()
+    fill = conn.bitcount(BLOOM_KEY) / bits
+    return {
+        "definitely_absent": absent,
+        "present": counters.get("present", 0),
+        "false_positive": false_positive,
+        "unavailable": counters.get("unavailable", 0),
+        # 실제로 없는 username 중 DB 조회까지 간 비율
+        "false_positive_rate": (
+            round(false_positive / (false_positive + absent), 4)
+            if false_positive + absent
+            else 0
+        ),
+        "expected_false_positive_rate": round(fill**hashes, 6),
+        "bits": bits,
+        "hashes": hashes,
+        "fill_ratio": round(fill, 4),
+    }
+
+
+def reset_stats():
+    with _counts_lock:
+        _counts.clear()
+    get_connection().delete(STATS_KEY)
+
+
+def rebuild(chunk_size=5000):
+    from .models import UserModel
+
+    conn = get_connection()
+    conn.delete(BUILDING_KEY)
+    # 빈 filter 를 먼저 만들어 두어야 그 사이 가입한 사용자가 add() 로 함께 들어간다
+    conn.setbit(BUILDING_KEY, 0, 0)
+
+    rows = UserModel.objects.order_by("pk").values_list("pk", "username")
+    last_pk, total = 0, 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+        pipe = conn.pipeline()
+        for _, username in chunk:
+            for offset in offsets(username):
+                pipe.setbit(BUILDING_KEY, offset, 1)
+        pipe.execute()
+        total += len(chunk)
+        if len(chunk) < chunk_size:
+            break
+        last_pk = chunk[-1][0]
+
+    conn.rename(BUILDING_KEY, BLOOM_KEY)
+    return total
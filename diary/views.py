@@ -1,24 +1,50 @@
+import datetime
+import time
+
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.contrib.auth import authenticate, login, logout
-from django_redis import get_redis_connection
 from django.contrib.auth.decorators import login_required
-from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
+from django.conf import settings
 
 
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework import status, viewsets, generics, permissions
 from rest_framework.views import APIView
 
-from .models import UserModel, Follow, Diary, Comment
+from . import (
+    analytics,
+    diary_search,
+    follow_cache,
+    like_buffer,
+    presence,
+    ranking,
+    realtime,
+    user_search,
+    username_bloom,
+)
+from .models import (
+    UserModel,
+    Follow,
+    Diary,
+    Comment,
+    DailyEmotionSummary,
+    month_range,
+    toggle_like,
+)
+from .pagination import KeysetPagination, RankedPagination
 from .serializers import (
     UserSerializer,
+    UserProfileSerializer,
     FollowSerializer,
     DiarySerializer,
+    DiaryListSerializer,
     CommentSerializer,
 )
 
@@ -34,46 +60,52 @@ class SearchEvery(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, keyword):
-        # User
-        res_username = UserModel.objects.filter(Q(username__icontains=keyword))
-        res_name = UserModel.objects.filter(Q(name__icontains=keyword))
-
-        user_result = res_username.union(res_name)
-
-        serializer = UserSerializer(user_result, many=True)
-
-        return Response(serializer.data)
+        # User: Redis n-gram index (diary.user_search), {id, username, name, image_url}
+        limit = request.query_params.get("limit")
+        limit = int(limit) if limit and limit.isdigit() else None
+        return Response(user_search.search(keyword, limit))
 
 
 # active
-redis_conn = get_redis_connection("default")
-
-
 @login_required
 def update_user_status(request):
-    user_id = request.user.id
-    # 유저 활성화 상태를 Redis에 저장, 만료 시간 1분
-    # redis_conn.set(f"user:{user_id}:status", "active", ex=30)
-    redis_conn.set(
-        f"user:{user_id}:last_seen",
-        timezone.localtime(timezone.now()).isoformat(),
-    )
+    # 접속 시각을 Redis sorted set 에 기록 (diary.presence)
+    presence.touch(request.user.id)
     return JsonResponse({"details": "update status"}, status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def check_user_status(request, user_id):
-    last_seen = redis_conn.get(f"user:{user_id}:last_seen")
-    if last_seen:
-        last_active_time = timezone.datetime.fromisoformat(last_seen.decode())
-        time_difference = timezone.localtime(timezone.now()) - last_active_time
-        if (
-            time_difference.total_seconds() > 60
-        ):  # 1분 이상 업데이트되지 않으면 offline 처리
-            return JsonResponse({"status": False, "last_active": last_seen.decode()})
-        return JsonResponse({"status": True, "last_active": last_seen.decode()})
-    return JsonResponse({"status": False})
+    # 1분 이상 갱신되지 않으면 offline
+    return JsonResponse(presence.statuses([user_id])[user_id])
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def check_users_status(request):
+    # ?ids=1,2,3 -> {"1": {"status", "last_active"}, ...}
+    ids = request.query_params.get("ids", "").split(",")
+    if not all(user_id.isdigit() for user_id in ids):
+        raise ValidationError({"detail": "ids must be comma separated integers"})
+    if len(ids) > settings.PRESENCE_BULK_LIMIT:
+        raise ValidationError(
+            {"detail": f"at most {settings.PRESENCE_BULK_LIMIT} ids per request"}
+        )
+    return Response(presence.statuses([int(user_id) for user_id in ids]))
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def online_followers(request):
+    # 지금 접속 중인 내 팔로워
+    now = time.time()
+    return Response(
+        [
+            {"id": user_id, **presence.describe(last_seen, now)}
+            for user_id, last_seen in presence.online_followers(request.user.id)
+        ]
+    )
 
 
 # User
@@ -113,7 +145,7 @@ class CheckAuthView(APIView):
 
     def get(self, request, *args, **kwargs):
         user = request.user
-        serializer = UserSerializer(user)
+        serializer = UserProfileSerializer(user)
         return JsonResponse(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -121,7 +153,8 @@ class UsernameFilter(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, username):
-        username_exist = UserModel.objects.filter(username=username).exists()
+        # Bloom filter 에 없으면 DB 를 조회하지 않는다
+        username_exist = username_bloom.username_exists(username)
 
         if username_exist:
             return Response(True)
@@ -134,25 +167,15 @@ class UserCreateView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request, *args, **kwargs):
+        # username 중복은 serializer 의 UniqueValidator 가 DB 에서 확인한다
         serializer = UserSerializer(data=request.data)
-        if serializer.is_valid(raise_exception=True):
-            username = request.data.get("username")
-            if UserModel.objects.filter(username=username).exists():
-                return Response(
-                    {"detail": "Username already exists"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            else:
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(
-            {"detail": "Invalid value"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class UserDetailView(generics.RetrieveAPIView):
-    serializer_class = UserSerializer
+    serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
@@ -164,9 +187,7 @@ class UserDetailView(generics.RetrieveAPIView):
         user = self.get_object()
         authenticated_user = request.user
 
-        following = Follow.objects.filter(
-            follower=authenticated_user, following=user
-        ).exists()
+        following = follow_cache.is_following(authenticated_user.pk, user.pk)
 
         user_data = self.get_serializer(user).data
 
@@ -194,25 +215,37 @@ class FollowViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(follower=self.request.user)
 
+    def get_list_user(self, request):
+        # ?user=<id> 로 다른 사용자의 목록 조회
+        user_id = request.query_params.get("user")
+        if user_id is None:
+            return request.user.pk
+        if not user_id.isdigit():
+            raise ValidationError({"user": "A valid user id is required."})
+        return int(user_id)
+
+    def paginated_users(self, request, follows, field):
+        paginator = KeysetPagination(ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(
+            follows.select_related(field), request, view=self
+        )
+        users = [getattr(follow, field) for follow in page]
+        serializer = UserProfileSerializer(users, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(
         detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated]
     )
     def followers(self, request):
-        user = request.user
-        followers = Follow.objects.filter(following=user).select_related("follower")
-        follower_users = [follow.follower for follow in followers]
-        serializer = UserSerializer(follower_users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        follows = Follow.objects.filter(following=self.get_list_user(request))
+        return self.paginated_users(request, follows, "follower")
 
     @action(
         detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated]
     )
     def following(self, request):
-        user = request.user
-        following = Follow.objects.filter(follower=user).select_related("following")
-        following_users = [follow.following for follow in following]
-        serializer = UserSerializer(following_users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        follows = Follow.objects.filter(follower=self.get_list_user(request))
+        return self.paginated_users(request, follows, "following")
 
     @action(
         detail=True,
@@ -221,7 +254,9 @@ class FollowViewSet(viewsets.ModelViewSet):
     )
     def unfollow(self, request, pk=None):
         follow_instance = get_object_or_404(Follow, follower=request.user, following=pk)
-        follow_instance.delete()
+        # 팔로우 수 갱신(signals)과 같은 트랜잭션에서 처리
+        with transaction.atomic():
+            follow_instance.delete()
         return Response(
             {"detail": "Successfully unfollowed the user."},
             status=status.HTTP_204_NO_CONTENT,
@@ -243,18 +278,28 @@ class DiaryRetrieveView(generics.RetrieveAPIView):
     serializer_class = DiarySerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_object(self):
+        diary = super().get_object()
+        like_buffer.overlay([diary], self.request.user)
+        return diary
+
 
 class DiaryRetrieveByUserView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, pk=None):
-        if request.user == pk:
-            diaries = Diary.objects.filter(writer=pk).order_by("-date", "-time")
+        if request.user.pk == pk:
+            diaries = Diary.objects.filter(writer=pk)
         else:
             diaries = Diary.objects.filter(Q(writer=pk) & Q(is_public=True))
 
-        serializer = DiarySerializer(diaries, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination(ordering=("-date", "-time", "-id"))
+        page = paginator.paginate_queryset(
+            diaries.for_list(request.user), request, view=self
+        )
+        like_buffer.overlay(page, request.user)
+        serializer = DiaryListSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 class DiaryFilterRetrieveView(APIView):
@@ -264,44 +309,60 @@ class DiaryFilterRetrieveView(APIView):
         date = request.query_params.get("date")
         month = request.query_params.get("month")
         option = request.query_params.get("option")
+        ordering = ("-date", "-time", "-id")
         if date:
-            diaries = (
-                Diary.objects.filter(Q(is_public=True) | Q(writer=request.user))
-                .filter(date=date)
-                .order_by("-time")
-            )
-        if month:
-            year, month = month.split("-")
-            if option == "old":
-                diaries = (
-                    Diary.objects.filter(Q(is_public=True) | Q(writer=request.user))
-                    .filter(
-                        date__year=year,
-                        date__month=month,
-                    )
-                    .order_by("date", "time")
-                )
-            elif option == "like":
-                diaries = (
-                    Diary.objects.filter(Q(is_public=True) | Q(writer=request.user))
-                    .filter(
-                        date__year=year,
-                        date__month=month,
-                    )
-                    .order_by("-like")
+            try:
+                date = datetime.date.fromisoformat(date)
+            except ValueError:
+                return Response(
+                    {"detail": "date must be YYYY-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-            else:
-                diaries = (
-                    Diary.objects.filter(Q(is_public=True) | Q(writer=request.user))
-                    .filter(
-                        date__year=year,
-                        date__month=month,
-                    )
-                    .order_by("-date", "-time")
+            diaries = Diary.objects.filter(date=date)
+        elif month:
+            try:
+                year, month = month.split("-")
+                diaries = Diary.objects.in_month(year, month)
+            except (TypeError, ValueError):
+                return Response(
+                    {"detail": "month must be YYYY-MM"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
+            if option == "old":
+                ordering = ("date", "time", "id")
+            elif option == "like":
+                return self.popular(request, f"{int(year):04d}-{int(month):02d}")
+        else:
+            return Response(
+                {"detail": "date or month is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        serializer = DiarySerializer(diaries, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination(ordering=ordering)
+        page = paginator.paginate_union(
+            diaries.visible_branches(request.user),
+            Diary.objects.for_list(request.user),
+            request,
+            view=self,
+        )
+        like_buffer.overlay(page, request.user)
+        serializer = DiaryListSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+    def popular(self, request, month):
+        # 공개 일기 top-N, 순위는 Redis (diary.ranking) 에서 읽는다
+        limit = KeysetPagination(ordering=()).get_page_size(request)
+        ids = ranking.top(month, limit)
+        diaries = {
+            str(diary.pk): diary
+            for diary in Diary.objects.filter(pk__in=ids, is_public=True).for_list(
+                request.user
+            )
+        }
+        page = [diaries[pk] for pk in ids if pk in diaries]
+        like_buffer.overlay(page, request.user)
+        serializer = DiaryListSerializer(page, many=True, context={"request": request})
+        return Response({"next": None, "results": serializer.data})
 
 
 class DiaryDestoryView(generics.DestroyAPIView):
@@ -316,26 +377,115 @@ class DiaryUpdateView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
+class DiaryEmotionStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk=None):
+        diary = get_object_or_404(
+            Diary.objects.only(
+                "id", "writer", "is_public", "emotion", "probs", "emotion_status"
+            ),
+            pk=pk,
+        )
+        if not diary.is_public and diary.writer_id != request.user.id:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        return Response(
+            {
+                "id": diary.id,
+                "emotion_status": diary.emotion_status,
+                "emotion": diary.emotion,
+                "probs": diary.probs,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class DiarySearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # text / content 전문 검색, 공개 일기와 내 일기만 (diary.diary_search)
+        query = request.query_params.get("q", "")
+        emotion = request.query_params.get("emotion")
+        if emotion is not None and emotion not in {"0", "1", "2", "3", "4"}:
+            raise ValidationError({"detail": "emotion must be between 0 and 4"})
+
+        key = diary_search.search(query, request.user.pk, emotion)
+        paginator = RankedPagination()
+        ranked = paginator.paginate_ranked(
+            lambda offset, size: diary_search.page(key, offset, size), request
+        )
+        # index 가 늦게 갱신된 경우를 위해 공개 여부는 DB 에서 다시 확인
+        diaries = {
+            str(diary.pk): diary
+            for diary in Diary.objects.filter(
+                Q(is_public=True) | Q(writer=request.user),
+                pk__in=[pk for pk, _ in ranked],
+            ).for_list(request.user)
+        }
+        page = [diaries[pk] for pk, _ in ranked if pk in diaries]
+        like_buffer.overlay(page, request.user)
+        serializer = DiaryListSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class DiaryCalendarView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # 내 달력: 날짜별 일기 수와 대표 감정 (DailyEmotionSummary)
+        month = request.query_params.get("month")
+        try:
+            start, end = month_range(*month.split("-"))
+        except (AttributeError, TypeError, ValueError):
+            return Response(
+                {"detail": "month must be YYYY-MM"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        days = (
+            DailyEmotionSummary.objects.filter(
+                user=request.user, date__gte=start, date__lt=end
+            )
+            .order_by("date")
+            .values("date", "diary_count", "emotion")
+        )
+        return Response(list(days), status=status.HTTP_200_OK)
+
+
+class DiaryAnalyticsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # 전체 또는 ?user= 사용자의 공개 일기 감정 통계 (최근 ?days= 일)
+        user_id = request.query_params.get("user")
+        days = request.query_params.get("days", str(settings.ANALYTICS_DEFAULT_DAYS))
+        if (user_id is not None and not user_id.isdigit()) or not days.isdigit():
+            raise ValidationError({"detail": "user and days must be integers"})
+        days = min(max(int(days), 1), settings.ANALYTICS_MAX_DAYS)
+        result = analytics.mood(int(user_id) if user_id else None, days)
+        return Response(result, status=status.HTTP_200_OK)
+
+
 class DiaryLikeView(APIView):
-    def post(self, request, pk=None):
-        diary = get_object_or_404(Diary, pk=pk)
-        user = request.user
-        print(user)
+    permission_classes = [permissions.IsAuthenticated]
 
-        if user in diary.like.all():
-            diary.like.remove(user)
-            response = Response(False, status=status.HTTP_200_OK)
+    def post(self, request, pk=None):
+        diary = get_object_or_404(Diary.objects.only("id", "date", "is_public"), pk=pk)
+        if like_buffer.enabled():
+            liked, like_count = like_buffer.toggle(pk, request.user)
         else:
-            diary.like.add(user)
-            response = Response(True, status=status.HTTP_200_OK)
-
-        diary.save()
-        return response
+            liked, like_count = toggle_like(Diary, pk, request.user)
+        transaction.on_commit(lambda: ranking.refresh(diary))
+        realtime.push_like(diary.pk, like_count)
+        return Response(
+            {"liked": liked, "like_count": like_count}, status=status.HTTP_200_OK
+        )
 
 
 # Comment
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.prefetch_related("like").all()
+    queryset = Comment.objects.for_list()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -346,25 +496,20 @@ class CommentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def retrieve(self, request, pk=None, *args, **kwargs):
-        diary_instance = get_object_or_404(Diary, id=pk)
-        comments = Comment.objects.filter(diary=diary_instance).order_by("-created_at")
-        serializer = self.get_serializer(comments, many=True)
-        return Response(serializer.data)
+        diary_instance = get_object_or_404(Diary.objects.only("id"), id=pk)
+        comments = Comment.objects.filter(diary=diary_instance).for_list()
+        paginator = KeysetPagination(ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(comments, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(
         detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated]
     )
     def like(self, request, pk=None):
-        comment = get_object_or_404(Comment, pk=pk)
-        user = request.user
-        print(user)
-
-        if user in comment.like.all():
-            comment.like.remove(user)
-            response = Response(False, status=status.HTTP_200_OK)
-        else:
-            comment.like.add(user)
-            response = Response(True, status=status.HTTP_200_OK)
-
-        comment.save()
-        return response
+        comment = get_object_or_404(Comment.objects.only("id", "diary"), pk=pk)
+        liked, like_count = toggle_like(Comment, pk, request.user)
+        realtime.push_comment_like(comment.diary_id, comment.pk, like_count)
+        return Response(
+            {"liked": liked, "like_count": like_count}, status=status.HTTP_200_OK
+        )
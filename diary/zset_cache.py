@@ -0,0 +1,89 @@
+from django_redis import get_redis_connection
+
+# DB 에서 읽어 만드는 sorted set 캐시 (diary.follow_cache, diary.ranking)
+# 아직 만들지 않은 set 과 비어 있는 set 을 구분하기 위해 EMPTY 멤버를 함께 넣는다
+#
+# {key}:version 은 멤버를 바꿀 때마다 증가한다.
+# load() 가 DB 를 읽는 동안 바뀌었으면 읽은 목록은 오래된 것이므로 저장하지 않는다.
+EMPTY = "_"
+LOAD_ATTEMPTS = 3
+
+# KEYS: set, version / ARGV: ttl, member, score
+# load() 로 만든 (만료 시간이 있는) set 에만 반영한다. 없는 set 에 ZADD 하면
+# EMPTY 도 만료 시간도 없는 불완전한 set 이 생겨 다시 load 되지 않는다.
+ADD = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+if redis.call('TTL', KEYS[1]) > 0 then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+end
+"""
+
+# KEYS: set, version / ARGV: ttl, member
+REMOVE = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+redis.call('ZREM', KEYS[1], ARGV[2])
+"""
+
+# KEYS: set, version / ARGV: 읽기 전 version, ttl, member, score, member, score, ...
+STORE = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 2 do
+    redis.call('ZADD', KEYS[1], ARGV[i + 1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def version_key(key):
+    return f"{key}:version"
+
+
+def version(key):
+    return (get_connection().get(version_key(key)) or b"0").decode()
+
+
+def store(key, read_version, pairs, timeout, empty_score=0):
+    """(member, score) 목록을 read_version 이후 변경이 없었을 때만 저장한다."""
+    args = [EMPTY, empty_score]
+    for member, score in pairs:
+        args += [str(member), score]
+    return bool(
+        get_connection().eval(
+            STORE, 2, key, version_key(key), read_version, timeout, *args
+        )
+    )
+
+
+def load(key, rows, timeout, empty_score=0):
+    """rows() 가 DB 에서 읽은 (member, score) 목록으로 set 을 다시 만든다."""
+    # 읽는 동안 계속 바뀌면 이번에는 캐시하지 않고 다음 조회 때 다시 읽는다
+    for _ in range(LOAD_ATTEMPTS):
+        read_version = version(key)
+        if store(key, read_version, rows(), timeout, empty_score):
+            break
+    return key
+
+
+def ensure(key, rows, timeout, empty_score=0):
+    if not get_connection().exists(key):
+        load(key, rows, timeout, empty_score)
+    return key
+
+
+def add(key, member, score, timeout):
+    # set 이 없으면 다음 조회 때 DB 에서 읽으므로 version 만 올린다
+    get_connection().eval(ADD, 2, key, version_key(key), timeout, str(member), score)
+
+
+def remove(key, member, timeout):
+    get_connection().eval(REMOVE, 2, key, version_key(key), timeout, str(member))